@@ -1,26 +1,31 @@
 """
 Инициализация Flask приложения
 """
+import logging
 import os
 from flask import Flask, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
-from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from config import config
+from app.utils import rate_limit_storage  # noqa: F401 — регистрирует схему sqlite:// для limits
+from app.utils.auth import CachedJWTManager
+from app.utils import logs
 
 # Инициализация расширений
 db = SQLAlchemy()
 bcrypt = Bcrypt()
-jwt = JWTManager()
+jwt = CachedJWTManager()
+# Хранилище счетчиков — RATELIMIT_STORAGE_URI из конфигурации
 limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
+    default_limits=["200 per day", "50 per hour"]
 )
 
+logger = logging.getLogger(__name__)
+
 
 def create_app(config_name='development'):
     """
@@ -42,36 +47,52 @@ def create_app(config_name='development'):
     # Загрузка конфигурации
     app.config.from_object(config[config_name])
 
+    # Логи и request id — до остальных хуков, чтобы их записи уже несли request id
+    logs.init_app(app)
+
+    # Метрики запросов — первыми, чтобы учитывать и ответы лимитера (429)
+    from app.services import metrics, profiler
+    from app.utils import query_stats
+    metrics.init_app(app)
+    query_stats.init_app(app)
+    profiler.init_app(app)
+
     # Инициализация расширений
     db.init_app(app)
     bcrypt.init_app(app)
     jwt.init_app(app)
     limiter.init_app(app)
 
-    # JWT error handlers
+    # Отзыв токенов: сверка claim 'tv' с token_version пользователя (из кэша)
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        from app.services import user_cache
+        return user_cache.is_token_revoked(jwt_payload)
+
+    # JWT error handlers (отказы частые — в лог попадает выборка, LOG_SAMPLING)
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
-        print(f"[JWT] Token expired: {jwt_header}")
+        logs.log_event(logger, logging.INFO, 'jwt.rejected', 'Token expired', reason='expired')
         return {'error': 'Token has expired'}, 401
 
     @jwt.invalid_token_loader
     def invalid_token_callback(error):
-        print(f"[JWT] Invalid token: {str(error)}")
+        logs.log_event(logger, logging.INFO, 'jwt.rejected', 'Invalid token: %s', error, reason='invalid')
         return {'error': 'Invalid token', 'message': str(error)}, 422
 
     @jwt.unauthorized_loader
     def unauthorized_callback(error):
-        print(f"[JWT] Unauthorized: {str(error)}")
+        logs.log_event(logger, logging.INFO, 'jwt.rejected', 'Unauthorized: %s', error, reason='missing')
         return {'error': 'Missing authorization header', 'message': str(error)}, 401
 
     @jwt.needs_fresh_token_loader
     def token_not_fresh_callback(jwt_header, jwt_payload):
-        print(f"[JWT] Token not fresh")
+        logs.log_event(logger, logging.INFO, 'jwt.rejected', 'Token not fresh', reason='not_fresh')
         return {'error': 'Fresh token required'}, 401
 
     @jwt.revoked_token_loader
     def revoked_token_callback(jwt_header, jwt_payload):
-        print(f"[JWT] Token revoked")
+        logs.log_event(logger, logging.INFO, 'jwt.rejected', 'Token revoked', reason='revoked')
         return {'error': 'Token has been revoked'}, 401
 
     # Настройка CORS
@@ -79,8 +100,8 @@ def create_app(config_name='development'):
         r"/api/*": {
             "origins": app.config['CORS_ORIGINS'],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
-            "expose_headers": ["Content-Type", "Authorization"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Profile"],
+            "expose_headers": ["Content-Type", "Authorization", logs.REQUEST_ID_HEADER],
             "supports_credentials": True,
             "max_age": 3600
         }
@@ -110,19 +131,34 @@ def create_app(config_name='development'):
         return response
 
     # Регистрация blueprints
-    from app.routes import auth, products, orders, payment, settings, admin_import
+    from app.routes import auth, products, orders, payment, settings, admin_import, media, bootstrap
 
     app.register_blueprint(auth.bp, url_prefix='/api/auth')
     app.register_blueprint(products.bp, url_prefix='/api/products')
     app.register_blueprint(orders.bp, url_prefix='/api/orders')
     app.register_blueprint(payment.bp, url_prefix='/api/payment')
     app.register_blueprint(settings.bp, url_prefix='/api/settings')
+    app.register_blueprint(bootstrap.bp, url_prefix='/api/bootstrap')
     app.register_blueprint(admin_import.bp)
+    app.register_blueprint(media.bp, url_prefix='/media')
+
+    # Неизменяемые файлы изображений и сбор метрик не должны расходовать лимиты API
+    limiter.exempt(media.bp)
+
+    # Необязательные роуты импортируются, только если включены
+    if app.config['METRICS_ENABLED']:
+        from app.routes import metrics as metrics_routes
+        app.register_blueprint(metrics_routes.bp, url_prefix='/metrics')
+        limiter.exempt(metrics_routes.bp)
+    if app.config['PROFILER_ENABLED']:
+        from app.routes import profiler as profiler_routes
+        app.register_blueprint(profiler_routes.bp, url_prefix='/api/admin/profile')
 
     # Отдача статических файлов React (только в production)
     if config_name == 'production' and os.path.exists(static_folder):
         @app.route('/', defaults={'path': ''})
         @app.route('/<path:path>')
+        @limiter.exempt
         def serve_react(path):
             # Если это API запрос, пропускаем
             if path.startswith('api/'):
@@ -143,35 +179,23 @@ def create_app(config_name='development'):
     @app.errorhandler(500)
     def internal_error(error):
         db.session.rollback()
-        return {'error': 'Internal server error'}, 500
+        return {'error': 'Internal server error', 'request_id': logs.request_id()}, 500
 
     @app.errorhandler(429)
     def ratelimit_handler(e):
         return {'error': 'Rate limit exceeded. Please try again later.'}, 429
 
-    # Создание таблиц БД
-    with app.app_context():
-        # Проверяем существование таблиц перед созданием
-        inspector = db.inspect(db.engine)
-        if not inspector.has_table('users'):
-            db.create_all()
-            print("✓ Database tables created")
-
-        # Создание дефолтного админа если его нет
-        from app.models import User
-        try:
-            admin = User.query.filter_by(username='admin').first()
-            if not admin:
-                admin = User(
-                    username=app.config['ADMIN_USERNAME'],
-                    email=app.config['ADMIN_EMAIL']
-                )
-                admin.set_password(app.config['ADMIN_PASSWORD'])
-                db.session.add(admin)
-                db.session.commit()
-                print(f"✓ Default admin user created: {admin.username}")
-        except Exception as e:
-            # Игнорируем ошибки если admin уже создан другим worker
-            db.session.rollback()
+    # Схему и администратора создает `flask init-db` (миграции) до запуска
+    # воркеров — при создании приложения БД не трогается. Исключение —
+    # in-memory БД тестов и бенчмарков (DB_AUTO_INIT)
+    if app.config['DB_AUTO_INIT']:
+        from app.services import schema
+        with app.app_context():
+            schema.create_all()
+            schema.ensure_admin(app)
+
+    # Команды CLI: flask init-db, flask db ...
+    from app import cli
+    cli.init_app(app)
 
     return app
@@ -0,0 +1,55 @@
+"""
+Команды flask CLI
+
+    flask --app run init-db [--seed-products]   # схема, администратор, товары
+    flask --app run db <команда>                # Flask-Migrate: revision, upgrade, downgrade, ...
+"""
+import click
+from flask import current_app
+from flask.cli import ScriptInfo, with_appcontext
+
+from app.services import schema
+
+
+class MigrateGroup(click.Group):
+    """
+    Команды Flask-Migrate (`flask db ...`)
+
+    Группа подгружается при обращении к ней: alembic импортируется только
+    при вызове команд миграций, а не при каждом создании приложения.
+    """
+
+    def load(self, ctx):
+        from flask_migrate.cli import db as group
+
+        schema.init_migrate(ctx.ensure_object(ScriptInfo).load_app())
+        return group
+
+    def list_commands(self, ctx):
+        return self.load(ctx).list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self.load(ctx).get_command(ctx, name)
+
+
+@click.command('init-db')
+@click.option('--seed-products', is_flag=True,
+              help='Пустой каталог заполнить из table.csv (или примерами товаров).')
+@with_appcontext
+def init_db_command(seed_products):
+    """Применить миграции и создать администратора (повторный запуск безопасен)."""
+    result = schema.init_database(current_app, products=seed_products)
+
+    click.echo(f"Schema revision: {result['revision']}")
+    if result['admin_created']:
+        click.echo(f"Admin user created: {current_app.config['ADMIN_USERNAME']}")
+    if result['products_added']:
+        click.echo(f"Products added: {result['products_added']}")
+    if result['jobs_interrupted']:
+        click.echo(f"Stale import jobs marked as failed: {result['jobs_interrupted']}")
+
+
+def init_app(app):
+    """Зарегистрировать команды в app.cli"""
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(MigrateGroup('db', help='Миграции базы данных (Flask-Migrate).'))
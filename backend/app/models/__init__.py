@@ -1,8 +1,12 @@
 """
 Модели базы данных
 """
-from .product import Product
+from .product import Product, ProductStaging
 from .order import Order, OrderItem
 from .user import User
+from .refresh_token import RefreshToken
+from .import_job import ImportJob
+from .image_asset import ImageAsset
+from .site_settings import SiteSettingsRecord
 
-__all__ = ['Product', 'Order', 'OrderItem', 'User']
+__all__ = ['Product', 'ProductStaging', 'Order', 'OrderItem', 'User', 'RefreshToken', 'ImportJob', 'ImageAsset', 'SiteSettingsRecord']
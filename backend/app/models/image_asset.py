@@ -0,0 +1,58 @@
+"""
+Модель изображения товара (ImageAsset)
+"""
+from datetime import datetime
+
+from flask import current_app
+
+from app import db
+
+
+class ImageAsset(db.Model):
+    """
+    Исходное изображение товара, скачанное один раз
+
+    Файлы хранятся на диске по sha256 содержимого (content_hash), поэтому
+    одинаковые картинки по разным URL занимают место один раз, а URL
+    вариантов никогда не меняют содержимое.
+    """
+    __tablename__ = 'image_assets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    source_url = db.Column(db.String(500), unique=True, nullable=False)
+
+    # Статусы
+    # 'pending' - ожидает скачивания
+    # 'ready' - скачано, варианты созданы
+    # 'failed' - не удалось скачать или разобрать
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    content_hash = db.Column(db.String(64), nullable=True)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Форматы вариантов: расширение файла -> формат Pillow
+    FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+
+    @staticmethod
+    def variant_urls(content_hash):
+        """
+        URL вариантов изображения
+
+        Returns:
+            dict: {размер: {'webp': url, 'jpeg': url}}
+        """
+        base = current_app.config['MEDIA_URL'].rstrip('/')
+        return {
+            size: {
+                'webp': f'{base}/{size}/{content_hash}.webp',
+                'jpeg': f'{base}/{size}/{content_hash}.jpg'
+            }
+            for size in current_app.config['IMAGE_SIZES']
+        }
+
+    def __repr__(self):
+        return f'<ImageAsset {self.source_url}>'
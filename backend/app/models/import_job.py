@@ -0,0 +1,85 @@
+"""
+Модель фонового задания импорта каталога (ImportJob)
+"""
+import json
+from datetime import datetime
+from app import db
+
+
+class ImportJob(db.Model):
+    """Фоновое задание импорта каталога"""
+    __tablename__ = 'import_jobs'
+
+    # Счетчики прогресса (совпадают с ключами catalog_import.iter_sync)
+    COUNTERS = ('rows', 'staged', 'inserted', 'updated', 'unchanged', 'deleted', 'skipped', 'failed')
+
+    id = db.Column(db.String(36), primary_key=True)
+
+    # Источник: 'upload' - загруженный файл, 'catalog' - table.csv на сервере
+    source = db.Column(db.String(20), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    force = db.Column(db.Boolean, default=False, nullable=False)
+    featured_count = db.Column(db.Integer, default=0, nullable=False)
+
+    # Статусы
+    # 'queued' - в очереди
+    # 'running' - выполняется
+    # 'done' - завершено
+    # 'failed' - ошибка (каталог не изменен)
+    # 'canceled' - отменено (каталог не изменен)
+    status = db.Column(db.String(20), default='queued', nullable=False)
+    cancel_requested = db.Column(db.Boolean, default=False, nullable=False)
+
+    # Воркер, в очереди которого задание ('host:pid'), и время его последней
+    # отметки: по ней import_jobs.fail_interrupted находит задания умерших воркеров
+    worker = db.Column(db.String(100), nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    # Прогресс
+    rows = db.Column(db.Integer, default=0, nullable=False)
+    staged = db.Column(db.Integer, default=0, nullable=False)
+    inserted = db.Column(db.Integer, default=0, nullable=False)
+    updated = db.Column(db.Integer, default=0, nullable=False)
+    unchanged = db.Column(db.Integer, default=0, nullable=False)
+    deleted = db.Column(db.Integer, default=0, nullable=False)
+    skipped = db.Column(db.Integer, default=0, nullable=False)
+    failed = db.Column(db.Integer, default=0, nullable=False)
+
+    # Отчет об ошибках строк (JSON) и причина сбоя задания
+    errors_json = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    # Метаданные
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def errors(self):
+        return json.loads(self.errors_json) if self.errors_json else []
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed', 'canceled')
+
+    def to_dict(self):
+        """Конвертация в словарь для API"""
+        result = {
+            'id': self.id,
+            'source': self.source,
+            'status': self.status,
+            'force': self.force,
+            'cancelRequested': self.cancel_requested,
+            'error': self.error,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None,
+            'heartbeatAt': self.heartbeat_at.isoformat() if self.heartbeat_at else None
+        }
+        result['progress'] = {name: getattr(self, name) for name in self.COUNTERS}
+        result['progress']['imported'] = self.inserted + self.updated + self.unchanged
+        return result
+
+    def __repr__(self):
+        return f'<ImportJob {self.id} {self.status}>'
@@ -31,7 +31,7 @@ class Order(db.Model):
     shipping_cost = db.Column(db.Float, default=0)
     total_amount = db.Column(db.Float, nullable=False)
     payment_method = db.Column(db.String(50), nullable=False)  # 'card', 'sbp', 'cash'
-    payment_id = db.Column(db.String(200), nullable=True)  # ID платежа в ЮКассе
+    payment_id = db.Column(db.String(200), nullable=True, index=True)  # ID платежа в ЮКассе
 
     # Статусы
     # 'pending' - ожидает обработки
@@ -41,17 +41,24 @@ class Order(db.Model):
     # 'shipping' - отправлен
     # 'delivered' - доставлен
     # 'canceled' - отменен
-    status = db.Column(db.String(50), default='pending', nullable=False)
+    status = db.Column(db.String(50), default='pending', nullable=False, index=True)
 
     # Метаданные
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Связи
     items = db.relationship('OrderItem', backref='order', lazy='dynamic', cascade='all, delete-orphan')
 
-    def to_dict(self, include_items=True):
-        """Конвертация в словарь для API"""
+    def to_dict(self, include_items=True, items=None):
+        """
+        Конвертация в словарь для API
+
+        Args:
+            include_items: добавить позиции заказа
+            items: уже загруженные позиции (список заказов грузит их одним
+                запросом); по умолчанию — запрос к self.items
+        """
         result = {
             'id': self.id,
             'orderNumber': self.order_number,
@@ -78,7 +85,7 @@ class Order(db.Model):
         }
 
         if include_items:
-            result['items'] = [item.to_dict() for item in self.items]
+            result['items'] = [item.to_dict() for item in (self.items if items is None else items)]
 
         return result
 
@@ -91,8 +98,8 @@ class OrderItem(db.Model):
     __tablename__ = 'order_items'
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
 
     # Информация о товаре на момент заказа
     product_name = db.Column(db.String(200), nullable=False)
@@ -3,6 +3,7 @@
 """
 from datetime import datetime
 from app import db
+from app.models.image_asset import ImageAsset
 
 
 class Product(db.Model):
@@ -10,20 +11,28 @@ class Product(db.Model):
     __tablename__ = 'products'
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(200), nullable=False)
+    # Стабильный ID товара во внешнем фиде ('ID в системе'), ключ синхронизации
+    external_id = db.Column(db.String(200), unique=True, nullable=True)
+    name = db.Column(db.String(200), nullable=False, index=True)
     brand = db.Column(db.String(100), nullable=False)
     price = db.Column(db.Float, nullable=False)
     old_price = db.Column(db.Float, nullable=True)
     discount = db.Column(db.Integer, default=0)
     volume = db.Column(db.String(50), nullable=False)
-    category = db.Column(db.String(50), nullable=False)  # 'men', 'women', 'unisex'
+    category = db.Column(db.String(50), nullable=False, index=True)  # 'men', 'women', 'unisex'
     description = db.Column(db.Text, nullable=True)
     image = db.Column(db.String(500), nullable=False)
+    # sha256 скачанного изображения (ImageAsset), пока не скачано — None
+    image_hash = db.Column(db.String(64), nullable=True)
 
     # Флаги
-    is_featured = db.Column(db.Boolean, default=False)
+    is_featured = db.Column(db.Boolean, default=False, index=True)
     is_new = db.Column(db.Boolean, default=False)
-    is_visible = db.Column(db.Boolean, default=True)
+    is_visible = db.Column(db.Boolean, default=True, index=True)
+
+    # Синхронизация с фидом
+    content_hash = db.Column(db.String(40), nullable=True)  # хэш полей из фида
+    deleted_at = db.Column(db.DateTime, nullable=True)  # мягкое удаление (нет в фиде)
 
     # Метаданные
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -33,9 +42,18 @@ class Product(db.Model):
     order_items = db.relationship('OrderItem', backref='product', lazy='dynamic')
 
     def to_dict(self):
-        """Конвертация в словарь для API"""
+        """
+        Конвертация в словарь для API
+
+        'image' — локальный вариант 'card' (JPEG), если изображение уже
+        обработано, иначе исходный URL; 'images' — все размеры в WebP и JPEG
+        (None, пока изображение не обработано).
+        """
+        images = ImageAsset.variant_urls(self.image_hash) if self.image_hash else None
+
         return {
             'id': self.id,
+            'externalId': self.external_id,
             'name': self.name,
             'brand': self.brand,
             'price': self.price,
@@ -44,7 +62,8 @@ class Product(db.Model):
             'volume': self.volume,
             'category': self.category,
             'description': self.description,
-            'image': self.image,
+            'image': images['card']['jpeg'] if images else self.image,
+            'images': images,
             'isFeatured': self.is_featured,
             'isNew': self.is_new,
             'isVisible': self.is_visible,
@@ -52,5 +71,45 @@ class Product(db.Model):
             'updatedAt': self.updated_at.isoformat() if self.updated_at else None
         }
 
+    @classmethod
+    def live(cls):
+        """Запрос по товарам, не удаленным синхронизацией каталога"""
+        return cls.query.filter(cls.deleted_at.is_(None))
+
     def __repr__(self):
         return f'<Product {self.name}>'
+
+
+class ProductStaging(db.Model):
+    """
+    Промежуточная таблица импорта каталога
+
+    Строки фида загружаются сюда пачками (витрина их не видит), проходят
+    проверку и затем одной короткой транзакцией применяются к products.
+    """
+    __tablename__ = 'product_staging'
+
+    id = db.Column(db.Integer, primary_key=True)
+    import_id = db.Column(db.String(36), nullable=False, index=True)
+    row_num = db.Column(db.Integer, nullable=False)
+
+    # Поля товара в порядке catalog_import.FIELDS
+    external_id = db.Column(db.String(200), nullable=False)
+    name = db.Column(db.String(200), nullable=False)
+    brand = db.Column(db.String(100), nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    old_price = db.Column(db.Float, nullable=True)
+    discount = db.Column(db.Integer, default=0)
+    volume = db.Column(db.String(50), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    image = db.Column(db.String(500), nullable=False)
+    is_featured = db.Column(db.Boolean, default=False)
+    is_new = db.Column(db.Boolean, default=False)
+    is_visible = db.Column(db.Boolean, default=True)
+    content_hash = db.Column(db.String(40), nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ProductStaging {self.import_id}:{self.row_num}>'
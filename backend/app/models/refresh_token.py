@@ -0,0 +1,29 @@
+"""
+Модель refresh-токена (RefreshToken)
+"""
+from datetime import datetime
+from app import db
+
+
+class RefreshToken(db.Model):
+    """
+    Выданный refresh-токен (по jti)
+
+    Каждый /api/auth/refresh погашает токен (used_at) и выдает новый в
+    том же семействе (family_id — одно на вход). Повторное предъявление
+    погашенного токена означает, что он утек: отзывается все семейство.
+    """
+    __tablename__ = 'refresh_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False, index=True)
+    family_id = db.Column(db.String(36), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    used_at = db.Column(db.DateTime, nullable=True)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<RefreshToken {self.jti}>'
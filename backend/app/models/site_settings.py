@@ -0,0 +1,26 @@
+"""
+Модель настроек сайта (SiteSettingsRecord)
+"""
+from datetime import datetime
+from app import db
+
+
+class SiteSettingsRecord(db.Model):
+    """
+    Документ настроек сайта с номером версии
+
+    Одна строка (id=1). Каждое изменение увеличивает version
+    (compare-and-swap: UPDATE ... WHERE version = <прочитанная>), по ней
+    же воркеры узнают, что их кэш устарел.
+    """
+    __tablename__ = 'site_settings'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, default=1, nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+
+    def __repr__(self):
+        return f'<SiteSettingsRecord v{self.version}>'
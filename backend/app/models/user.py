@@ -2,7 +2,8 @@
 Модель пользователя (User) для администраторов
 """
 from datetime import datetime
-from app import db, bcrypt
+from app import db
+from app.services import passwords
 
 
 class User(db.Model):
@@ -17,18 +18,29 @@ class User(db.Model):
     # Роль пользователя
     role = db.Column(db.String(20), default='admin', nullable=False)  # 'admin', 'superadmin'
 
+    # Версия токенов: выданные JWT несут ее в claim 'tv', увеличение отзывает их все
+    token_version = db.Column(db.Integer, default=1, nullable=False)
+
     # Метаданные
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime, nullable=True)
 
     def set_password(self, password):
-        """Хэширует и сохраняет пароль"""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        """Хэширует и сохраняет пароль (на пуле bcrypt)"""
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password):
-        """Проверяет пароль"""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        """Проверяет пароль (на пуле bcrypt)"""
+        return passwords.check_password(self.password_hash, password)
+
+    def revoke_tokens(self):
+        """Отзывает все выданные пользователю токены"""
+        self.token_version = (self.token_version or 1) + 1
+
+    def password_needs_rehash(self):
+        """Хэш создан с устаревшей стоимостью BCRYPT_LOG_ROUNDS"""
+        return passwords.needs_rehash(self.password_hash)
 
     def to_dict(self, include_sensitive=False):
         """Конвертация в словарь для API"""
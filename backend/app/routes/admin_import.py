@@ -2,103 +2,168 @@
 Admin CSV import endpoint
 Allows admin to import products from CSV data via API
 """
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-import csv
-import re
 import io
+import json
+import os
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import get_jwt_identity
 
 from app import db
-from app.models.product import Product
-from app.models.user import User
+from app.models import ImportJob
+from app.services import catalog_import, images, import_jobs
+from app.utils.auth import admin_required
 
 bp = Blueprint('admin_import', __name__, url_prefix='/api/admin')
 
-# Category mapping based on perfume knowledge
-CATEGORY_MAP = {
-    # Men's fragrances
-    'versace eros': 'men',
-    'versace eros energy': 'men',
-    'versace eros flame': 'men',
-    'versace pour homme': 'men',
-    'dior sauvage': 'men',
-    'dior fahrenheit': 'men',
-    'bleu de chanel': 'men',
-    'terre d\'hermes': 'men',
-    'tom ford noir': 'men',
-    'tom ford noir extreme': 'men',
-    'creed aventus': 'men',
-
-    # Women's fragrances
-    'dior j\'adore': 'women',
-    'dior hypnotic poison': 'women',
-    'miss dior blooming bouquet': 'women',
-    'chanel chance eau tendre': 'women',
-    'yves saint laurent black opium': 'women',
-    'ysl libre': 'women',
-    'libre': 'women',
-    'gucci bloom': 'women',
-    'gucci flora': 'women',
-    'gucci guilty elixir': 'women',
-    'chloe cedrus': 'women',
-    'narciso rodriguez narciso poudre': 'women',
-    'guerlain mon guerlain': 'women',
-    'giorgio armani my way': 'women',
-    'givenchy irresistible': 'women',
-    'tiffany & co': 'women',
-    'trussardi donna': 'women',
-    'burberry blush': 'women',
-    'kilian princess': 'women',
-    'guerlain aqua allegoria': 'women',
-
-    # Unisex fragrances
-    'baccarat rouge 540': 'unisex',
-    'byredo blanche': 'unisex',
-    'byredo gypsy water': 'unisex',
-    'byredo la tulipe': 'unisex',
-    'byredo reine de nuit': 'unisex',
-    'xerjoff erba pura': 'unisex',
-    'mancera cedrat boise': 'unisex',
-    'ajmal amber wood': 'unisex',
-    'amouage guidance': 'unisex',
-    'amouage outlands': 'unisex',
-    'kajal dahab': 'unisex',
-    'tom ford ombre leather': 'unisex',
-}
-
-def parse_price(price_str):
-    """Extract numeric price from string like '7 500 ₽'"""
-    price_digits = re.sub(r'[^\d]', '', price_str)
-    return int(price_digits) if price_digits else 0
-
-def get_category(brand, model):
-    """Determine category based on brand and model"""
-    full_name = f"{brand} {model}".lower()
-
-    # Check exact matches first
-    for key, category in CATEGORY_MAP.items():
-        if key in full_name:
-            return category
-
-    # Default to unisex if unknown
-    return 'unisex'
+# Content types, which are parsed directly from the request stream
+CSV_MIMETYPES = ('text/csv', 'application/csv', 'text/plain')
+NDJSON_MIMETYPE = 'application/x-ndjson'
+PROGRESS_KEYS = ('rows', 'staged', 'skipped', 'failed')
+MAX_PAGE_SIZE = 1000
+
+
+def open_csv_upload():
+    """
+    Open CSV reader for a streamed upload
+
+    Returns:
+        csv.DictReader or None if the request is not a CSV upload
+    """
+    if request.mimetype in CSV_MIMETYPES:
+        return catalog_import.open_stream(request.stream)
+
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload:
+            return catalog_import.open_stream(upload.stream)
+
+    return None
+
+
+def import_response(summary):
+    """JSON body of a finished import"""
+    return {
+        'success': True,
+        'imported': summary['imported'],
+        'inserted': summary['inserted'],
+        'updated': summary['updated'],
+        'unchanged': summary['unchanged'],
+        'deleted': summary['deleted'],
+        'skipped': summary['skipped'],
+        'failed': summary['failed'],
+        'errors': summary['errors'] or None,
+        'message': f"Successfully imported {summary['imported']} products"
+    }
+
+
+def page_args(default_limit):
+    """
+    limit/offset из query string: offset >= 0, 0 <= limit <= MAX_PAGE_SIZE
+
+    Returns:
+        tuple: (limit, offset)
+    """
+    limit = request.args.get('limit', type=int, default=default_limit)
+    offset = request.args.get('offset', type=int, default=0)
+    return min(max(limit, 0), MAX_PAGE_SIZE), max(offset, 0)
+
+
+def dry_run_response(result):
+    """
+    Dry run summary with one page of the diff
+
+    Query params:
+        action: comma separated actions to list (insert, update, unchanged,
+            delete, error); default - everything except unchanged
+        limit: int (optional, default 100, max 1000)
+        offset: int (optional, default 0)
+    """
+    actions = [a for a in request.args.get('action', '').split(',') if a]
+    limit, offset = page_args(catalog_import.DIFF_PAGE_SIZE)
+
+    return jsonify(catalog_import.dry_run_page(result, actions, offset, limit)), 200
+
+
+def stream_import(reader, force=False):
+    """
+    Sync catalog with uploaded CSV
+
+    Rows are staged in chunks and applied to the live catalog in one
+    transaction at the end (see catalog_import.iter_sync).
+
+    Progress is reported as NDJSON lines if the client accepts
+    application/x-ndjson, otherwise only the final summary is returned.
+    Every line has a 'status': 'running' for progress, 'done' for the
+    summary and 'error' if the import failed after the stream started.
+
+    The CSV header is checked before the response starts, so a feed in a
+    wrong format is rejected with 422 in both modes.
+    """
+    catalog_import.check_header(reader)
+
+    if NDJSON_MIMETYPE not in request.accept_mimetypes.values():
+        for progress in catalog_import.iter_sync(reader, force=force):
+            pass
+        images.schedule_missing()
+        return jsonify(import_response(catalog_import.sync_summary(progress))), 200
+
+    def generate():
+        try:
+            for progress in catalog_import.iter_sync(reader, force=force):
+                if progress['done']:
+                    images.schedule_missing()
+                    line = {'status': 'done', **import_response(catalog_import.sync_summary(progress))}
+                else:
+                    line = {'status': 'running', **{key: progress[key] for key in PROGRESS_KEYS}}
+                yield json.dumps(line, ensure_ascii=False) + '\n'
+        except Exception as e:
+            yield json.dumps({'status': 'error', 'error': str(e)}, ensure_ascii=False) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
 
 @bp.route('/import-csv', methods=['POST'])
-@jwt_required()
+@admin_required()
 def import_csv():
     """
     Import products from CSV data
 
-    Expects JSON body with 'csv_data' field containing CSV text
+    Accepts either:
+        - JSON body with 'csv_data' field containing CSV text
+        - raw CSV body (Content-Type: text/csv)
+        - multipart/form-data with the CSV in the 'file' field
+
+    The catalog is synced with the CSV by external id: new products are
+    inserted, changed ones updated, missing ones soft-deleted, unchanged
+    rows are not written at all.
+
+    Rows are first loaded into a staging table and validated, then applied
+    to the live catalog in one short transaction, so the storefront never
+    sees a half-imported catalog and a rejected feed changes nothing
+    (422). Use ?force=true to apply a feed that removes more than half of
+    the catalog.
+
+    Uploaded CSV is parsed from the request stream in chunks, so memory
+    stays bounded for large catalogs. With 'Accept: application/x-ndjson'
+    progress lines are streamed after every chunk, the last line is the
+    summary.
+
+    With ?dry_run=true nothing is written: every row is classified as
+    insert/update/unchanged/error, missing products as delete, and the
+    summary is returned with a page of the diff (see dry_run_response).
+
     Admin only endpoint
     """
     try:
-        # Check if user is admin
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        force = request.args.get('force', 'false').lower() == 'true'
+        dry_run = request.args.get('dry_run', 'false').lower() == 'true'
 
-        if not user or user.role != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
+        reader = open_csv_upload()
+        if reader is not None:
+            if dry_run:
+                return dry_run_response(catalog_import.dry_run(reader, force=force))
+            return stream_import(reader, force)
 
         # Get CSV data from request
         data = request.get_json()
@@ -107,80 +172,149 @@ def import_csv():
         if not csv_text:
             return jsonify({'error': 'No CSV data provided'}), 400
 
-        # Clear existing products
-        Product.query.delete()
-        db.session.commit()
-
-        # Parse CSV
-        csv_file = io.StringIO(csv_text)
-        reader = csv.DictReader(csv_file, delimiter=';')
-
-        imported_count = 0
-        errors = []
-
-        for row_num, row in enumerate(reader, start=2):
-            try:
-                brand = row['Бренд'].strip()
-                model = row['Модель'].strip()
-                description = row['Описание'].strip()
-                price_str = row['Цена'].strip()
-                discount_str = row['Скидка (в процентах)'].strip()
-                image_url = row['Изображения (через ;)'].strip()
-
-                # Parse price and discount
-                price = parse_price(price_str)
-                discount = int(discount_str) if discount_str.isdigit() else 0
-
-                # Calculate old price if discount exists
-                old_price = None
-                if discount > 0:
-                    old_price = int(price / (1 - discount / 100))
-
-                # Determine category
-                category = get_category(brand, model)
-
-                # Create full name
-                name = f"{brand} {model}"
-
-                # Default volume
-                volume = "100мл"
-
-                # Create product
-                product = Product(
-                    name=name,
-                    brand=brand,
-                    price=price,
-                    old_price=old_price,
-                    discount=discount,
-                    volume=volume,
-                    category=category,
-                    description=description,
-                    image=image_url,
-                    is_featured=False,
-                    is_new=False,
-                    is_visible=True
-                )
-
-                db.session.add(product)
-                imported_count += 1
-
-            except Exception as e:
-                errors.append({
-                    'row': row_num,
-                    'error': str(e),
-                    'data': dict(row)
-                })
-                continue
-
-        # Commit all changes
-        db.session.commit()
-
-        return jsonify({
-            'success': True,
-            'imported': imported_count,
-            'errors': errors if errors else None,
-            'message': f'Successfully imported {imported_count} products'
-        }), 200
+        if dry_run:
+            return dry_run_response(catalog_import.dry_run_text(csv_text, force=force))
+
+        # Sync catalog: insert new, update changed, soft-delete missing
+        result = catalog_import.sync_text(csv_text, force=force)
+        images.schedule_missing()
+
+        return jsonify(import_response(result)), 200
+
+    except catalog_import.CatalogImportError as e:
+        return jsonify({'error': str(e)}), 422
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/import-jobs', methods=['POST'])
+@admin_required()
+def create_import_job():
+    """
+    Submit a background catalog import job
+
+    The CSV is saved to disk and imported by a worker thread, the request
+    returns immediately. Body is the same as for /import-csv (raw text/csv,
+    multipart 'file' or JSON 'csv_data'); with ?source=catalog the server's
+    table.csv is imported instead.
+
+    Query params:
+        source: 'upload' (default) or 'catalog'
+        force: boolean - apply a feed that removes more than half of the catalog
+
+    Response JSON (202):
+        job: object
+    """
+    try:
+        force = request.args.get('force', 'false').lower() == 'true'
+
+        if request.args.get('source') == 'catalog':
+            csv_path = catalog_import.default_csv_path()
+            if not os.path.exists(csv_path):
+                return jsonify({'error': f'CSV file not found: {csv_path}'}), 404
+
+            job = import_jobs.submit('catalog', csv_path, int(get_jwt_identity()), force, featured_count=4)
+            return jsonify({'job': job.to_dict()}), 202
+
+        if request.mimetype in CSV_MIMETYPES:
+            stream = request.stream
+        elif request.mimetype == 'multipart/form-data' and request.files.get('file'):
+            stream = request.files['file'].stream
+        else:
+            data = request.get_json(silent=True) or {}
+            if not data.get('csv_data'):
+                return jsonify({'error': 'No CSV data provided'}), 400
+            stream = io.BytesIO(data['csv_data'].encode('utf-8'))
+
+        path = import_jobs.save_upload(stream)
+        job = import_jobs.submit('upload', path, int(get_jwt_identity()), force)
+
+        return jsonify({'job': job.to_dict()}), 202
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/import-jobs', methods=['GET'])
+@admin_required()
+def list_import_jobs():
+    """
+    Recent import jobs (newest first)
+
+    Query params:
+        limit: int (optional, default 20, max 1000)
+        offset: int (optional, default 0)
+    """
+    limit, offset = page_args(20)
+    jobs = ImportJob.query.order_by(ImportJob.created_at.desc()).offset(offset).limit(limit).all()
+
+    return jsonify({'jobs': [job.to_dict() for job in jobs]}), 200
+
+
+@bp.route('/import-jobs/<job_id>', methods=['GET'])
+@admin_required()
+def get_import_job(job_id):
+    """
+    Import job status and progress (rows parsed, staged, inserted, failed...)
+
+    A job whose worker stopped responding is reported as failed.
+    """
+    job = db.session.get(ImportJob, job_id)
+    if not job:
+        return jsonify({'error': 'Import job not found'}), 404
+
+    if not job.is_finished and import_jobs.fail_interrupted():
+        db.session.refresh(job)
+
+    return jsonify({'job': job.to_dict()}), 200
+
+
+@bp.route('/import-jobs/<job_id>/errors', methods=['GET'])
+@admin_required()
+def get_import_job_errors(job_id):
+    """
+    Row error report of an import job
+
+    Query params:
+        limit: int (optional, default 100, max 1000)
+        offset: int (optional, default 0)
+
+    Response JSON:
+        errors: array of {row, error, data}
+        total: int - all failed rows (only the first catalog_import.MAX_ERRORS are kept)
+    """
+    job = db.session.get(ImportJob, job_id)
+    if not job:
+        return jsonify({'error': 'Import job not found'}), 404
+
+    limit, offset = page_args(100)
+
+    return jsonify({
+        'errors': job.errors[offset:offset + limit],
+        'total': job.failed
+    }), 200
+
+
+@bp.route('/import-jobs/<job_id>/cancel', methods=['POST'])
+@admin_required()
+def cancel_import_job(job_id):
+    """
+    Cancel an import job
+
+    A queued job is canceled at once, a running one stops after the current
+    chunk. The live catalog is left unchanged unless the job had already
+    reached the final switch.
+    """
+    try:
+        job = db.session.get(ImportJob, job_id)
+        if not job:
+            return jsonify({'error': 'Import job not found'}), 404
+
+        import_jobs.request_cancel(job)
+        return jsonify({'job': job.to_dict()}), 200
 
     except Exception as e:
         db.session.rollback()
@@ -2,10 +2,15 @@
 Роуты для аутентификации
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from datetime import datetime
 from app import db, limiter
 from app.models import User
+from app.services import refresh_tokens, user_cache
+from app.services.passwords import PasswordPoolBusy
+from app.services.refresh_tokens import RefreshTokenError
+from app.utils.auth import admin_required
+from app.utils.query_stats import query_budget
 
 bp = Blueprint('auth', __name__)
 
@@ -22,6 +27,7 @@ def login():
 
     Response JSON:
         access_token: string
+        refresh_token: string - для /api/auth/refresh
         user: object
     """
     try:
@@ -45,62 +51,112 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Account is disabled'}), 403
 
+        # Пароль захэширован с прежней стоимостью bcrypt — пересчитываем
+        if user.password_needs_rehash():
+            user.set_password(password)
+
         # Обновление времени последнего входа
         user.last_login = datetime.utcnow()
-        db.session.commit()
 
-        # Создание JWT токена (identity должен быть строкой!)
-        access_token = create_access_token(identity=str(user.id))
+        # Access (роль и версия токенов в claims) + refresh для продления входа
+        tokens = refresh_tokens.issue(user)
+        db.session.commit()
 
         return jsonify({
-            'access_token': access_token,
+            **tokens,
             'user': user.to_dict()
         }), 200
 
+    except PasswordPoolBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
-@bp.route('/verify', methods=['GET'])
-@jwt_required()
-def verify():
+@bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+@limiter.limit("30 per minute")
+def refresh():
     """
-    Проверка JWT токена
+    Обмен refresh-токена на новую пару токенов (без пароля и bcrypt)
+
+    Заголовок: Authorization: Bearer <refresh_token>. Токен одноразовый;
+    повторное использование отзывает все токены этого входа.
 
     Response JSON:
-        user: object
+        access_token: string
+        refresh_token: string
     """
     try:
-        user_id = get_jwt_identity()
-        print(f"[AUTH VERIFY] User ID from token (string): {user_id}")
+        # Пользователь активен и версия токенов совпадает — это уже
+        # проверено token_in_blocklist_loader (по кэшу пользователей)
+        user = user_cache.get_user(get_jwt_identity())
+
+        tokens = refresh_tokens.rotate(get_jwt(), user)
+        db.session.commit()
 
-        # Конвертируем строку обратно в int
-        user_id = int(user_id)
-        print(f"[AUTH VERIFY] User ID converted to int: {user_id}")
+        return jsonify(tokens), 200
 
-        user = User.query.get(user_id)
+    except RefreshTokenError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 401
 
-        if not user:
-            print(f"[AUTH VERIFY] User not found for ID: {user_id}")
-            return jsonify({'error': 'User not found'}), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
-        if not user.is_active:
-            print(f"[AUTH VERIFY] User {user_id} is not active")
-            return jsonify({'error': 'Account is disabled'}), 403
 
-        print(f"[AUTH VERIFY] Success for user: {user.username}")
-        return jsonify({'user': user.to_dict()}), 200
+@bp.route('/logout', methods=['POST'])
+@jwt_required(refresh=True)
+def logout():
+    """
+    Выход: отзыв refresh-токенов этого входа
+
+    Заголовок: Authorization: Bearer <refresh_token>. Access-токен
+    действует до истечения срока (JWT_ACCESS_TOKEN_EXPIRES).
+
+    Response JSON:
+        message: string
+    """
+    try:
+        refresh_tokens.revoke_family(get_jwt()['fam'])
+        db.session.commit()
+
+        return jsonify({'message': 'Logged out'}), 200
 
     except Exception as e:
-        print(f"[AUTH VERIFY] Exception: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
-@bp.route('/register', methods=['POST'])
+@bp.route('/verify', methods=['GET'])
+@query_budget(1)
 @jwt_required()
+def verify():
+    """
+    Проверка JWT токена
+
+    Отвечает только по claims: подпись проверена (с кэшем), отзыв —
+    по кэшу пользователей, поэтому запросов к БД нет.
+
+    Response JSON:
+        user: object - id, username, role
+    """
+    claims = get_jwt()
+    return jsonify({
+        'user': {
+            'id': int(claims['sub']),
+            'username': claims.get('username'),
+            'role': claims.get('role'),
+        }
+    }), 200
+
+
+@bp.route('/register', methods=['POST'])
+@admin_required('superadmin')
 @limiter.limit("3 per hour")
 def register():
     """
@@ -116,13 +172,6 @@ def register():
         user: object
     """
     try:
-        # Проверка что запрос делает существующий админ
-        current_user_id = int(get_jwt_identity())
-        current_user = User.query.get(current_user_id)
-
-        if not current_user or current_user.role != 'superadmin':
-            return jsonify({'error': 'Permission denied. Only superadmins can create new users.'}), 403
-
         data = request.get_json()
 
         if not data:
@@ -176,12 +225,16 @@ def change_password():
         old_password: string
         new_password: string
 
+    Прежние токены пользователя отзываются, в ответе — новые.
+
     Response JSON:
         message: string
+        access_token: string
+        refresh_token: string
     """
     try:
         user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
 
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -204,9 +257,18 @@ def change_password():
             return jsonify({'error': 'New password must be at least 8 characters long'}), 400
 
         user.set_password(new_password)
+        user.revoke_tokens()
+        tokens = refresh_tokens.issue(user)
         db.session.commit()
 
-        return jsonify({'message': 'Password changed successfully'}), 200
+        return jsonify({
+            'message': 'Password changed successfully',
+            **tokens
+        }), 200
+
+    except PasswordPoolBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503
 
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,39 @@
+"""
+Роут данных первой отрисовки витрины
+"""
+from flask import Blueprint, Response, current_app, request, jsonify
+from app import limiter
+from app.services import bootstrap
+from app.utils.query_stats import query_budget
+
+bp = Blueprint('bootstrap', __name__)
+
+
+@bp.route('', methods=['GET'])
+@query_budget(8)
+@limiter.limit("100 per minute")
+def get_bootstrap():
+    """
+    Все данные для первой отрисовки витрины одним запросом
+
+    Ответ собирается заранее и отдается из кэша процесса с ETag; на
+    If-None-Match с тем же ETag возвращается 304 без тела.
+
+    Response JSON:
+        settings: object
+        settingsVersion: int
+        featured: array - избранные товары
+        categories: object - {категория: число товаров, 'all': всего}
+        shipping: object - freeShippingThreshold, standardShippingCost
+    """
+    try:
+        body, etag = bootstrap.response_body()
+
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['BOOTSTRAP_MAX_AGE']
+        return response.make_conditional(request)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
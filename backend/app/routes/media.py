@@ -0,0 +1,34 @@
+"""
+Раздача вариантов изображений товаров
+
+Имя файла — sha256 содержимого, поэтому содержимое по URL никогда не
+меняется и ответ кэшируется браузером и CDN навсегда.
+"""
+import os
+import re
+
+from flask import Blueprint, abort, current_app, send_from_directory
+
+from app.models import ImageAsset
+
+bp = Blueprint('media', __name__)
+
+FILENAME_RE = re.compile(r'^[0-9a-f]{64}\.(?:%s)$' % '|'.join(ImageAsset.FORMATS))
+CACHE_MAX_AGE = 365 * 24 * 3600
+
+
+@bp.route('/<size>/<filename>', methods=['GET'])
+def get_image(size, filename):
+    """
+    Вариант изображения: /media/<размер>/<sha256>.<webp|jpg>
+
+    Cache-Control: public, max-age=31536000, immutable
+    """
+    if size not in current_app.config['IMAGE_SIZES'] or not FILENAME_RE.match(filename):
+        abort(404)
+
+    directory = os.path.join(current_app.config['MEDIA_ROOT'], size, filename[:2])
+    response = send_from_directory(directory, filename, max_age=CACHE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,28 @@
+"""
+Роут метрик для Prometheus
+"""
+import hmac
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from app.services import metrics
+
+bp = Blueprint('metrics', __name__)
+
+
+@bp.route('', methods=['GET'])
+def get_metrics():
+    """
+    Метрики всех воркеров в текстовом формате Prometheus
+
+    Если задан METRICS_TOKEN, нужен заголовок
+    Authorization: Bearer <METRICS_TOKEN>.
+    """
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    try:
+        return Response(metrics.render(metrics.collect()), content_type=metrics.CONTENT_TYPE)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -2,10 +2,11 @@
 Роуты для работы с заказами
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from app import db, limiter
 from app.models import Order, OrderItem, Product
+from app.utils.auth import admin_required
+from app.utils.query_stats import query_budget
 
 bp = Blueprint('orders', __name__)
 
@@ -62,7 +63,7 @@ def create_order():
 
         for item_data in items_data:
             product = Product.query.get(item_data['productId'])
-            if not product:
+            if not product or product.deleted_at:
                 return jsonify({'error': f'Product {item_data["productId"]} not found'}), 404
 
             quantity = item_data['quantity']
@@ -127,7 +128,8 @@ def create_order():
 
 
 @bp.route('', methods=['GET'])
-@jwt_required()
+@query_budget(4)
+@admin_required()
 @limiter.limit("100 per minute")
 def get_orders():
     """
@@ -153,6 +155,9 @@ def get_orders():
         # Подсчет общего количества
         total = query.count()
 
+        # Сортировка по дате создания (новые первые) — до LIMIT/OFFSET
+        query = query.order_by(Order.created_at.desc())
+
         # Пагинация
         limit = request.args.get('limit', type=int)
         offset = request.args.get('offset', type=int, default=0)
@@ -160,13 +165,16 @@ def get_orders():
         if limit:
             query = query.limit(limit).offset(offset)
 
-        # Сортировка по дате создания (новые первые)
-        query = query.order_by(Order.created_at.desc())
-
         orders = query.all()
 
+        # Позиции всех заказов страницы одним запросом, а не по запросу на заказ
+        items = {order.id: [] for order in orders}
+        if items:
+            for item in OrderItem.query.filter(OrderItem.order_id.in_(items)).order_by(OrderItem.id):
+                items[item.order_id].append(item)
+
         return jsonify({
-            'orders': [order.to_dict() for order in orders],
+            'orders': [order.to_dict(items=items[order.id]) for order in orders],
             'total': total
         }), 200
 
@@ -175,7 +183,7 @@ def get_orders():
 
 
 @bp.route('/<int:order_id>', methods=['GET'])
-@jwt_required()
+@admin_required()
 @limiter.limit("100 per minute")
 def get_order(order_id):
     """
@@ -197,7 +205,7 @@ def get_order(order_id):
 
 
 @bp.route('/<int:order_id>/status', methods=['PUT'])
-@jwt_required()
+@admin_required()
 @limiter.limit("50 per hour")
 def update_order_status(order_id):
     """
@@ -238,7 +246,7 @@ def update_order_status(order_id):
 
 
 @bp.route('/<int:order_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required()
 @limiter.limit("20 per hour")
 def delete_order(order_id):
     """
@@ -294,7 +302,7 @@ def get_order_by_number(order_number):
 
 
 @bp.route('/stats', methods=['GET'])
-@jwt_required()
+@admin_required()
 @limiter.limit("50 per hour")
 def get_order_stats():
     """
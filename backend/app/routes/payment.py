@@ -5,6 +5,7 @@ from flask import Blueprint, request, jsonify, current_app
 from app import db, limiter
 from app.models import Order
 from app.services.yookassa_service import YooKassaService
+from app.utils.auth import admin_required
 import hmac
 import hashlib
 
@@ -49,7 +50,8 @@ def create_payment():
         # Создание платежа через ЮКассу
         yookassa = YooKassaService(
             shop_id=current_app.config['YOOKASSA_SHOP_ID'],
-            secret_key=current_app.config['YOOKASSA_SECRET_KEY']
+            secret_key=current_app.config['YOOKASSA_SECRET_KEY'],
+            api_url=current_app.config['YOOKASSA_API_URL']
         )
 
         payment_data = {
@@ -105,7 +107,8 @@ def get_payment_status(payment_id):
     try:
         yookassa = YooKassaService(
             shop_id=current_app.config['YOOKASSA_SHOP_ID'],
-            secret_key=current_app.config['YOOKASSA_SECRET_KEY']
+            secret_key=current_app.config['YOOKASSA_SECRET_KEY'],
+            api_url=current_app.config['YOOKASSA_API_URL']
         )
 
         result = yookassa.check_payment_status(payment_id)
@@ -167,10 +170,11 @@ def payment_webhook():
 
 
 @bp.route('/refund', methods=['POST'])
+@admin_required()
 @limiter.limit("5 per hour")
 def create_refund():
     """
-    Создать возврат платежа
+    Создать возврат платежа (только для администраторов)
 
     Request JSON:
         payment_id: string
@@ -193,7 +197,8 @@ def create_refund():
 
         yookassa = YooKassaService(
             shop_id=current_app.config['YOOKASSA_SHOP_ID'],
-            secret_key=current_app.config['YOOKASSA_SECRET_KEY']
+            secret_key=current_app.config['YOOKASSA_SECRET_KEY'],
+            api_url=current_app.config['YOOKASSA_API_URL']
         )
 
         result = yookassa.create_refund(payment_id, amount)
@@ -1,15 +1,21 @@
 """
 Роуты для работы с товарами
 """
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+import os
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import get_jwt_identity
 from app import db, limiter
 from app.models import Product
+from app.routes import admin_import
+from app.services import catalog_import, images, import_jobs
+from app.utils.auth import admin_required
+from app.utils.query_stats import query_budget
 
 bp = Blueprint('products', __name__)
 
 
 @bp.route('', methods=['GET'])
+@query_budget(2)
 @limiter.limit("100 per minute")
 def get_products():
     """
@@ -25,7 +31,8 @@ def get_products():
         products: array
     """
     try:
-        query = Product.query
+        # Товары, удаленные синхронизацией каталога, не отдаются
+        query = Product.live()
 
         # Фильтр по видимости (по умолчанию только видимые)
         visible = request.args.get('visible', 'true').lower() == 'true'
@@ -75,7 +82,7 @@ def get_product(product_id):
     try:
         product = Product.query.get(product_id)
 
-        if not product:
+        if not product or product.deleted_at:
             return jsonify({'error': 'Product not found'}), 404
 
         return jsonify({'product': product.to_dict()}), 200
@@ -85,7 +92,7 @@ def get_product(product_id):
 
 
 @bp.route('', methods=['POST'])
-@jwt_required()
+@admin_required()
 @limiter.limit("20 per hour")
 def create_product():
     """
@@ -137,6 +144,7 @@ def create_product():
 
         db.session.add(product)
         db.session.commit()
+        images.schedule([product])
 
         return jsonify({'product': product.to_dict()}), 201
 
@@ -146,7 +154,7 @@ def create_product():
 
 
 @bp.route('/<int:product_id>', methods=['PUT'])
-@jwt_required()
+@admin_required()
 @limiter.limit("30 per hour")
 def update_product(product_id):
     """
@@ -207,6 +215,8 @@ def update_product(product_id):
             product.is_visible = data['isVisible']
 
         db.session.commit()
+        if 'image' in data:
+            images.schedule([product])
 
         return jsonify({'product': product.to_dict()}), 200
 
@@ -216,7 +226,7 @@ def update_product(product_id):
 
 
 @bp.route('/<int:product_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required()
 @limiter.limit("20 per hour")
 def delete_product(product_id):
     """
@@ -242,7 +252,7 @@ def delete_product(product_id):
 
 
 @bp.route('/bulk', methods=['POST'])
-@jwt_required()
+@admin_required()
 @limiter.limit("5 per hour")
 def bulk_create_products():
     """
@@ -283,6 +293,7 @@ def bulk_create_products():
             created_products.append(product)
 
         db.session.commit()
+        images.schedule(created_products)
 
         return jsonify({
             'created': len(created_products),
@@ -295,106 +306,59 @@ def bulk_create_products():
 
 
 @bp.route('/reimport', methods=['POST'])
-@jwt_required()
-@limiter.limit("1 per hour")
+@admin_required()
+@limiter.limit(
+    "1 per hour",
+    # Предпросмотр ничего не меняет и не расходует лимит реимпорта
+    exempt_when=lambda: request.args.get('dry_run', 'false').lower() == 'true'
+)
 def reimport_products():
     """
-    Удалить все продукты и переимпортировать из CSV
-    (только для авторизованных админов, 1 раз в час)
+    Синхронизировать каталог с CSV: новые товары добавляются, измененные
+    обновляются, отсутствующие в CSV мягко удаляются
+    (только для авторизованных админов, 1 раз в час; dry_run без лимита)
 
-    Response JSON:
+    Импорт выполняется фоновым заданием: ответ приходит сразу, прогресс
+    доступен в GET /api/admin/import-jobs/<id>. CSV сначала загружается в
+    промежуточную таблицу и проверяется, затем применяется одной
+    транзакцией; если проверка не пройдена, каталог не меняется.
+
+    Query params:
+        force: boolean (optional) - применить, даже если CSV удаляет
+            больше половины каталога
+        dry_run: boolean (optional) - ничего не менять, вернуть итог и
+            страницу diff (action, limit, offset — как у
+            /api/admin/import-csv?dry_run=true)
+
+    Response JSON (202):
         message: string
-        deleted: int
-        imported: int
+        job: object
     """
     try:
-        # Удаляем все продукты
-        deleted_count = Product.query.delete()
-        db.session.commit()
-
-        # Импортируем из CSV
-        import os
-        import csv
-        import re
+        csv_path = catalog_import.default_csv_path()
 
-        def parse_price(price_str):
-            price_clean = re.sub(r'[^\d]', '', str(price_str))
-            return float(price_clean) if price_clean else 0.0
-
-        def parse_category(name):
-            name_lower = name.lower()
-            if any(word in name_lower for word in ['men', 'homme', 'мужск']):
-                return 'men'
-            elif any(word in name_lower for word in ['women', 'femme', 'женск', 'miss', 'lady']):
-                return 'women'
-            else:
-                return 'unisex'
+        if not os.path.exists(csv_path):
+            return jsonify({'error': f'CSV file not found: {csv_path}'}), 404
 
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'table.csv')
+        force = request.args.get('force', 'false').lower() == 'true'
 
-        if not os.path.exists(csv_path):
-            return jsonify({
-                'error': f'CSV file not found: {csv_path}',
-                'deleted': deleted_count
-            }), 404
-
-        imported_count = 0
-
-        with open(csv_path, 'r', encoding='utf-8-sig') as file:
-            csv_reader = csv.DictReader(file, delimiter=';')
-
-            for row in csv_reader:
-                try:
-                    name = row.get('Название', '').strip()
-                    if not name:
-                        continue
-
-                    description = row.get('Описание', '').strip()
-                    price_str = row.get('Цена', '0').strip()
-                    discount_str = row.get('Скидка (в процентах)', '0').strip()
-                    image_url = row.get('Изображения (через ;)', '').strip()
-
-                    price = parse_price(price_str)
-                    discount = int(discount_str) if discount_str.isdigit() else 0
-
-                    old_price = None
-                    if discount > 0:
-                        old_price = price / (1 - discount / 100)
-
-                    brand = name.split()[0] if name else 'Unknown'
-                    volume_match = re.search(r'(\d+)\s*мл', name)
-                    volume = volume_match.group(1) + 'мл' if volume_match else '100мл'
-                    category = parse_category(name)
-
-                    product = Product(
-                        name=name,
-                        brand=brand,
-                        price=price,
-                        old_price=old_price,
-                        discount=discount,
-                        volume=volume,
-                        category=category,
-                        description=description or f"Оригинальный парфюм {name}",
-                        image=image_url or 'https://images.unsplash.com/photo-1541643600914-78b084683601?w=400',
-                        is_featured=imported_count < 4,
-                        is_new=False,
-                        is_visible=True
-                    )
-
-                    db.session.add(product)
-                    imported_count += 1
-
-                except Exception as e:
-                    print(f"⚠️  Ошибка импорта товара: {str(e)}")
-                    continue
+        if request.args.get('dry_run', 'false').lower() == 'true':
+            workers = catalog_import.parse_workers(csv_path, current_app.config['IMPORT_PARSE_WORKERS'])
+            return admin_import.dry_run_response(
+                catalog_import.dry_run_file(csv_path, force=force, workers=workers)
+            )
 
-        db.session.commit()
+        job = import_jobs.submit(
+            'catalog', csv_path,
+            user_id=int(get_jwt_identity()),
+            force=force,
+            featured_count=4
+        )
 
         return jsonify({
-            'message': 'Products reimported successfully',
-            'deleted': deleted_count,
-            'imported': imported_count
-        }), 200
+            'message': 'Reimport started',
+            'job': job.to_dict()
+        }), 202
 
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,49 @@
+"""
+Роуты профилировщика (только для администраторов, при PROFILER_ENABLED)
+"""
+from flask import Blueprint, Response, jsonify, request
+from app.services import profiler
+from app.utils.auth import admin_required
+from app.utils.logs import valid_request_id
+
+bp = Blueprint('profiler', __name__)
+
+CONTENT_TYPE = 'text/plain; charset=utf-8'
+
+
+@bp.route('', methods=['GET'])
+@admin_required()
+def get_profile():
+    """
+    Профили в collapsed-формате (flamegraph.pl, speedscope, inferno)
+
+    Query params:
+        endpoint: только этот эндпоинт (например, products.get_products)
+        request_id: профиль одного запроса, отправленного с X-Profile: 1
+    """
+    try:
+        request_id = request.args.get('request_id')
+        if request_id is not None:
+            if not valid_request_id(request_id):
+                return jsonify({'error': 'Invalid request_id'}), 400
+            body = profiler.read_request_profile(request_id)
+            if body is None:
+                return jsonify({'error': 'Profile not found'}), 404
+            return Response(body, content_type=CONTENT_TYPE)
+
+        return Response(profiler.collect(request.args.get('endpoint')), content_type=CONTENT_TYPE)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('', methods=['DELETE'])
+@admin_required()
+def clear_profile():
+    """Удалить накопленные профили всех воркеров"""
+    try:
+        profiler.clear()
+        return jsonify({'message': 'Profiles cleared'}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
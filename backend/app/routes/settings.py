@@ -1,94 +1,80 @@
 """
 Роуты для работы с настройками сайта
 """
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+import copy
+
+from flask import Blueprint, Response, request, jsonify
+from flask_jwt_extended import get_jwt_identity
 from app import db, limiter
-import json
+from app.services.site_settings import SiteSettings, VersionConflict
+from app.utils.auth import admin_required
+from app.utils.query_stats import query_budget
 
 bp = Blueprint('settings', __name__)
 
-# Настройки хранятся в простой таблице key-value
-# Для простоты используем JSON файл или создадим отдельную модель
-
-
-class SiteSettings:
-    """Простой класс для работы с настройками"""
-
-    DEFAULT_SETTINGS = {
-        'hero': {
-            'title': 'Добро пожаловать в AirShop',
-            'subtitle': 'Откройте для себя мир изысканных ароматов'
-        },
-        'contact': {
-            'phone': '+7 (999) 123-45-67',
-            'email': 'info@airshop.ru',
-            'telegram': '@airshop_support'
-        },
-        'shipping': {
-            'freeShippingThreshold': 5000,
-            'standardShippingCost': 300
-        },
-        'business': {
-            'companyName': 'AirShop',
-            'address': 'Москва, Россия',
-            'workingHours': 'Пн-Пт: 10:00 - 20:00'
-        }
-    }
-
-    @staticmethod
-    def get_settings_file_path():
-        """Путь к файлу настроек"""
-        import os
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        return os.path.join(base_dir, 'site_settings.json')
-
-    @classmethod
-    def load(cls):
-        """Загрузить настройки из файла"""
-        try:
-            with open(cls.get_settings_file_path(), 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            # Если файл не существует, возвращаем дефолтные настройки
-            return cls.DEFAULT_SETTINGS.copy()
-
-    @classmethod
-    def save(cls, settings):
-        """Сохранить настройки в файл"""
-        with open(cls.get_settings_file_path(), 'w', encoding='utf-8') as f:
-            json.dump(settings, f, ensure_ascii=False, indent=2)
+# Настройки хранятся в БД одним версионированным документом
+# (см. app/services/site_settings.py)
+
+
+def expected_version(data):
+    """
+    Версия, которую видел клиент: заголовок If-Match (ETag из GET) или
+    поле 'version' в теле. None — изменить без проверки.
+    """
+    for etag in request.if_match:
+        version = SiteSettings.version_from_etag(etag)
+        if version is not None:
+            return version
+    return data.get('version')
+
+
+def conflict_response(e):
+    return jsonify({'error': str(e), 'version': e.current_version}), 409
 
 
 @bp.route('', methods=['GET'])
+@query_budget(4)
 @limiter.limit("100 per minute")
 def get_settings():
     """
     Получить настройки сайта
 
+    Ответ отдается из кэша процесса с ETag; на If-None-Match с тем же
+    ETag возвращается 304 без тела.
+
     Response JSON:
         settings: object
+        version: int
     """
     try:
-        settings = SiteSettings.load()
-        return jsonify({'settings': settings}), 200
+        body, etag = SiteSettings.response_body()
+
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @bp.route('', methods=['PUT'])
-@jwt_required()
+@admin_required()
 @limiter.limit("20 per hour")
 def update_settings():
     """
     Обновить настройки сайта (только для авторизованных админов)
 
+    Если передана версия (If-Match или 'version'), а настройки с тех пор
+    изменил кто-то другой, возвращается 409 и текущая версия.
+
     Request JSON:
         settings: object
+        version: int (optional)
 
     Response JSON:
         settings: object
+        version: int
     """
     try:
         data = request.get_json()
@@ -96,30 +82,41 @@ def update_settings():
         if not data or 'settings' not in data:
             return jsonify({'error': 'Settings data is required'}), 400
 
-        new_settings = data['settings']
-
         # Сохранение настроек
-        SiteSettings.save(new_settings)
+        settings, version = SiteSettings.save(
+            data['settings'],
+            expected_version(data),
+            user_id=int(get_jwt_identity())
+        )
 
-        return jsonify({'settings': new_settings}), 200
+        return jsonify({'settings': settings, 'version': version}), 200
+
+    except VersionConflict as e:
+        return conflict_response(e)
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
 @bp.route('/hero', methods=['PUT'])
-@jwt_required()
+@admin_required()
 @limiter.limit("30 per hour")
 def update_hero_settings():
     """
     Обновить настройки главной страницы (только для авторизованных админов)
 
+    Меняются только переданные поля; одновременные изменения других
+    разделов не теряются.
+
     Request JSON:
         title: string
         subtitle: string
+        version: int (optional)
 
     Response JSON:
         hero: object
+        version: int
     """
     try:
         data = request.get_json()
@@ -127,35 +124,48 @@ def update_hero_settings():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
-        settings = SiteSettings.load()
+        def change(settings):
+            hero = settings.setdefault('hero', {})
+            if 'title' in data:
+                hero['title'] = data['title']
+            if 'subtitle' in data:
+                hero['subtitle'] = data['subtitle']
 
-        if 'title' in data:
-            settings['hero']['title'] = data['title']
-        if 'subtitle' in data:
-            settings['hero']['subtitle'] = data['subtitle']
+        settings, version = SiteSettings.update(
+            change,
+            expected_version(data),
+            user_id=int(get_jwt_identity())
+        )
 
-        SiteSettings.save(settings)
+        return jsonify({'hero': settings['hero'], 'version': version}), 200
 
-        return jsonify({'hero': settings['hero']}), 200
+    except VersionConflict as e:
+        return conflict_response(e)
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
 @bp.route('/contact', methods=['PUT'])
-@jwt_required()
+@admin_required()
 @limiter.limit("30 per hour")
 def update_contact_settings():
     """
     Обновить контактную информацию (только для авторизованных админов)
 
+    Меняются только переданные поля; одновременные изменения других
+    разделов не теряются.
+
     Request JSON:
         phone: string
         email: string
         telegram: string
+        version: int (optional)
 
     Response JSON:
         contact: object
+        version: int
     """
     try:
         data = request.get_json()
@@ -163,25 +173,33 @@ def update_contact_settings():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
-        settings = SiteSettings.load()
+        def change(settings):
+            contact = settings.setdefault('contact', {})
+            if 'phone' in data:
+                contact['phone'] = data['phone']
+            if 'email' in data:
+                contact['email'] = data['email']
+            if 'telegram' in data:
+                contact['telegram'] = data['telegram']
 
-        if 'phone' in data:
-            settings['contact']['phone'] = data['phone']
-        if 'email' in data:
-            settings['contact']['email'] = data['email']
-        if 'telegram' in data:
-            settings['contact']['telegram'] = data['telegram']
+        settings, version = SiteSettings.update(
+            change,
+            expected_version(data),
+            user_id=int(get_jwt_identity())
+        )
 
-        SiteSettings.save(settings)
+        return jsonify({'contact': settings['contact'], 'version': version}), 200
 
-        return jsonify({'contact': settings['contact']}), 200
+    except VersionConflict as e:
+        return conflict_response(e)
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
 @bp.route('/reset', methods=['POST'])
-@jwt_required()
+@admin_required()
 @limiter.limit("5 per hour")
 def reset_settings():
     """
@@ -189,12 +207,16 @@ def reset_settings():
 
     Response JSON:
         settings: object
+        version: int
     """
     try:
-        default_settings = SiteSettings.DEFAULT_SETTINGS.copy()
-        SiteSettings.save(default_settings)
+        settings, version = SiteSettings.save(
+            copy.deepcopy(SiteSettings.DEFAULT_SETTINGS),
+            user_id=int(get_jwt_identity())
+        )
 
-        return jsonify({'settings': default_settings}), 200
+        return jsonify({'settings': settings, 'version': version}), 200
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,94 @@
+"""
+Данные первой отрисовки витрины (GET /api/bootstrap)
+
+Настройки, избранные товары, количество товаров по категориям и пороги
+доставки собираются в один ответ. Готовое тело и ETag кэшируются в
+процессе и пересобираются, только когда меняется версия настроек или
+отпечаток каталога (число товаров и max(updated_at) — один агрегатный
+запрос не чаще раза в REVALIDATE_INTERVAL секунд).
+"""
+import hashlib
+import json
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app import db
+from app.models import Product
+from app.services.site_settings import SiteSettings
+
+REVALIDATE_INTERVAL = 1.0
+
+# Кэш процесса: {'key', 'checked_at', 'body', 'etag'}
+_cache = None
+_lock = threading.Lock()
+
+
+def catalog_fingerprint():
+    """(число товаров, max(updated_at)) — меняется при любой правке каталога"""
+    count, updated_at = db.session.execute(
+        select(func.count(Product.id), func.max(Product.updated_at))
+    ).one()
+    return count, updated_at.isoformat() if updated_at else None
+
+
+def build_payload(settings, settings_version):
+    """Собрать данные первой отрисовки"""
+    live = Product.live().filter_by(is_visible=True)
+
+    featured = (
+        live.filter_by(is_featured=True)
+        .order_by(Product.id)
+        .limit(current_app.config['BOOTSTRAP_FEATURED_LIMIT'])
+        .all()
+    )
+
+    categories = dict(
+        live.with_entities(Product.category, func.count(Product.id))
+        .group_by(Product.category)
+        .all()
+    )
+    categories['all'] = sum(categories.values())
+
+    return {
+        'settings': settings,
+        'settingsVersion': settings_version,
+        'featured': [product.to_dict() for product in featured],
+        'categories': categories,
+        'shipping': settings.get('shipping', SiteSettings.DEFAULT_SETTINGS['shipping'])
+    }
+
+
+def response_body():
+    """
+    Готовое тело ответа GET /api/bootstrap
+
+    Returns:
+        tuple: (bytes, etag)
+    """
+    global _cache
+
+    cache = _cache
+    if cache is not None and time.monotonic() - cache['checked_at'] < REVALIDATE_INTERVAL:
+        return cache['body'], cache['etag']
+
+    with _lock:
+        settings_version = SiteSettings.version()
+        key = (settings_version, catalog_fingerprint())
+
+        cache = _cache
+        if cache is not None and cache['key'] == key:
+            cache['checked_at'] = time.monotonic()
+            return cache['body'], cache['etag']
+
+        payload = build_payload(SiteSettings.load(), settings_version)
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        _cache = {
+            'key': key,
+            'checked_at': time.monotonic(),
+            'body': body,
+            'etag': hashlib.sha1(body).hexdigest()
+        }
+        return body, _cache['etag']
@@ -0,0 +1,967 @@
+"""
+Импорт каталога товаров из CSV
+
+Единый движок для всех путей импорта (CLI-скрипты, run.py,
+/api/products/reimport, /api/admin/import-csv).
+
+Строки разбираются в простые кортежи (порядок полей — FIELDS),
+дубликаты отсекаются по одному заранее загруженному множеству названий,
+запись идет пачками через executemany. Для больших файлов разбор строк
+выносится в пул процессов (parse_rows_parallel), запись остается в одном
+потоке.
+
+Режимы:
+    - iter_import — дописать в каталог новые товары (существующие пропускаются)
+    - iter_sync — синхронизировать каталог с фидом по external_id:
+      фид загружается в product_staging, проверяется и одной транзакцией
+      применяется к products (вставка новых, обновление измененных по
+      content_hash, мягкое удаление отсутствующих). Неизмененный фид не
+      трогает ни одной строки.
+    - dry_run — предпросмотр синхронизации (что будет вставлено,
+      обновлено, удалено) без записи в БД.
+
+Поддерживаются два формата выгрузки:
+    - каталог ('Название', 'Описание', 'Цена', ...) — table.csv
+    - обновление ('Бренд', 'Модель', 'Описание', 'Цена', ...) — table_update.csv
+"""
+import csv
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import update
+
+from app import db
+from app.models import Product, ProductStaging
+from app.services import category_classifier, images
+
+
+# Порядок полей в кортеже разобранной строки
+FIELDS = (
+    'external_id', 'name', 'brand', 'price', 'old_price', 'discount', 'volume',
+    'category', 'description', 'image', 'is_featured', 'is_new', 'is_visible',
+    'content_hash',
+)
+
+# Поля, которые приходят из фида (входят в content_hash и обновляются
+# синхронизацией). Флаги is_featured/is_new/is_visible принадлежат админке.
+FEED_FIELDS = (
+    'name', 'brand', 'price', 'old_price', 'discount', 'volume',
+    'category', 'description', 'image',
+)
+FEED_SLICE = slice(FIELDS.index('name'), FIELDS.index('image') + 1)
+
+# Размер пачки для executemany
+CHUNK_SIZE = 1000
+
+# Сколько ошибок разбора сохранять в отчете
+MAX_ERRORS = 1000
+
+# Действия в отчете dry run и размер страницы diff по умолчанию
+DIFF_ACTIONS = ('insert', 'update', 'unchanged', 'delete', 'error')
+DIFF_PAGE_SIZE = 100
+
+# Проверки фида перед применением к каталогу
+MAX_FAILED_RATIO = 0.1   # доля строк с ошибками разбора
+MAX_DELETE_RATIO = 0.5   # доля каталога, которую можно удалить без force
+
+# Брошенные загрузки в product_staging старше этого срока удаляются
+STAGING_TTL = timedelta(days=1)
+
+# Параллельный разбор: строк в одном задании пула и порог размера файла,
+# ниже которого запуск процессов не окупается
+PARSE_BATCH_ROWS = 5000
+PARALLEL_MIN_BYTES = 5 * 1024 * 1024
+
+CSV_DELIMITER = ';'
+
+# Обязательные колонки форматов выгрузки (см. row_parser)
+CATALOG_COLUMNS = ('Название',)
+UPDATE_COLUMNS = ('Бренд', 'Модель', 'Описание', 'Цена', 'Скидка (в процентах)', 'Изображения (через ;)')
+DEFAULT_IMAGE = 'https://images.unsplash.com/photo-1541643600914-78b084683601?w=400'
+DEFAULT_VOLUME = '100мл'
+
+NON_DIGITS_RE = re.compile(r'[^\d]')
+VOLUME_RE = re.compile(r'(\d+)\s*мл')
+
+
+def default_csv_path():
+    """Путь к table.csv рядом с backend (в Docker — /app/table.csv)"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(base_dir, 'table.csv')
+
+
+def parse_price(price_str):
+    """Извлекает числовое значение цены из строки вида '7 500 ₽'"""
+    price_clean = NON_DIGITS_RE.sub('', str(price_str))
+    return float(price_clean) if price_clean else 0.0
+
+
+def parse_discount(discount_str):
+    """Скидка в процентах (0, если не число)"""
+    return int(discount_str) if discount_str.isdigit() else 0
+
+
+def parse_category(name):
+    """Определяет категорию товара по названию"""
+    return category_classifier.classify(name)
+
+
+def get_category(brand, model):
+    """Determine category based on brand and model"""
+    return category_classifier.classify(f"{brand} {model}")
+
+
+def parse_catalog_row(row):
+    """
+    Разобрать строку выгрузки каталога (table.csv)
+
+    Returns:
+        tuple в порядке FIELDS или None, если у строки нет названия
+    """
+    name = (row.get('Название') or '').strip()
+    if not name:
+        return None
+
+    external_id = (row.get('ID в системе') or '').strip() or name
+
+    description = (row.get('Описание') or '').strip()
+    price = parse_price((row.get('Цена') or '0').strip())
+    discount = parse_discount((row.get('Скидка (в процентах)') or '0').strip())
+    image_url = (row.get('Изображения (через ;)') or '').strip()
+
+    old_price = price / (1 - discount / 100) if discount > 0 else None
+
+    volume_match = VOLUME_RE.search(name)
+    volume = volume_match.group(1) + 'мл' if volume_match else DEFAULT_VOLUME
+
+    return (
+        external_id,
+        name,
+        name.split()[0],
+        price,
+        old_price,
+        discount,
+        volume,
+        parse_category(name),
+        description or f"Оригинальный парфюм {name}",
+        image_url or DEFAULT_IMAGE,
+        False,
+        False,
+        True,
+        None,
+    )
+
+
+def parse_update_row(row):
+    """
+    Разобрать строку файла обновления (table_update.csv)
+
+    Raises:
+        KeyError: если в строке нет обязательной колонки
+    """
+    brand = row['Бренд'].strip()
+    model = row['Модель'].strip()
+    name = f"{brand} {model}"
+
+    price = int(parse_price(row['Цена'].strip()))
+    discount = parse_discount(row['Скидка (в процентах)'].strip())
+    old_price = int(price / (1 - discount / 100)) if discount > 0 else None
+
+    return (
+        (row.get('ID в системе') or '').strip() or name,
+        name,
+        brand,
+        price,
+        old_price,
+        discount,
+        DEFAULT_VOLUME,
+        get_category(brand, model),
+        row['Описание'].strip(),
+        row['Изображения (через ;)'].strip(),
+        False,
+        False,
+        True,
+        None,
+    )
+
+
+def row_parser(fieldnames):
+    """Выбрать парсер строк по заголовку CSV"""
+    if fieldnames and 'Бренд' in fieldnames:
+        return parse_update_row
+    return parse_catalog_row
+
+
+def check_header(reader):
+    """
+    Проверить заголовок CSV до разбора строк
+
+    Читает только первую строку потока, поэтому ошибку формата можно
+    вернуть клиенту до начала загрузки.
+
+    Raises:
+        CatalogImportError: файл не в UTF-8, пуст или в заголовке нет
+            обязательных колонок
+    """
+    try:
+        fieldnames = reader.fieldnames
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise CatalogImportError(f'Invalid CSV: {e}')
+
+    if not fieldnames:
+        raise CatalogImportError('CSV header is missing')
+
+    required = UPDATE_COLUMNS if 'Бренд' in fieldnames else CATALOG_COLUMNS
+    missing = [column for column in required if column not in fieldnames]
+    if missing:
+        raise CatalogImportError(f"Missing CSV columns: {', '.join(missing)}")
+
+
+def content_hash(values):
+    """SHA-1 полей фида разобранной строки (FEED_FIELDS)"""
+    return hashlib.sha1(repr(values[FEED_SLICE]).encode('utf-8')).hexdigest()
+
+
+def parse_rows(reader, start=2):
+    """
+    Разобрать строки DictReader
+
+    Yields:
+        ('ok', row_num, values) | ('skip', row_num, None) | ('error', row_num, error dict)
+
+    values — кортеж в порядке FIELDS с заполненным content_hash.
+    """
+    parse = row_parser(reader.fieldnames)
+
+    for row_num, row in enumerate(reader, start=start):
+        try:
+            values = parse(row)
+        except Exception as e:
+            yield 'error', row_num, {'row': row_num, 'error': str(e), 'data': dict(row)}
+            continue
+
+        if values is None:
+            yield 'skip', row_num, None
+            continue
+
+        yield 'ok', row_num, values[:-1] + (content_hash(values),)
+
+
+class RowBatch:
+    """
+    Пачка сырых строк CSV с интерфейсом csv.DictReader
+
+    Строки превращаются в словари так же, как это делает DictReader
+    (лишние значения — под restkey, недостающие — restval).
+    """
+
+    def __init__(self, fieldnames, rows, restkey=None, restval=None):
+        self.fieldnames = fieldnames
+        self.rows = rows
+        self.restkey = restkey
+        self.restval = restval
+
+    def __iter__(self):
+        width = len(self.fieldnames)
+        for row in self.rows:
+            values = dict(zip(self.fieldnames, row))
+            if len(row) > width:
+                values[self.restkey] = row[width:]
+            elif len(row) < width:
+                for key in self.fieldnames[len(row):]:
+                    values[key] = self.restval
+            yield values
+
+
+def parse_batch(batch, start):
+    """Разобрать пачку строк (выполняется в процессе пула)"""
+    return list(parse_rows(batch, start))
+
+
+def parse_rows_parallel(reader, workers, batch_rows=PARSE_BATCH_ROWS):
+    """
+    Разобрать строки DictReader в пуле процессов
+
+    Основной процесс только читает сырые строки CSV и раздает их пачками;
+    разбор цен, объема, категории и content_hash идет в воркерах.
+    Результаты отдаются в порядке файла (как у parse_rows), поэтому запись
+    остается однопоточной и детерминированной. В работе держится не больше
+    2 * workers пачек, так что память не растет с размером файла.
+
+    Процессы запускаются через spawn: fork из многопоточного воркера
+    gunicorn унаследовал бы соединения с БД и захваченные блокировки.
+    """
+    fieldnames = reader.fieldnames
+    # DictReader уже прочитал заголовок — дальше читаем сырые строки напрямую,
+    # пропуская пустые, как это делает сам DictReader
+    raw_rows = (row for row in reader.reader if row)
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    pending = deque()
+    start = 2
+
+    try:
+        while True:
+            rows = list(islice(raw_rows, batch_rows))
+            if rows:
+                batch = RowBatch(fieldnames, rows, reader.restkey, reader.restval)
+                pending.append(pool.submit(parse_batch, batch, start))
+                start += len(rows)
+
+            if pending and (not rows or len(pending) >= 2 * workers):
+                yield from pending.popleft().result()
+            elif not rows:
+                break
+
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_parsed(reader, workers=1):
+    """parse_rows или parse_rows_parallel в зависимости от числа процессов"""
+    if workers and workers > 1:
+        return parse_rows_parallel(reader, workers)
+    return parse_rows(reader)
+
+
+def parse_workers(csv_path, workers):
+    """
+    Сколько процессов разбора использовать для файла
+
+    Небольшие файлы разбираются в текущем процессе: запуск пула дороже
+    самого разбора.
+    """
+    if workers > 1 and os.path.getsize(csv_path) >= PARALLEL_MIN_BYTES:
+        return workers
+    return 1
+
+
+def mark_featured(values):
+    """Копия разобранной строки с is_featured=True"""
+    idx = FIELDS.index('is_featured')
+    return values[:idx] + (True,) + values[idx + 1:]
+
+
+def write_chunk(chunk):
+    """Вставить пачку разобранных строк одним executemany"""
+    if chunk:
+        db.session.execute(
+            Product.__table__.insert(),
+            [dict(zip(FIELDS, values)) for values in chunk]
+        )
+
+
+def new_progress(*counters):
+    """Словарь прогресса импорта с нулевыми счетчиками"""
+    progress = {'rows': 0}
+    progress.update((name, 0) for name in counters)
+    progress.update({'failed': 0, 'errors': [], 'done': False})
+    return progress
+
+
+def record_error(progress, error):
+    progress['failed'] += 1
+    if len(progress['errors']) < MAX_ERRORS:
+        progress['errors'].append(error)
+
+
+def iter_import(reader, featured_count=0, chunk_size=CHUNK_SIZE, commit_chunks=False, workers=1):
+    """
+    Дописать товары из csv.DictReader, отдавая прогресс после каждой пачки
+
+    Товары, чье название или external_id уже есть в БД (или встречалось
+    выше в файле), пропускаются.
+
+    Args:
+        reader: csv.DictReader с разделителем ';'
+        featured_count: сколько первых импортированных товаров пометить избранными
+        chunk_size: размер пачки вставки
+        commit_chunks: коммитить каждую пачку (иначе транзакцией управляет
+            вызывающий код)
+        workers: число процессов разбора строк (1 — в текущем процессе)
+
+    Yields:
+        dict: {'rows': int, 'imported': int, 'skipped': int, 'failed': int,
+               'errors': list, 'done': bool}
+
+    Последний отданный словарь — итог (done=True). В 'errors' сохраняются
+    первые MAX_ERRORS ошибок, 'failed' считает все.
+    """
+    seen_names = set()
+    seen_ids = set()
+    for name, external_id in db.session.query(Product.name, Product.external_id):
+        seen_names.add(name)
+        seen_ids.add(external_id)
+
+    progress = new_progress('imported', 'skipped')
+    chunk = []
+
+    def flush():
+        write_chunk(chunk)
+        if commit_chunks:
+            db.session.commit()
+        chunk.clear()
+
+    for status, row_num, payload in iter_parsed(reader, workers):
+        progress['rows'] += 1
+
+        if status == 'error':
+            record_error(progress, payload)
+            continue
+        if status == 'skip' or payload[1] in seen_names or payload[0] in seen_ids:
+            progress['skipped'] += 1
+            continue
+
+        seen_names.add(payload[1])
+        seen_ids.add(payload[0])
+
+        if progress['imported'] < featured_count:
+            payload = mark_featured(payload)
+
+        chunk.append(payload)
+        progress['imported'] += 1
+
+        if len(chunk) >= chunk_size:
+            flush()
+            yield progress
+
+    flush()
+    progress['done'] = True
+    yield progress
+
+
+def import_reader(reader, **kwargs):
+    """
+    Дописать товары из csv.DictReader (параметры — см. iter_import)
+
+    Returns:
+        dict: {'imported': int, 'skipped': int, 'failed': int, 'errors': list}
+        ('errors' — первые MAX_ERRORS строк, 'failed' — все)
+    """
+    for progress in iter_import(reader, **kwargs):
+        pass
+
+    return {
+        'imported': progress['imported'],
+        'skipped': progress['skipped'],
+        'failed': progress['failed'],
+        'errors': progress['errors']
+    }
+
+
+class CatalogImportError(Exception):
+    """Фид не прошел проверку, живой каталог не изменен"""
+
+
+def live_index():
+    """
+    Индекс текущего каталога (один запрос)
+
+    Returns:
+        tuple: (by_external_id, by_name, live_ids)
+            by_external_id: external_id -> (id, content_hash, deleted)
+            by_name: name -> (id, deleted) для товаров без external_id
+            live_ids: set id неудаленных товаров
+    """
+    by_external_id = {}
+    by_name = {}
+    live_ids = set()
+
+    rows = db.session.query(
+        Product.id, Product.external_id, Product.name,
+        Product.content_hash, Product.deleted_at
+    )
+    for product_id, external_id, name, row_hash, deleted_at in rows:
+        deleted = deleted_at is not None
+        if external_id is not None:
+            by_external_id[external_id] = (product_id, row_hash, deleted)
+        else:
+            by_name.setdefault(name, (product_id, deleted))
+        if not deleted:
+            live_ids.add(product_id)
+
+    return by_external_id, by_name, live_ids
+
+
+def find_existing(payload, by_external_id, by_name):
+    """
+    Товар каталога для строки фида: по external_id, а для товаров без
+    external_id — по названию (каждый такой товар сопоставляется один раз)
+
+    Returns:
+        tuple (id, content_hash, deleted) or None
+    """
+    existing = by_external_id.get(payload[0])
+    if existing is None and payload[1] in by_name:
+        product_id, deleted = by_name.pop(payload[1])
+        existing = (product_id, None, deleted)
+    return existing
+
+
+def iter_stage(reader, import_id, progress, chunk_size=CHUNK_SIZE, workers=1):
+    """
+    Загрузить строки фида в product_staging, коммитя каждую пачку
+
+    Живой каталог не затрагивается. Повторы external_id внутри фида
+    пропускаются.
+
+    Yields:
+        progress после каждой пачки
+    """
+    seen_keys = set()
+    chunk = []
+
+    def flush():
+        if chunk:
+            db.session.execute(ProductStaging.__table__.insert(), chunk)
+            db.session.commit()
+            chunk.clear()
+
+    for status, row_num, payload in iter_parsed(reader, workers):
+        progress['rows'] += 1
+
+        if status == 'error':
+            record_error(progress, payload)
+            continue
+
+        if status == 'skip' or payload[0] in seen_keys:
+            progress['skipped'] += 1
+            continue
+        seen_keys.add(payload[0])
+
+        values = dict(zip(FIELDS, payload))
+        values.update(import_id=import_id, row_num=row_num)
+        chunk.append(values)
+        progress['staged'] += 1
+
+        if len(chunk) >= chunk_size:
+            flush()
+            yield progress
+
+    flush()
+
+
+def plan_swap(import_id, featured_count=0, chunk_size=CHUNK_SIZE):
+    """
+    Сравнить загруженный фид с живым каталогом
+
+    Товары без external_id (созданы до синхронизации) сопоставляются
+    по названию и получают external_id.
+
+        - строки нет в каталоге -> вставка
+        - content_hash отличается или товар был удален -> обновление полей фида
+        - content_hash совпадает -> строка не трогается
+        - товара нет в фиде -> мягкое удаление (deleted_at)
+
+    Args:
+        import_id: ID загрузки в product_staging
+        featured_count: сколько первых вставленных товаров пометить
+            избранными, если каталог пуст (первичная загрузка)
+
+    Returns:
+        dict: {'inserts': list of tuples, 'updates': list of dicts,
+               'deleted_ids': list, 'unchanged': int, 'live_count': int}
+    """
+    by_external_id, by_name, live_ids = live_index()
+
+    if live_ids:
+        featured_count = 0
+
+    columns = [getattr(ProductStaging, field) for field in FIELDS]
+    staged = (
+        db.session.query(*columns)
+        .filter(ProductStaging.import_id == import_id)
+        .order_by(ProductStaging.row_num)
+        .yield_per(chunk_size)
+    )
+
+    inserts = []
+    updates = []
+    unchanged = 0
+    seen_ids = set()
+    now = datetime.utcnow()
+
+    for payload in staged:
+        payload = tuple(payload)
+
+        existing = find_existing(payload, by_external_id, by_name)
+
+        if existing is None:
+            if len(inserts) < featured_count:
+                payload = mark_featured(payload)
+            inserts.append(payload)
+            continue
+
+        product_id, row_hash, deleted = existing
+        seen_ids.add(product_id)
+
+        if row_hash == payload[-1] and not deleted:
+            unchanged += 1
+            continue
+
+        changes = dict(zip(FEED_FIELDS, payload[FEED_SLICE]))
+        changes.update(
+            id=product_id,
+            external_id=payload[0],
+            content_hash=payload[-1],
+            deleted_at=None,
+            updated_at=now
+        )
+        updates.append(changes)
+
+    return {
+        'inserts': inserts,
+        'updates': updates,
+        'deleted_ids': sorted(live_ids - seen_ids),
+        'unchanged': unchanged,
+        'live_count': len(live_ids)
+    }
+
+
+def validate_plan(progress, plan, force=False):
+    """
+    Проверить загруженный фид перед применением
+
+    Raises:
+        CatalogImportError: фид пуст, слишком много ошибок разбора или
+            (без force) он удалил бы больше MAX_DELETE_RATIO каталога
+    """
+    if not progress['staged']:
+        raise CatalogImportError('Feed contains no products')
+
+    if progress['failed'] > progress['rows'] * MAX_FAILED_RATIO:
+        raise CatalogImportError(
+            f"Too many invalid rows: {progress['failed']} of {progress['rows']}"
+        )
+
+    deleted = len(plan['deleted_ids'])
+    if not force and deleted > plan['live_count'] * MAX_DELETE_RATIO:
+        raise CatalogImportError(
+            f"Feed would remove {deleted} of {plan['live_count']} products, "
+            f"retry with force=true if this is intended"
+        )
+
+
+def apply_plan(plan, chunk_size=CHUNK_SIZE):
+    """Применить изменения к живому каталогу одной транзакцией"""
+    now = datetime.utcnow()
+
+    try:
+        for start in range(0, len(plan['inserts']), chunk_size):
+            write_chunk(plan['inserts'][start:start + chunk_size])
+
+        for start in range(0, len(plan['updates']), chunk_size):
+            db.session.execute(update(Product), plan['updates'][start:start + chunk_size])
+
+        deleted_ids = plan['deleted_ids']
+        for start in range(0, len(deleted_ids), chunk_size):
+            db.session.execute(
+                update(Product)
+                .where(Product.id.in_(deleted_ids[start:start + chunk_size]))
+                .values(deleted_at=now, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+
+        # Сменившиеся URL изображений не должны отдавать старые варианты
+        images.link_products()
+
+        db.session.commit()
+
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def drop_staging(import_id=None, older_than=None):
+    """Удалить строки product_staging конкретной загрузки или устаревшие"""
+    query = ProductStaging.query
+    if import_id is not None:
+        query = query.filter(ProductStaging.import_id == import_id)
+    if older_than is not None:
+        query = query.filter(ProductStaging.created_at < older_than)
+    query.delete(synchronize_session=False)
+    db.session.commit()
+
+
+def iter_sync(reader, featured_count=0, chunk_size=CHUNK_SIZE, force=False, workers=1):
+    """
+    Синхронизировать каталог с фидом через промежуточную таблицу
+
+    1. строки фида пачками загружаются в product_staging (прогресс
+       отдается после каждой пачки, витрина ничего не видит);
+    2. загрузка сравнивается с каталогом по external_id/content_hash
+       и проверяется (validate_plan);
+    3. вставки, обновления и мягкие удаления применяются одной короткой
+       транзакцией.
+
+    При любой ошибке живой каталог остается прежним. Неизмененный фид
+    не меняет ни одной строки products. id товаров сохраняются, так что
+    ссылки OrderItem.product_id не ломаются.
+
+    Args:
+        reader: csv.DictReader с разделителем ';'
+        featured_count: сколько первых вставленных товаров пометить
+            избранными, если каталог был пуст (первичная загрузка)
+        chunk_size: размер пачки записи
+        force: применить фид, даже если он удаляет большую часть каталога
+        workers: число процессов разбора строк (1 — в текущем процессе)
+
+    Yields:
+        dict: {'rows', 'staged', 'inserted', 'updated', 'unchanged',
+               'deleted', 'skipped', 'failed', 'errors', 'done'}
+
+    Raises:
+        CatalogImportError: фид не прошел проверку
+    """
+    import_id = str(uuid.uuid4())
+    drop_staging(older_than=datetime.utcnow() - STAGING_TTL)
+
+    progress = new_progress('staged', 'inserted', 'updated', 'unchanged', 'deleted', 'skipped')
+
+    try:
+        yield from iter_stage(reader, import_id, progress, chunk_size, workers)
+
+        plan = plan_swap(import_id, featured_count, chunk_size)
+        validate_plan(progress, plan, force)
+        apply_plan(plan, chunk_size)
+
+    finally:
+        db.session.rollback()
+        drop_staging(import_id)
+
+    progress.update(
+        inserted=len(plan['inserts']),
+        updated=len(plan['updates']),
+        unchanged=plan['unchanged'],
+        deleted=len(plan['deleted_ids']),
+        done=True
+    )
+    yield progress
+
+
+def changed_fields(diff, chunk_size=CHUNK_SIZE):
+    """Заполнить 'fields' у обновлений dry run: какие поля фида изменятся"""
+    updates = {entry['id']: entry for entry in diff if entry['action'] == 'update'}
+    ids = list(updates)
+    columns = [getattr(Product, field) for field in FEED_FIELDS]
+
+    for start in range(0, len(ids), chunk_size):
+        rows = db.session.query(Product.id, Product.deleted_at, *columns).filter(
+            Product.id.in_(ids[start:start + chunk_size])
+        )
+        for product_id, deleted_at, *current in rows:
+            entry = updates[product_id]
+            new_values = entry.pop('values', ())
+            entry['fields'] = [
+                field for field, old, new in zip(FEED_FIELDS, current, new_values)
+                if old != new
+            ]
+            if deleted_at is not None:
+                entry['fields'].append('deleted_at')
+
+
+def dry_run(reader, force=False, workers=1):
+    """
+    Предпросмотр синхронизации без записи в БД
+
+    Фид разбирается за один проход и сравнивается с индексом каталога
+    в памяти (по external_id и названию, как в plan_swap). Каждая строка
+    получает действие insert / update / unchanged / error; товары,
+    которых нет в фиде, — delete. Повторы и пустые строки только
+    считаются в 'skipped'.
+
+    Args:
+        reader: csv.DictReader с разделителем ';'
+        force: проверять фид так же, как iter_sync с force
+        workers: число процессов разбора строк
+
+    Returns:
+        dict: {
+            'summary': {'rows', 'inserted', 'updated', 'unchanged',
+                        'deleted', 'skipped', 'failed',
+                        'rejected': str or None — почему iter_sync
+                        отклонил бы фид},
+            'diff': list of {'action', 'row', 'id', 'externalId', 'name',
+                             'fields' (update), 'error' (error)}
+        }
+    """
+    by_external_id, by_name, live_ids = live_index()
+
+    progress = new_progress('staged', 'inserted', 'updated', 'unchanged', 'deleted', 'skipped')
+    diff = []
+    seen_keys = set()
+    seen_ids = set()
+
+    for status, row_num, payload in iter_parsed(reader, workers):
+        progress['rows'] += 1
+
+        if status == 'error':
+            progress['failed'] += 1
+            diff.append({'action': 'error', 'row': row_num, 'error': payload['error']})
+            continue
+
+        if status == 'skip' or payload[0] in seen_keys:
+            progress['skipped'] += 1
+            continue
+        seen_keys.add(payload[0])
+        progress['staged'] += 1
+
+        entry = {'row': row_num, 'id': None, 'externalId': payload[0], 'name': payload[1]}
+        existing = find_existing(payload, by_external_id, by_name)
+
+        if existing is None:
+            entry['action'] = 'insert'
+            progress['inserted'] += 1
+        else:
+            product_id, row_hash, deleted = existing
+            seen_ids.add(product_id)
+            entry['id'] = product_id
+
+            if row_hash == payload[-1] and not deleted:
+                entry['action'] = 'unchanged'
+                progress['unchanged'] += 1
+            else:
+                entry['action'] = 'update'
+                entry['values'] = payload[FEED_SLICE]
+                progress['updated'] += 1
+
+        diff.append(entry)
+
+    deleted_ids = sorted(live_ids - seen_ids)
+    progress['deleted'] = len(deleted_ids)
+
+    changed_fields(diff)
+
+    for start in range(0, len(deleted_ids), CHUNK_SIZE):
+        rows = db.session.query(Product.id, Product.external_id, Product.name).filter(
+            Product.id.in_(deleted_ids[start:start + CHUNK_SIZE])
+        )
+        for product_id, external_id, name in rows.order_by(Product.id):
+            diff.append({
+                'action': 'delete', 'row': None, 'id': product_id,
+                'externalId': external_id, 'name': name
+            })
+
+    try:
+        validate_plan(progress, {'deleted_ids': deleted_ids, 'live_count': len(live_ids)}, force)
+        rejected = None
+    except CatalogImportError as e:
+        rejected = str(e)
+
+    summary = {key: progress[key] for key in (
+        'rows', 'inserted', 'updated', 'unchanged', 'deleted', 'skipped', 'failed'
+    )}
+    summary['rejected'] = rejected
+
+    return {'summary': summary, 'diff': diff}
+
+
+def dry_run_page(result, actions=None, offset=0, limit=DIFF_PAGE_SIZE):
+    """
+    Итог dry run со страницей diff
+
+    Args:
+        result: результат dry_run
+        actions: действия, которые попадают в diff (по умолчанию все,
+            кроме unchanged)
+
+    Returns:
+        dict: {'dry_run': True, 'summary', 'diff', 'total', 'offset', 'limit'}
+    """
+    if not actions:
+        actions = [action for action in DIFF_ACTIONS if action != 'unchanged']
+    entries = [entry for entry in result['diff'] if entry['action'] in actions]
+
+    return {
+        'dry_run': True,
+        'summary': result['summary'],
+        'diff': entries[offset:offset + limit],
+        'total': len(entries),
+        'offset': offset,
+        'limit': limit
+    }
+
+
+def dry_run_file(csv_path, **kwargs):
+    """Предпросмотр синхронизации с CSV файлом (см. dry_run)"""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as file:
+        return dry_run(csv.DictReader(file, delimiter=CSV_DELIMITER), **kwargs)
+
+
+def dry_run_text(csv_text, **kwargs):
+    """Предпросмотр синхронизации с CSV, переданным строкой (см. dry_run)"""
+    return dry_run(csv.DictReader(io.StringIO(csv_text), delimiter=CSV_DELIMITER), **kwargs)
+
+
+def sync_summary(progress):
+    """Итог синхронизации для ответа API / вывода скриптов"""
+    return {
+        'imported': progress['inserted'] + progress['updated'] + progress['unchanged'],
+        'inserted': progress['inserted'],
+        'updated': progress['updated'],
+        'unchanged': progress['unchanged'],
+        'deleted': progress['deleted'],
+        'skipped': progress['skipped'],
+        'failed': progress['failed'],
+        'errors': progress['errors']
+    }
+
+
+def sync_reader(reader, **kwargs):
+    """
+    Синхронизировать каталог с csv.DictReader (параметры — см. iter_sync)
+
+    Returns:
+        dict: см. sync_summary
+    """
+    for progress in iter_sync(reader, **kwargs):
+        pass
+    return sync_summary(progress)
+
+
+def open_stream(binary_stream):
+    """
+    Обернуть бинарный поток (тело запроса, загруженный файл) для csv.DictReader
+
+    Строки читаются по мере разбора, весь файл в память не загружается.
+    """
+    if not isinstance(binary_stream, io.BufferedIOBase):
+        binary_stream = io.BufferedReader(binary_stream)
+    text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    return csv.DictReader(text_stream, delimiter=CSV_DELIMITER)
+
+
+def import_file(csv_path, **kwargs):
+    """Импортировать товары из CSV файла (см. import_reader)"""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as file:
+        return import_reader(csv.DictReader(file, delimiter=CSV_DELIMITER), **kwargs)
+
+
+def import_text(csv_text, **kwargs):
+    """Импортировать товары из CSV, переданного строкой (см. import_reader)"""
+    return import_reader(
+        csv.DictReader(io.StringIO(csv_text), delimiter=CSV_DELIMITER),
+        **kwargs
+    )
+
+
+def sync_file(csv_path, **kwargs):
+    """Синхронизировать каталог с CSV файлом (см. sync_reader)"""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as file:
+        return sync_reader(csv.DictReader(file, delimiter=CSV_DELIMITER), **kwargs)
+
+
+def sync_text(csv_text, **kwargs):
+    """Синхронизировать каталог с CSV, переданным строкой (см. sync_reader)"""
+    return sync_reader(
+        csv.DictReader(io.StringIO(csv_text), delimiter=CSV_DELIMITER),
+        **kwargs
+    )
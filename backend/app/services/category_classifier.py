@@ -0,0 +1,99 @@
+"""
+Определение категории товара (men / women / unisex) по названию
+
+Все фразы из файла правил компилируются один раз в одно регулярное
+выражение. Совпадения ищутся во всех позициях строки, побеждает самое
+длинное (при равной длине — самое левое), поэтому результат не зависит
+от порядка правил в файле.
+
+Файл правил — JSON (по умолчанию categories.json рядом с модулем,
+путь можно переопределить переменной окружения CATEGORY_RULES_PATH):
+
+    {
+        "default": "unisex",
+        "categories": {
+            "men": ["dior sauvage", "homme", "мужск*"],
+            ...
+        }
+    }
+
+Фраза совпадает с границы слова и до границы слова; '*' в конце фразы
+разрешает продолжение слова ('мужск*' -> 'мужской').
+"""
+import json
+import os
+import re
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'categories.json')
+
+
+class CategoryClassifier:
+    """Классификатор названий товаров по фразам с приоритетом самого длинного совпадения"""
+
+    def __init__(self, categories, default='unisex'):
+        """
+        Args:
+            categories: dict {категория: [фразы]}
+            default: категория, если ни одна фраза не совпала
+        """
+        self.default = default
+        self.phrases = {}
+
+        alternatives = []
+        for category, phrases in categories.items():
+            for phrase in phrases:
+                phrase = phrase.strip().lower()
+                is_stem = phrase.endswith('*')
+                phrase = phrase.rstrip('*').strip()
+                if not phrase or phrase in self.phrases:
+                    continue
+                self.phrases[phrase] = category
+                alternatives.append((phrase, is_stem))
+
+        # При одинаковом начале альтернатива, стоящая раньше, выигрывает —
+        # сортировка по длине дает самое длинное совпадение в каждой позиции
+        alternatives.sort(key=lambda item: len(item[0]), reverse=True)
+        pattern = '|'.join(
+            re.escape(phrase) + ('' if is_stem else r'(?!\w)')
+            for phrase, is_stem in alternatives
+        )
+        # Lookahead позволяет найти перекрывающиеся совпадения во всех позициях
+        self.regex = re.compile(rf'(?<!\w)(?=({pattern}))') if alternatives else None
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_RULES_PATH):
+        """Загрузить правила из JSON файла"""
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        return cls(rules['categories'], rules.get('default', 'unisex'))
+
+    def match(self, text):
+        """
+        Самая длинная фраза, найденная в тексте
+
+        Returns:
+            str or None
+        """
+        if self.regex is None:
+            return None
+
+        best = None
+        for m in self.regex.finditer(text.lower()):
+            found = m.group(1)
+            if best is None or len(found) > len(best):
+                best = found
+        return best
+
+    def classify(self, text):
+        """Категория товара по названию"""
+        phrase = self.match(text)
+        return self.phrases[phrase] if phrase is not None else self.default
+
+
+# Классификатор по умолчанию строится один раз при импорте модуля
+classifier = CategoryClassifier.from_file(os.getenv('CATEGORY_RULES_PATH', DEFAULT_RULES_PATH))
+
+
+def classify(text):
+    """Категория товара по названию (классификатор по умолчанию)"""
+    return classifier.classify(text)
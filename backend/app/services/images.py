@@ -0,0 +1,370 @@
+"""
+Изображения товаров: скачивание, хранение по содержимому и миниатюры
+
+Каждый URL из Product.image скачивается один раз (запись ImageAsset),
+файл сохраняется на диск под sha256 содержимого, из него создаются
+варианты фиксированных размеров (IMAGE_SIZES) в WebP и JPEG. Работа идет
+в фоновом пуле потоков, запрос или импорт ее не ждут. Когда изображение
+готово, товарам проставляется image_hash, и to_dict начинает отдавать
+локальные URL вариантов (/media/<размер>/<sha256>.<ext>), которые
+раздаются с Cache-Control: immutable.
+
+Структура MEDIA_ROOT:
+    original/ab/<sha256>         — исходный файл
+    <размер>/ab/<sha256>.webp    — варианты
+    <размер>/ab/<sha256>.jpg
+
+Pillow — необязательная зависимость: без него пайплайн выключен и
+товары отдают исходные URL.
+"""
+import hashlib
+import io
+import ipaddress
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import ImageAsset, Product
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow не установлен
+    Image = None
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# ID изображений, поставленных в пул этим процессом
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+CHUNK_SIZE = 500
+
+# Сколько переадресаций проходит скачивание изображения
+MAX_REDIRECTS = 5
+
+
+def is_enabled():
+    return Image is not None
+
+
+def get_executor():
+    """Пул потоков обработки изображений (создается лениво, после fork воркера)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config['IMAGE_WORKERS'],
+                thread_name_prefix='image'
+            )
+        return _executor
+
+
+def check_public_host(url):
+    """
+    Проверить, что хост URL разрешается только в публичные адреса
+
+    URL изображений приходят из фида каталога: без проверки сервер можно
+    заставить обращаться к своей сети (127.0.0.1, 10.0.0.0/8, метаданные
+    облака на 169.254.169.254).
+
+    Raises:
+        ValueError: хост не указан, не разрешается или это частный,
+            loopback, link-local или зарезервированный адрес
+    """
+    host = urlsplit(url).hostname
+    if not host:
+        raise ValueError(f'Image URL has no host: {url}')
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except socket.gaierror as e:
+        raise ValueError(f'Cannot resolve image host {host}: {e}')
+
+    for address in addresses:
+        # Отбрасываем zone id IPv6 ('fe80::1%eth0')
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise ValueError(f'Image host {host} resolves to a non-public address {address}')
+
+
+def fetch_image(url, max_bytes, timeout, allow_private_hosts=False):
+    """
+    Скачать изображение по HTTP(S)
+
+    Переадресации проходятся вручную (не больше MAX_REDIRECTS), и хост
+    каждого шага проверяется check_public_host.
+
+    Args:
+        allow_private_hosts: не проверять адреса хостов (локальная
+            разработка и тесты)
+
+    Raises:
+        ValueError: не http(s) URL, непубличный хост, слишком много
+            переадресаций или файл больше max_bytes
+        requests.RequestException: сетевая ошибка / статус не 2xx
+    """
+    # requests импортируется здесь: он нужен только потокам пула, а не старту воркера
+    import requests
+
+    for _ in range(MAX_REDIRECTS + 1):
+        if not url.startswith(('http://', 'https://')):
+            raise ValueError(f'Unsupported image URL: {url}')
+        if not allow_private_hosts:
+            check_public_host(url)
+
+        with requests.get(url, stream=True, timeout=timeout, allow_redirects=False) as response:
+            if response.is_redirect:
+                url = urljoin(url, response.headers['Location'])
+                continue
+
+            response.raise_for_status()
+
+            data = io.BytesIO()
+            for block in response.iter_content(64 * 1024):
+                data.write(block)
+                if data.tell() > max_bytes:
+                    raise ValueError(f'Image is larger than {max_bytes} bytes')
+            return data.getvalue()
+
+    raise ValueError(f'Too many redirects for image URL: {url}')
+
+
+def media_path(root, kind, content_hash, ext=None):
+    """Путь к файлу в MEDIA_ROOT (каталоги шардируются по первым 2 символам хэша)"""
+    name = f'{content_hash}.{ext}' if ext else content_hash
+    return os.path.join(root, kind, content_hash[:2], name)
+
+
+def write_file(path, data):
+    """Атомарно записать файл (пишем во временный и переименовываем)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def render_variant(image, size, fmt):
+    """Вписать изображение в квадрат size x size (без увеличения) и сохранить в fmt"""
+    variant = image.copy()
+    variant.thumbnail((size, size), Image.LANCZOS)
+
+    if fmt == 'JPEG' and variant.mode != 'RGB':
+        # JPEG не поддерживает прозрачность — подкладываем белый фон
+        background = Image.new('RGB', variant.size, (255, 255, 255))
+        rgba = variant.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        variant = background
+
+    out = io.BytesIO()
+    if fmt == 'JPEG':
+        variant.save(out, 'JPEG', quality=85, optimize=True, progressive=True)
+    else:
+        variant.save(out, 'WEBP', quality=80, method=4)
+    return out.getvalue()
+
+
+def store_image(root, sizes, data):
+    """
+    Сохранить исходный файл и создать отсутствующие варианты
+
+    Returns:
+        tuple: (content_hash, width, height)
+
+    Raises:
+        PIL.UnidentifiedImageError: данные не являются изображением
+    """
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+
+    original = media_path(root, 'original', content_hash)
+    if not os.path.exists(original):
+        write_file(original, data)
+
+    for size_name, size in sizes.items():
+        for ext, fmt in ImageAsset.FORMATS.items():
+            path = media_path(root, size_name, content_hash, ext)
+            if not os.path.exists(path):
+                write_file(path, render_variant(image, size, fmt))
+
+    return content_hash, image.width, image.height
+
+
+def link_products(product_ids=None):
+    """
+    Проставить товарам image_hash готовых изображений по их URL
+
+    Сбрасывает image_hash, если URL товара сменился на еще не скачанный.
+    Коммит — за вызывающим кодом.
+
+    Args:
+        product_ids: ограничить товарами (по умолчанию — все)
+    """
+    ready_hash = (
+        select(ImageAsset.content_hash)
+        .where(ImageAsset.source_url == Product.image, ImageAsset.status == 'ready')
+        .scalar_subquery()
+    )
+    stmt = (
+        update(Product)
+        .where(Product.image_hash.is_distinct_from(ready_hash))
+        .values(image_hash=ready_hash)
+        .execution_options(synchronize_session=False)
+    )
+    if product_ids is not None:
+        stmt = stmt.where(Product.id.in_(product_ids))
+    db.session.execute(stmt)
+
+
+def register_urls(urls):
+    """
+    Создать записи ImageAsset для новых URL
+
+    Returns:
+        list: ID созданных записей
+    """
+    urls = sorted({url for url in urls if url and url.startswith(('http://', 'https://'))})
+    created = []
+
+    for start in range(0, len(urls), CHUNK_SIZE):
+        chunk = urls[start:start + CHUNK_SIZE]
+        known = set(
+            db.session.scalars(select(ImageAsset.source_url).where(ImageAsset.source_url.in_(chunk)))
+        )
+        assets = [ImageAsset(source_url=url) for url in chunk if url not in known]
+        if not assets:
+            continue
+
+        try:
+            db.session.add_all(assets)
+            db.session.flush()
+            ids = [asset.id for asset in assets]
+            db.session.commit()
+            created.extend(ids)
+        except IntegrityError:
+            # Те же URL одновременно регистрирует другой воркер — по одному
+            db.session.rollback()
+            for url in (asset.source_url for asset in assets):
+                asset = ImageAsset(source_url=url)
+                try:
+                    db.session.add(asset)
+                    db.session.flush()
+                    asset_id = asset.id
+                    db.session.commit()
+                    created.append(asset_id)
+                except IntegrityError:
+                    db.session.rollback()
+
+    return created
+
+
+def submit(asset_ids):
+    """Поставить изображения в пул (уже обрабатываемые этим процессом пропускаются)"""
+    app = current_app._get_current_object()
+    executor = get_executor()
+
+    with _in_flight_lock:
+        asset_ids = [asset_id for asset_id in asset_ids if asset_id not in _in_flight]
+        _in_flight.update(asset_ids)
+
+    for asset_id in asset_ids:
+        executor.submit(process_asset, app, asset_id)
+
+
+def schedule(products):
+    """
+    Обработать изображения сохраненных товаров
+
+    Уже скачанные изображения сразу привязываются к товарам, новые
+    ставятся в фоновый пул.
+    """
+    if not is_enabled():
+        return
+
+    link_products([product.id for product in products])
+    db.session.commit()
+    submit(register_urls(product.image for product in products))
+
+
+def schedule_missing():
+    """
+    Обработать изображения всех товаров без image_hash (после импорта)
+
+    Заодно перезапускает записи 'pending', брошенные остановленным воркером.
+    """
+    if not is_enabled():
+        return
+
+    link_products()
+    db.session.commit()
+
+    urls = db.session.scalars(
+        select(Product.image).distinct()
+        .where(Product.image_hash.is_(None), Product.deleted_at.is_(None))
+    )
+    register_urls(urls)
+
+    pending = db.session.scalars(select(ImageAsset.id).where(ImageAsset.status == 'pending')).all()
+    submit(pending)
+
+
+def process_asset(app, asset_id):
+    """Скачать изображение, сохранить варианты и привязать к товарам (в потоке пула)"""
+    with app.app_context():
+        try:
+            asset = db.session.get(ImageAsset, asset_id)
+            if asset is None or asset.status != 'pending':
+                return
+
+            url = asset.source_url
+            try:
+                if app.config['IMAGE_FETCHER']:
+                    data = app.config['IMAGE_FETCHER'](
+                        url, app.config['IMAGE_MAX_BYTES'], app.config['IMAGE_FETCH_TIMEOUT']
+                    )
+                else:
+                    data = fetch_image(
+                        url, app.config['IMAGE_MAX_BYTES'], app.config['IMAGE_FETCH_TIMEOUT'],
+                        allow_private_hosts=app.config['IMAGE_ALLOW_PRIVATE_HOSTS']
+                    )
+                content_hash, width, height = store_image(app.config['MEDIA_ROOT'], app.config['IMAGE_SIZES'], data)
+            except Exception as e:
+                asset.status = 'failed'
+                asset.error = str(e)[:1000]
+                db.session.commit()
+                app.logger.warning('Image %s failed: %s', url, e)
+                return
+
+            asset.status = 'ready'
+            asset.content_hash = content_hash
+            asset.width = width
+            asset.height = height
+            asset.error = None
+            db.session.execute(
+                update(Product)
+                .where(Product.image == url)
+                .values(image_hash=content_hash)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('Image %s: processing failed', asset_id)
+
+        finally:
+            with _in_flight_lock:
+                _in_flight.discard(asset_id)
+            db.session.remove()
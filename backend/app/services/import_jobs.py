@@ -0,0 +1,316 @@
+"""
+Фоновые задания импорта каталога
+
+Импорт не выполняется внутри HTTP-запроса: эндпоинт сохраняет CSV на диск,
+создает запись ImportJob и ставит задание в пул потоков процесса.
+Прогресс пишется в import_jobs после каждой пачки, поэтому опрашивать
+задание и отменять его можно из любого воркера gunicorn.
+
+Очередь живет в памяти воркера, поэтому задание помнит своего воркера
+('host:pid') и время его последней отметки (после каждой пачки). Задания
+воркера, который не отмечался дольше IMPORT_JOB_STALE_AFTER, помечаются
+как 'failed' (fail_interrupted) — при постановке нового задания, при
+запросе статуса и в `flask init-db`.
+"""
+import csv
+import json
+import os
+import shutil
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+
+from app import db
+from app.models import ImportJob
+from app.services import catalog_import, images, profiler
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Статусы заданий, которые еще выполняет (или выполнит) пул потоков
+ACTIVE_STATUSES = ('queued', 'running')
+INTERRUPTED_ERROR = 'Interrupted: the worker stopped responding, the catalog was not changed'
+
+
+def worker_id():
+    """Идентификатор текущего воркера: 'host:pid' (вычисляется после fork)"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def get_executor():
+    """Пул потоков для заданий импорта (создается лениво, после fork воркера)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config['IMPORT_JOB_WORKERS'],
+                thread_name_prefix='import-job'
+            )
+        return _executor
+
+
+def save_upload(binary_stream):
+    """
+    Сохранить загружаемый CSV на диск, не читая его целиком в память
+
+    Returns:
+        str: путь к сохраненному файлу
+    """
+    upload_dir = current_app.config['IMPORT_UPLOAD_DIR']
+    os.makedirs(upload_dir, exist_ok=True)
+
+    path = os.path.join(upload_dir, f'{uuid.uuid4()}.csv')
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(binary_stream, f, length=1024 * 1024)
+    return path
+
+
+def submit(source, file_path, user_id=None, force=False, featured_count=0):
+    """
+    Создать задание и поставить его в очередь
+
+    Args:
+        source: 'upload' (файл удаляется по завершении) или 'catalog'
+        file_path: путь к CSV
+        user_id: ID админа, создавшего задание
+
+    Returns:
+        ImportJob
+    """
+    fail_interrupted()
+
+    job = ImportJob(
+        id=str(uuid.uuid4()),
+        source=source,
+        file_path=file_path,
+        force=force,
+        featured_count=featured_count,
+        created_by=user_id,
+        worker=worker_id(),
+        heartbeat_at=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    get_executor().submit(run_job, app, job.id)
+    return job
+
+
+def request_cancel(job):
+    """
+    Попросить задание остановиться (проверяется после каждой пачки)
+
+    Задание в очереди отменяется сразу. Статус меняется условным UPDATE,
+    поэтому отмена не перезапишет 'running', выставленный пулом в тот же
+    момент, — такое задание остановится после текущей пачки.
+    """
+    if job.is_finished:
+        return job
+
+    db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job.id, ImportJob.status.in_(ACTIVE_STATUSES))
+        .values(cancel_requested=True)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job.id, ImportJob.status == 'queued')
+        .values(status='canceled', finished_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    db.session.refresh(job)
+    return job
+
+
+def cancel_requested(job_id):
+    """Свежее значение флага отмены из БД (его мог выставить другой воркер)"""
+    return bool(
+        db.session.query(ImportJob.cancel_requested)
+        .filter(ImportJob.id == job_id)
+        .scalar()
+    )
+
+
+def save_progress(job, progress):
+    """
+    Записать прогресс и отметку воркера
+
+    Returns:
+        bool: задание все еще выполняется (False — его пометили оборванным)
+    """
+    values = {name: progress[name] for name in ImportJob.COUNTERS}
+    values['errors_json'] = json.dumps(progress['errors'], ensure_ascii=False) if progress['errors'] else None
+    values['heartbeat_at'] = datetime.utcnow()
+
+    running = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job.id, ImportJob.status == 'running')
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return bool(running)
+
+
+def remove_upload(job):
+    """Удалить загруженный файл задания (server-side table.csv не трогается)"""
+    if job.source == 'upload' and os.path.exists(job.file_path):
+        os.remove(job.file_path)
+
+
+def fail_interrupted():
+    """
+    Пометить как 'failed' задания, чей воркер перестал отмечаться
+
+    Воркер жив, пока хотя бы одно его задание (в том числе только что
+    завершенное) отмечено не раньше IMPORT_JOB_STALE_AFTER секунд назад:
+    задания в очереди живого воркера ждут, пока он выполняет другое.
+    Каталог оборванных заданий не изменен — изменения применяются одной
+    транзакцией в самом конце.
+
+    Returns:
+        int: сколько заданий помечено
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=current_app.config['IMPORT_JOB_STALE_AFTER'])
+    # Задания, созданные до появления отметок, судятся по времени создания
+    last_seen = db.func.coalesce(ImportJob.heartbeat_at, ImportJob.created_at)
+    live_workers = select(ImportJob.worker).where(ImportJob.worker.isnot(None), last_seen >= cutoff)
+    stale = and_(
+        ImportJob.status.in_(ACTIVE_STATUSES),
+        last_seen < cutoff,
+        or_(ImportJob.worker.is_(None), ImportJob.worker.not_in(live_workers))
+    )
+
+    marked = 0
+    for job in ImportJob.query.filter(stale).all():
+        # Условный UPDATE: воркер мог отметиться после выборки
+        marked_job = db.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job.id, stale)
+            .values(status='failed', error=INTERRUPTED_ERROR, finished_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+
+        if marked_job:
+            remove_upload(job)
+            marked += 1
+
+    return marked
+
+
+def finish(job_id, status, error=None):
+    """
+    Записать итоговый статус, если задание все еще 'running'
+
+    Задание, которое другой воркер счел оборванным, остается 'failed', кроме
+    случая, когда каталог все-таки применен: тогда верный статус — 'done'.
+
+    Returns:
+        bool: статус записан
+    """
+    current = ImportJob.status == 'running'
+    if status == 'done':
+        current = or_(current, and_(ImportJob.status == 'failed', ImportJob.error == INTERRUPTED_ERROR))
+
+    now = datetime.utcnow()
+    finished = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, current)
+        .values(status=status, error=error, finished_at=now, heartbeat_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return bool(finished)
+
+
+def run_job(app, job_id):
+    """Выполнить задание (в потоке пула)"""
+    with app.app_context():
+        # queued -> running условным UPDATE: задание, отмененное в очереди
+        # (в том числе из другого воркера), не запустится
+        started = db.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status == 'queued')
+            .values(status='running', started_at=datetime.utcnow(),
+                    worker=worker_id(), heartbeat_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+
+        job = db.session.get(ImportJob, job_id)
+        if job is None:
+            db.session.remove()
+            return
+        if not started:
+            remove_upload(job)
+            db.session.remove()
+            return
+
+        workers = catalog_import.parse_workers(job.file_path, app.config['IMPORT_PARSE_WORKERS'])
+        status, error = 'failed', None
+
+        try:
+            with open(job.file_path, 'r', encoding='utf-8-sig', newline='') as f, \
+                    profiler.profile('import_jobs.run_job'):
+                reader = csv.DictReader(f, delimiter=catalog_import.CSV_DELIMITER)
+                steps = catalog_import.iter_sync(
+                    reader,
+                    featured_count=job.featured_count,
+                    force=job.force,
+                    workers=workers
+                )
+
+                for progress in steps:
+                    running = save_progress(job, progress)
+                    if progress['done']:
+                        status = 'done'
+                        break
+
+                    if not running:
+                        # Задание помечено оборванным — каталог не трогаем
+                        steps.close()
+                        app.logger.warning('Import job %s was marked as interrupted, stopping', job_id)
+                        break
+
+                    if cancel_requested(job_id):
+                        # Закрытие генератора удаляет загруженные в staging строки
+                        steps.close()
+                        status = 'canceled'
+                        break
+
+            if status == 'done':
+                try:
+                    images.schedule_missing()
+                except Exception:
+                    # Каталог уже применен — задание не считается упавшим
+                    db.session.rollback()
+                    app.logger.exception('Import job %s: cannot schedule images', job_id)
+
+        except catalog_import.CatalogImportError as e:
+            db.session.rollback()
+            error = str(e)
+
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception('Import job %s failed', job_id)
+            error = str(e)
+
+        finally:
+            remove_upload(job)
+
+            try:
+                finish(job_id, status, error)
+            except Exception:
+                app.logger.exception('Import job %s: cannot save final status', job_id)
+            finally:
+                db.session.remove()
@@ -0,0 +1,261 @@
+"""
+Метрики запросов: задержки по эндпоинтам, статусы, размеры ответов
+
+Каждый воркер gunicorn считает свои запросы в памяти (словарь под
+блокировкой — несколько микросекунд на запрос), а фоновый поток раз в
+METRICS_FLUSH_INTERVAL секунд записывает снимок (если были запросы) в
+свой файл METRICS_DIR/metrics-<pid>.json. /metrics может попасть в
+любой воркер: он складывает файлы всех воркеров и отдает сумму в
+текстовом формате Prometheus (данные других воркеров — с задержкой до
+METRICS_FLUSH_INTERVAL). Счетчики завершившихся воркеров остаются в сумме (файлы
+удаляются только при старте приложения), in-flight — только по живым.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+from flask import g, request
+
+# Границы бакетов гистограммы задержек (секунды)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Метка эндпоинта для запросов, не попавших ни в один роут (404)
+UNMATCHED = 'unmatched'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Registry:
+    """Метрики процесса"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.directory = None
+        self.flush_interval = 1.0
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.dirty = False
+        self.flusher = None
+        # (endpoint, method, status) -> число запросов
+        self.requests = {}
+        # (endpoint, method) -> [счетчики бакетов..., +Inf, сумма секунд]
+        self.latency = {}
+        # endpoint -> [сумма байт, число ответов]
+        self.response_bytes = {}
+        self.in_flight = 0
+
+    def ensure_process(self):
+        """После fork (gunicorn --preload) воркер начинает с нуля и запускает свой поток записи"""
+        if self.pid != os.getpid() or self.flusher is None:
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.reset()
+                if self.flusher is None:
+                    self.flusher = threading.Thread(target=self.flush_loop, name='metrics-flush', daemon=True)
+                    self.flusher.start()
+
+    def flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self.dirty:
+                self.flush()
+
+    def flush(self):
+        """Записать снимок процесса в METRICS_DIR (атомарно)"""
+        self.dirty = False
+        data = json.dumps(self.snapshot(), separators=(',', ':'))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, snapshot_path(self.directory, self.pid))
+
+    def observe(self, endpoint, method, status, duration, size):
+        key = (endpoint, method)
+        with self.lock:
+            self.dirty = True
+            request_key = (endpoint, method, status)
+            self.requests[request_key] = self.requests.get(request_key, 0) + 1
+
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    histogram[i] += 1
+                    break
+            else:
+                histogram[len(LATENCY_BUCKETS)] += 1
+            histogram[-1] += duration
+
+            if size is not None:
+                sizes = self.response_bytes.setdefault(endpoint, [0, 0])
+                sizes[0] += size
+                sizes[1] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'pid': self.pid,
+                'requests': [[*key, count] for key, count in self.requests.items()],
+                'latency': [[*key, list(histogram)] for key, histogram in self.latency.items()],
+                'response_bytes': [[endpoint, *sizes] for endpoint, sizes in self.response_bytes.items()],
+                'in_flight': self.in_flight,
+            }
+
+
+registry = Registry()
+
+
+def snapshot_path(directory, pid):
+    return os.path.join(directory, f'metrics-{pid}.json')
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_dead_snapshots(directory):
+    """Удалить снимки процессов, которых больше нет (прошлые запуски)"""
+    for name in os.listdir(directory):
+        if name.startswith('metrics-') and name.endswith('.json'):
+            try:
+                pid = int(name[len('metrics-'):-len('.json')])
+            except ValueError:
+                continue
+            if not pid_alive(pid):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+
+def collect():
+    """
+    Сумма метрик всех воркеров
+
+    Returns:
+        dict: requests, latency, response_bytes, in_flight
+    """
+    registry.ensure_process()
+    registry.flush()
+
+    requests_total, latency, response_bytes, in_flight = {}, {}, {}, 0
+    directory = registry.directory
+    for name in os.listdir(directory):
+        if not (name.startswith('metrics-') and name.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        for endpoint, method, status, count in data['requests']:
+            key = (endpoint, method, status)
+            requests_total[key] = requests_total.get(key, 0) + count
+        for endpoint, method, histogram in data['latency']:
+            total = latency.setdefault((endpoint, method), [0] * len(histogram))
+            for i, value in enumerate(histogram):
+                total[i] += value
+        for endpoint, size_sum, size_count in data['response_bytes']:
+            total = response_bytes.setdefault(endpoint, [0, 0])
+            total[0] += size_sum
+            total[1] += size_count
+        if pid_alive(data['pid']):
+            in_flight += data['in_flight']
+
+    return {
+        'requests': requests_total,
+        'latency': latency,
+        'response_bytes': response_bytes,
+        'in_flight': in_flight,
+    }
+
+
+def label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(metrics):
+    """Текстовый формат Prometheus (version 0.0.4)"""
+    lines = [
+        '# HELP http_requests_total HTTP requests by endpoint, method and status.',
+        '# TYPE http_requests_total counter',
+    ]
+    for (endpoint, method, status), count in sorted(metrics['requests'].items()):
+        lines.append(f'http_requests_total{{endpoint="{label_value(endpoint)}",'
+                     f'method="{method}",status="{status}"}} {count}')
+
+    lines += [
+        '# HELP http_request_duration_seconds Request latency by endpoint and method.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for (endpoint, method), histogram in sorted(metrics['latency'].items()):
+        labels = f'endpoint="{label_value(endpoint)}",method="{method}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += histogram[len(LATENCY_BUCKETS)]
+        lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+    lines += [
+        '# HELP http_response_size_bytes Response body size by endpoint.',
+        '# TYPE http_response_size_bytes summary',
+    ]
+    for endpoint, (size_sum, size_count) in sorted(metrics['response_bytes'].items()):
+        labels = f'endpoint="{label_value(endpoint)}"'
+        lines.append(f'http_response_size_bytes_sum{{{labels}}} {size_sum}')
+        lines.append(f'http_response_size_bytes_count{{{labels}}} {size_count}')
+
+    lines += [
+        '# HELP http_requests_in_flight Requests being processed by live workers.',
+        '# TYPE http_requests_in_flight gauge',
+        f'http_requests_in_flight {metrics["in_flight"]}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Подключить сбор метрик к приложению (если METRICS_ENABLED)"""
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    registry.directory = app.config['METRICS_DIR']
+    registry.flush_interval = app.config['METRICS_FLUSH_INTERVAL']
+    os.makedirs(registry.directory, exist_ok=True)
+    remove_dead_snapshots(registry.directory)
+
+    @app.before_request
+    def start_request_timer():
+        registry.ensure_process()
+        g.metrics_start = time.perf_counter()
+        with registry.lock:
+            registry.in_flight += 1
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.get('metrics_start')
+        if start is not None:
+            endpoint = request.endpoint or UNMATCHED
+            registry.observe(endpoint, request.method, response.status_code,
+                             time.perf_counter() - start, response.content_length)
+        return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        if g.pop('metrics_start', None) is not None:
+            with registry.lock:
+                registry.in_flight -= 1
@@ -0,0 +1,83 @@
+"""
+Хэширование паролей на отдельном ограниченном пуле потоков
+
+bcrypt намеренно медленный (десятки миллисекунд на проверку). Пул
+ограничивает параллельность, а не время ответа: поток запроса по-прежнему
+ждет результата, но одновременно хэшируют не больше BCRYPT_POOL_SIZE
+потоков, а ожидающих в очереди не больше BCRYPT_QUEUE_SIZE. Волна
+попыток входа упирается в размер пула, а не занимает все ядра машины.
+Если очередь заполнена, вызов ждет слота не дольше BCRYPT_QUEUE_TIMEOUT
+и получает PasswordPoolBusy.
+
+Стоимость хэша — BCRYPT_LOG_ROUNDS. Хэши, созданные с другой
+стоимостью, пересчитываются при следующем успешном входе
+(needs_rehash).
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from app import bcrypt
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+class PasswordPoolBusy(Exception):
+    """Пул bcrypt перегружен"""
+
+
+def get_executor():
+    """Пул потоков bcrypt и семафор, ограничивающий очередь (создаются лениво)"""
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            size = current_app.config['BCRYPT_POOL_SIZE']
+            _slots = threading.BoundedSemaphore(size + current_app.config['BCRYPT_QUEUE_SIZE'])
+            _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='bcrypt')
+        return _executor, _slots
+
+
+def run(fn, *args):
+    """
+    Выполнить fn на пуле bcrypt и дождаться результата
+
+    Вызывающий поток блокируется до конца вычисления; пул только
+    ограничивает, сколько вычислений идет одновременно.
+
+    Raises:
+        PasswordPoolBusy: слот в очереди не освободился за BCRYPT_QUEUE_TIMEOUT
+    """
+    executor, slots = get_executor()
+    if not slots.acquire(timeout=current_app.config['BCRYPT_QUEUE_TIMEOUT']):
+        raise PasswordPoolBusy('Too many concurrent password checks')
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(password):
+    """bcrypt-хэш пароля со стоимостью BCRYPT_LOG_ROUNDS"""
+    rounds = current_app.config['BCRYPT_LOG_ROUNDS']
+    return run(bcrypt.generate_password_hash, password, rounds).decode('utf-8')
+
+
+def check_password(password_hash, password):
+    """Проверить пароль по хэшу"""
+    return run(bcrypt.check_password_hash, password_hash, password)
+
+
+def hash_cost(password_hash):
+    """Стоимость (log rounds) из хэша вида $2b$12$..."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash):
+    """Хэш создан с другой стоимостью, чем BCRYPT_LOG_ROUNDS"""
+    return hash_cost(password_hash) != current_app.config['BCRYPT_LOG_ROUNDS']
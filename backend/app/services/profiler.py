@@ -0,0 +1,330 @@
+"""
+Сэмплирующий профилировщик живых воркеров (включается PROFILER_ENABLED)
+
+Профилируются доля PROFILER_SAMPLE_RATE запросов, запросы администратора
+с заголовком X-Profile: 1 и фоновые задания импорта. Фоновый поток раз в
+PROFILER_INTERVAL секунд снимает стеки профилируемых потоков
+(sys._current_frames) — код запроса не инструментируется, поэтому
+накладные расходы малы и не зависят от числа вызовов функций.
+
+Стеки копятся по эндпоинтам в collapsed-формате flamegraph
+("эндпоинт;модуль:функция;... число"), каждый воркер сбрасывает свои в
+PROFILER_DIR/profile-<pid>.json; GET /api/admin/profile складывает
+файлы всех воркеров. Профиль запроса по заголовку дополнительно
+сохраняется отдельно по его request id.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+from app.services.metrics import pid_alive
+from app.utils import logs
+from app.utils.auth import ADMIN_ROLES
+
+PROFILE_HEADER = 'X-Profile'
+
+# Глубже стек обрезается (рекурсия)
+MAX_DEPTH = 200
+
+# Сколько профилей отдельных запросов хранить
+MAX_REQUEST_PROFILES = 100
+
+# Файл-метка очистки: воркеры сбрасывают профили, накопленные до нее
+CLEARED_MARKER = 'cleared'
+
+
+class Sampler:
+    """Профили процесса и поток, снимающий стеки"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Держится на время снятия стеков: после stop() поток стек не трогает
+        self.active_lock = threading.Lock()
+        self.directory = None
+        self.interval = 0.005
+        self.labels = {}
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.thread = None
+        self.wakeup = threading.Event()
+        self.dirty = False
+        self.last_flush = 0.0
+        # Время последнего clear(), учтенное этим процессом
+        self.cleared_at = read_cleared_at(self.directory) if self.directory else 0.0
+        # thread id -> {стек: число сэмплов} профилируемого сейчас потока
+        self.active = {}
+        # метка (эндпоинт) -> {стек: число сэмплов}
+        self.stacks = {}
+
+    def ensure_process(self):
+        """После fork (gunicorn --preload) воркер начинает с нуля и запускает свой поток"""
+        if self.pid != os.getpid() or self.thread is None:
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.reset()
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self.run, name='profiler', daemon=True)
+                    self.thread.start()
+
+    def run(self):
+        while True:
+            if self.dirty and time.monotonic() - self.last_flush >= 1.0:
+                self.flush()
+
+            if not self.active:
+                self.wakeup.wait(1.0)
+                self.wakeup.clear()
+                continue
+
+            time.sleep(self.interval)
+            with self.active_lock:
+                frames = sys._current_frames()
+                for thread_id, samples in self.active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stack = self.collapse(frame)
+                        samples[stack] = samples.get(stack, 0) + 1
+                frames = frame = None
+
+    def label(self, code):
+        """'модуль:функция' для объекта кода (кэшируется)"""
+        label = self.labels.get(code)
+        if label is None:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            label = self.labels[code] = f'{module}:{code.co_qualname}'.replace(';', ',').replace(' ', '_')
+        return label
+
+    def collapse(self, frame):
+        names = []
+        while frame is not None and len(names) < MAX_DEPTH:
+            names.append(self.label(frame.f_code))
+            frame = frame.f_back
+        names.reverse()
+        return ';'.join(names)
+
+    def start(self, thread_id):
+        samples = {}
+        self.ensure_process()
+        with self.active_lock:
+            self.active[thread_id] = samples
+        self.wakeup.set()
+        return samples
+
+    def stop(self, thread_id, label):
+        with self.active_lock:
+            samples = self.active.pop(thread_id, None)
+        if samples:
+            cleared_at = read_cleared_at(self.directory)
+            with self.lock:
+                if cleared_at != self.cleared_at:
+                    # Профили очищены (возможно, из другого воркера)
+                    self.stacks = {}
+                    self.cleared_at = cleared_at
+                target = self.stacks.setdefault(label, {})
+                for stack, count in samples.items():
+                    target[stack] = target.get(stack, 0) + count
+                self.dirty = True
+        return samples
+
+    def flush(self):
+        """Записать профили процесса в PROFILER_DIR (атомарно)"""
+        with self.lock:
+            self.dirty = False
+            self.last_flush = time.monotonic()
+            data = json.dumps({'pid': self.pid, 'stacks': self.stacks}, separators=(',', ':'))
+        write_atomic(snapshot_path(self.directory, self.pid), data)
+
+
+sampler = Sampler()
+_sample_rate = 0.0
+
+
+def read_cleared_at(directory):
+    try:
+        return os.path.getmtime(os.path.join(directory, CLEARED_MARKER))
+    except OSError:
+        return 0.0
+
+
+def snapshot_path(directory, pid):
+    return os.path.join(directory, f'profile-{pid}.json')
+
+
+def request_profile_path(directory, request_id):
+    return os.path.join(directory, f'request-{request_id}.txt')
+
+
+def write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.profile-')
+    with os.fdopen(fd, 'w') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def render(stacks, prefix=None):
+    """Collapsed-формат: одна строка "стек число" на стек"""
+    lines = [f'{prefix};{stack} {count}' if prefix else f'{stack} {count}'
+             for stack, count in sorted(stacks.items())]
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+@contextmanager
+def profile(label):
+    """
+    Профилировать блок в текущем потоке (если профилировщик включен)
+
+    Пример:
+        with profiler.profile('import_jobs.run_job'):
+            ...
+    """
+    if sampler.directory is None:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    sampler.start(thread_id)
+    try:
+        yield
+    finally:
+        sampler.stop(thread_id, label)
+
+
+def collect(endpoint=None):
+    """
+    Профили всех воркеров в collapsed-формате
+
+    Args:
+        endpoint: только этот эндпоинт (None — все, эндпоинт первым кадром)
+    """
+    sampler.ensure_process()
+    sampler.flush()
+
+    merged = {}
+    for name in os.listdir(sampler.directory):
+        if not (name.startswith('profile-') and name.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(sampler.directory, name)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for label, stacks in data['stacks'].items():
+            if endpoint is not None and label != endpoint:
+                continue
+            target = merged.setdefault(label, {})
+            for stack, count in stacks.items():
+                target[stack] = target.get(stack, 0) + count
+
+    if endpoint is not None:
+        return render(merged.get(endpoint, {}))
+    return ''.join(render(stacks, prefix=label) for label, stacks in sorted(merged.items()))
+
+
+def read_request_profile(request_id):
+    """Профиль отдельного запроса (None — нет такого)"""
+    try:
+        with open(request_profile_path(sampler.directory, request_id)) as f:
+            return f.read()
+    except (OSError, ValueError):
+        return None
+
+
+def clear():
+    """Удалить накопленные профили всех воркеров"""
+    marker = os.path.join(sampler.directory, CLEARED_MARKER)
+    with open(marker, 'w'):
+        pass
+    with sampler.lock:
+        sampler.stacks = {}
+        sampler.dirty = False
+        sampler.cleared_at = read_cleared_at(sampler.directory)
+    for name in os.listdir(sampler.directory):
+        if name.startswith(('profile-', 'request-')):
+            try:
+                os.remove(os.path.join(sampler.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def remove_old_request_profiles(directory):
+    names = sorted(
+        (name for name in os.listdir(directory) if name.startswith('request-')),
+        key=lambda name: os.path.getmtime(os.path.join(directory, name)),
+    )
+    for name in names[:-MAX_REQUEST_PROFILES]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def remove_dead_snapshots(directory):
+    """Удалить профили процессов, которых больше нет (прошлые запуски)"""
+    for name in os.listdir(directory):
+        if name.startswith('profile-') and name.endswith('.json'):
+            try:
+                pid = int(name[len('profile-'):-len('.json')])
+            except ValueError:
+                continue
+            if not pid_alive(pid):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+
+def requested_by_admin():
+    """Заголовок X-Profile от администратора (токен проверяется только при заголовке)"""
+    if request.headers.get(PROFILE_HEADER) != '1':
+        return False
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt().get('role') in ADMIN_ROLES
+    except Exception:
+        return False
+
+
+def init_app(app):
+    """Подключить профилировщик к приложению (если PROFILER_ENABLED)"""
+    global _sample_rate
+    if not app.config['PROFILER_ENABLED']:
+        return
+
+    sampler.directory = app.config['PROFILER_DIR']
+    sampler.interval = app.config['PROFILER_INTERVAL']
+    _sample_rate = app.config['PROFILER_SAMPLE_RATE']
+    os.makedirs(sampler.directory, exist_ok=True)
+    remove_dead_snapshots(sampler.directory)
+    sampler.cleared_at = read_cleared_at(sampler.directory)
+
+    @app.before_request
+    def start_profiling():
+        if request.blueprint == 'profiler':
+            return
+        single = requested_by_admin()
+        if single or (_sample_rate and random.random() < _sample_rate):
+            g.profile_single = single
+            g.profile_thread = threading.get_ident()
+            sampler.start(g.profile_thread)
+
+    @app.teardown_request
+    def stop_profiling(exc):
+        thread_id = g.pop('profile_thread', None)
+        if thread_id is None:
+            return
+        samples = sampler.stop(thread_id, request.endpoint or 'unmatched')
+        request_id = logs.request_id()
+        if g.pop('profile_single', False) and request_id:
+            write_atomic(request_profile_path(sampler.directory, request_id),
+                         render(samples or {}, prefix=request.endpoint or 'unmatched'))
+            remove_old_request_profiles(sampler.directory)
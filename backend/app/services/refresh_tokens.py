@@ -0,0 +1,98 @@
+"""
+Refresh-токены с ротацией
+
+Вход выдает пару access + refresh. Refresh-токен одноразовый: обмен на
+новую пару (rotate) погашает его и выдает следующий в том же семействе
+(claim 'fam'). Если погашенный токен предъявлен еще раз — его украли
+или переслали: отзывается все семейство, и вход нужно повторить.
+
+Как и access-токены, refresh-токены несут версию токенов пользователя
+('tv'): смена пароля, роли или деактивация отзывает их без запросов к
+refresh_tokens.
+"""
+import uuid
+from datetime import datetime
+
+from flask import current_app
+from flask_jwt_extended import create_refresh_token, get_jti
+
+from app import db
+from app.models import RefreshToken
+from app.utils.auth import create_user_token
+
+
+class RefreshTokenError(Exception):
+    """Refresh-токен не найден, погашен или отозван"""
+
+
+def issue(user, family_id=None):
+    """
+    Выдать access + refresh токены (refresh сохраняется в сессии БД)
+
+    Args:
+        user: User или CachedUser
+        family_id: семейство ротации (None — новый вход)
+
+    Returns:
+        dict: access_token, refresh_token
+    """
+    now = datetime.utcnow()
+    if family_id is None:
+        family_id = str(uuid.uuid4())
+        # Новый вход — заодно удаляем истекшие токены
+        RefreshToken.query.filter(RefreshToken.expires_at < now).delete(synchronize_session=False)
+
+    refresh_token = create_refresh_token(
+        identity=str(user.id),
+        additional_claims={'tv': user.token_version, 'fam': family_id}
+    )
+    db.session.add(RefreshToken(
+        jti=get_jti(refresh_token),
+        family_id=family_id,
+        user_id=user.id,
+        expires_at=now + current_app.config['JWT_REFRESH_TOKEN_EXPIRES'],
+    ))
+
+    return {
+        'access_token': create_user_token(user),
+        'refresh_token': refresh_token,
+    }
+
+
+def rotate(jwt_payload, user):
+    """
+    Погасить предъявленный refresh-токен и выдать новую пару
+
+    Погашение — один условный UPDATE, поэтому из двух одновременных
+    запросов с одним токеном успешен только первый.
+
+    Raises:
+        RefreshTokenError: токен неизвестен, погашен (семейство
+            отзывается) или отозван
+    """
+    now = datetime.utcnow()
+    used = RefreshToken.query.filter(
+        RefreshToken.jti == jwt_payload['jti'],
+        RefreshToken.used_at.is_(None),
+        RefreshToken.revoked_at.is_(None),
+    ).update({'used_at': now}, synchronize_session=False)
+
+    if used != 1:
+        token = RefreshToken.query.filter_by(jti=jwt_payload['jti']).first()
+        if token is None:
+            raise RefreshTokenError('Unknown refresh token')
+        if token.used_at is not None:
+            revoke_family(token.family_id)
+            db.session.commit()
+            raise RefreshTokenError('Refresh token reuse detected')
+        raise RefreshTokenError('Refresh token has been revoked')
+
+    return issue(user, family_id=jwt_payload['fam'])
+
+
+def revoke_family(family_id):
+    """Отозвать все токены семейства (выход или повторное использование)"""
+    return RefreshToken.query.filter(
+        RefreshToken.family_id == family_id,
+        RefreshToken.revoked_at.is_(None),
+    ).update({'revoked_at': datetime.utcnow()}, synchronize_session=False)
@@ -0,0 +1,227 @@
+"""
+Схема базы данных и начальные данные
+
+Схему приводит к последней ревизии миграций (Alembic через Flask-Migrate,
+каталог backend/migrations) команда `flask init-db` — один раз перед
+запуском воркеров. Команда идемпотентна: повторный запуск ничего не
+меняет. Сами воркеры и CLI-скрипты при создании приложения БД не
+проверяют, а alembic импортируется только здесь и только при вызове.
+
+In-memory БД тестов и бенчмарков создается по моделям (create_all)
+прямо в create_app — см. DB_AUTO_INIT.
+"""
+import logging
+import os
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'migrations'
+)
+
+# Ревизия, соответствующая схеме, которую создавал create_all до миграций
+BASELINE_REVISION = '0001'
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_PRODUCTS = [
+    {
+        'name': 'Chanel No. 5',
+        'brand': 'Chanel',
+        'price': 8500,
+        'old_price': 10000,
+        'discount': 15,
+        'volume': '100ml',
+        'category': 'women',
+        'description': 'Легендарный аромат от Chanel. Утонченный цветочный букет с нотами иланг-иланга и жасмина.',
+        'image': 'https://images.unsplash.com/photo-1541643600914-78b084683601?w=400',
+        'is_featured': True,
+        'is_new': False,
+        'is_visible': True
+    },
+    {
+        'name': 'Dior Sauvage',
+        'brand': 'Dior',
+        'price': 7200,
+        'volume': '100ml',
+        'category': 'men',
+        'description': 'Мужской аромат с пряными и древесными нотами. Свежий и энергичный.',
+        'image': 'https://images.unsplash.com/photo-1592945403244-b3fbafd7f539?w=400',
+        'is_featured': True,
+        'is_new': False,
+        'is_visible': True
+    },
+    {
+        'name': 'Gucci Bloom',
+        'brand': 'Gucci',
+        'price': 6800,
+        'old_price': 7500,
+        'discount': 9,
+        'volume': '50ml',
+        'category': 'women',
+        'description': 'Цветочный аромат с нотами жасмина и туберозы. Романтичный и женственный.',
+        'image': 'https://images.unsplash.com/photo-1523293182086-7651a899d37f?w=400',
+        'is_featured': True,
+        'is_new': True,
+        'is_visible': True
+    },
+    {
+        'name': 'Tom Ford Black Orchid',
+        'brand': 'Tom Ford',
+        'price': 12000,
+        'volume': '100ml',
+        'category': 'unisex',
+        'description': 'Роскошный восточный аромат с нотами черной орхидеи и пачули.',
+        'image': 'https://images.unsplash.com/photo-1587017539504-67cfbddac569?w=400',
+        'is_featured': True,
+        'is_new': False,
+        'is_visible': True
+    },
+]
+
+
+def init_migrate(app):
+    """Подключить Flask-Migrate к приложению (при первом обращении к миграциям)"""
+    from flask_migrate import Migrate
+
+    # Служебные сообщения alembic о загрузке плагинов — не в лог приложения
+    logging.getLogger('alembic.runtime.plugins').setLevel(logging.WARNING)
+    if 'migrate' not in app.extensions:
+        Migrate(app, db, directory=MIGRATIONS_DIR)
+    return app.extensions['migrate']
+
+
+def current_revision():
+    """Ревизия схемы в БД (None — миграции к ней не применялись)"""
+    from alembic.migration import MigrationContext
+
+    with db.engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade(app):
+    """
+    Привести схему к последней ревизии
+
+    База, созданная create_all до появления миграций (таблица users есть,
+    версии схемы нет), сначала помечается BASELINE_REVISION.
+
+    Returns:
+        tuple: (ревизия до, ревизия после)
+    """
+    import flask_migrate
+
+    init_migrate(app)
+    before = current_revision()
+    if before is None and db.inspect(db.engine).has_table('users'):
+        logger.info('Schema without revision found, stamping %s', BASELINE_REVISION)
+        flask_migrate.stamp(directory=MIGRATIONS_DIR, revision=BASELINE_REVISION)
+
+    flask_migrate.upgrade(directory=MIGRATIONS_DIR)
+    after = current_revision()
+    if after != before:
+        logger.info('Schema upgraded: %s -> %s', before, after)
+    return before, after
+
+
+def create_all():
+    """Создать таблицы по моделям, без миграций (DB_AUTO_INIT)"""
+    db.create_all()
+
+
+def ensure_admin(app, role='superadmin'):
+    """
+    Создать администратора ADMIN_USERNAME, если его нет
+
+    Returns:
+        User: созданный пользователь или None (уже есть)
+    """
+    from app.models import User
+
+    if User.query.filter_by(username=app.config['ADMIN_USERNAME']).first():
+        return None
+
+    admin = User(username=app.config['ADMIN_USERNAME'], email=app.config['ADMIN_EMAIL'], role=role)
+    admin.set_password(app.config['ADMIN_PASSWORD'])
+    db.session.add(admin)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Создан параллельно другим процессом
+        db.session.rollback()
+        return None
+
+    logger.info('Default admin user created: %s', admin.username)
+    return admin
+
+
+def seed_products(csv_path=None):
+    """
+    Заполнить пустой каталог: импорт CSV (table.csv), иначе примеры товаров
+
+    Returns:
+        int: сколько товаров добавлено (0 — каталог не пуст)
+    """
+    from app.models import Product
+    from app.services import catalog_import
+    from app.utils.logs import log_event
+
+    current_count = Product.query.count()
+    if current_count:
+        logger.info('Database already has %d products', current_count)
+        return 0
+
+    csv_path = csv_path or catalog_import.default_csv_path()
+    if os.path.exists(csv_path):
+        try:
+            # Первые 4 товара делаем избранными
+            result = catalog_import.import_file(csv_path, featured_count=4)
+            db.session.commit()
+
+            for error in result['errors']:
+                log_event(logger, logging.WARNING, 'import.row_error', 'Product import failed (row %s): %s',
+                          error['row'], error['error'], row=error['row'])
+
+            if result['imported']:
+                logger.info('Imported %d products from CSV', result['imported'])
+                return result['imported']
+        except Exception:
+            logger.exception('Cannot read CSV')
+            db.session.rollback()
+    else:
+        logger.warning('CSV file not found: %s', csv_path)
+
+    # CSV не найден или импорт не удался — создаем примеры
+    for product_data in SAMPLE_PRODUCTS:
+        db.session.add(Product(**product_data))
+    db.session.commit()
+    logger.info('Created %d sample products', len(SAMPLE_PRODUCTS))
+    return len(SAMPLE_PRODUCTS)
+
+
+def init_database(app, products=False):
+    """
+    Схема, администратор и (products=True) товары для пустого каталога
+
+    Задания импорта, чей воркер давно не отмечался (оборваны остановкой
+    сервера), помечаются как 'failed' (import_jobs.fail_interrupted);
+    задания работающих воркеров не трогаются.
+
+    Returns:
+        dict: ревизии до/после, создан ли администратор, сколько товаров
+        добавлено, сколько заданий импорта прервано
+    """
+    from app.services import import_jobs
+
+    before, after = upgrade(app)
+    admin = ensure_admin(app)
+    added = seed_products() if products else 0
+    return {
+        'revision_before': before,
+        'revision': after,
+        'admin_created': admin is not None,
+        'products_added': added,
+        'jobs_interrupted': import_jobs.fail_interrupted(),
+    }
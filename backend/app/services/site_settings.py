@@ -0,0 +1,230 @@
+"""
+Хранилище настроек сайта
+
+Настройки — один JSON-документ в таблице site_settings с номером версии.
+Изменения применяются через compare-and-swap по версии, поэтому
+одновременные частичные обновления из разных воркеров и хостов не
+теряют друг друга: проигравший перечитывает документ и повторяет.
+
+Каждый процесс кэширует документ, готовое тело ответа GET /api/settings
+и ETag. Раз в REVALIDATE_INTERVAL секунд кэш сверяет версию одним
+запросом по первичному ключу, так что изменение, сделанное любым
+воркером, видно остальным не позже чем через этот интервал.
+"""
+import copy
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import SiteSettingsRecord
+
+
+class VersionConflict(Exception):
+    """Настройки изменены другим запросом после того, как их прочитали"""
+
+    def __init__(self, current_version):
+        super().__init__(f'Settings were changed by another request (version {current_version})')
+        self.current_version = current_version
+
+
+class SiteSettings:
+    """Настройки сайта с кэшем процесса"""
+
+    DEFAULT_SETTINGS = {
+        'hero': {
+            'title': 'Добро пожаловать в AirShop',
+            'subtitle': 'Откройте для себя мир изысканных ароматов'
+        },
+        'contact': {
+            'phone': '+7 (999) 123-45-67',
+            'email': 'info@airshop.ru',
+            'telegram': '@airshop_support'
+        },
+        'shipping': {
+            'freeShippingThreshold': 5000,
+            'standardShippingCost': 300
+        },
+        'business': {
+            'companyName': 'AirShop',
+            'address': 'Москва, Россия',
+            'workingHours': 'Пн-Пт: 10:00 - 20:00'
+        }
+    }
+
+    RECORD_ID = 1
+    REVALIDATE_INTERVAL = 1.0
+    MAX_RETRIES = 10
+
+    # Кэш процесса: {'version', 'checked_at', 'settings', 'body', 'etag'}
+    _cache = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def legacy_file_path():
+        """site_settings.json, в котором настройки хранились до переноса в БД"""
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return os.path.join(base_dir, 'site_settings.json')
+
+    @classmethod
+    def etag(cls, version):
+        return f'settings-v{version}'
+
+    @classmethod
+    def version_from_etag(cls, etag):
+        """Номер версии из ETag (None, если ETag не наш)"""
+        prefix = 'settings-v'
+        if etag and etag.startswith(prefix) and etag[len(prefix):].isdigit():
+            return int(etag[len(prefix):])
+        return None
+
+    @classmethod
+    def _seed(cls):
+        """Создать документ: из site_settings.json, если он остался, иначе по умолчанию"""
+        try:
+            with open(cls.legacy_file_path(), 'r', encoding='utf-8') as f:
+                settings = json.load(f)
+        except (FileNotFoundError, ValueError):
+            settings = cls.DEFAULT_SETTINGS
+
+        try:
+            db.session.add(SiteSettingsRecord(
+                id=cls.RECORD_ID,
+                version=1,
+                data=json.dumps(settings, ensure_ascii=False)
+            ))
+            db.session.commit()
+        except IntegrityError:
+            # Документ одновременно создал другой воркер
+            db.session.rollback()
+
+    @classmethod
+    def _read(cls):
+        """Свежие (version, data) из БД, минуя кэш"""
+        query = select(SiteSettingsRecord.version, SiteSettingsRecord.data).where(
+            SiteSettingsRecord.id == cls.RECORD_ID
+        )
+        row = db.session.execute(query).first()
+        if row is None:
+            cls._seed()
+            row = db.session.execute(query).first()
+        return row.version, row.data
+
+    @classmethod
+    def _build_cache(cls, version, data):
+        settings = json.loads(data)
+        body = json.dumps({'settings': settings, 'version': version}, ensure_ascii=False).encode('utf-8')
+        cls._cache = {
+            'version': version,
+            'checked_at': time.monotonic(),
+            'settings': settings,
+            'body': body,
+            'etag': cls.etag(version)
+        }
+        return cls._cache
+
+    @classmethod
+    def _cached(cls):
+        """Актуальная запись кэша (документ читается, только если сменилась версия)"""
+        cache = cls._cache
+        if cache is not None and time.monotonic() - cache['checked_at'] < cls.REVALIDATE_INTERVAL:
+            return cache
+
+        with cls._lock:
+            cache = cls._cache
+            version = db.session.scalar(
+                select(SiteSettingsRecord.version).where(SiteSettingsRecord.id == cls.RECORD_ID)
+            )
+            if cache is not None and cache['version'] == version:
+                cache['checked_at'] = time.monotonic()
+                return cache
+
+            return cls._build_cache(*cls._read())
+
+    @classmethod
+    def load(cls):
+        """Загрузить настройки (копия — ее можно изменять)"""
+        return copy.deepcopy(cls._cached()['settings'])
+
+    @classmethod
+    def version(cls):
+        """Текущая версия настроек (с учетом REVALIDATE_INTERVAL)"""
+        return cls._cached()['version']
+
+    @classmethod
+    def response_body(cls):
+        """
+        Готовое тело ответа GET /api/settings
+
+        Returns:
+            tuple: (bytes, etag)
+        """
+        cache = cls._cached()
+        return cache['body'], cache['etag']
+
+    @classmethod
+    def update(cls, change, expected_version=None, user_id=None):
+        """
+        Изменить настройки через compare-and-swap по версии
+
+        Args:
+            change: функция settings -> None, меняющая документ на месте
+                (при конфликте вызывается повторно на свежем документе)
+            expected_version: версия, которую видел клиент; если документ
+                с тех пор изменился — VersionConflict без повторов
+            user_id: ID админа, сделавшего изменение
+
+        Returns:
+            tuple: (settings, version)
+
+        Raises:
+            VersionConflict
+        """
+        for _ in range(cls.MAX_RETRIES):
+            version, data = cls._read()
+            if expected_version is not None and version != expected_version:
+                db.session.rollback()
+                raise VersionConflict(version)
+
+            settings = json.loads(data)
+            change(settings)
+            new_data = json.dumps(settings, ensure_ascii=False)
+
+            result = db.session.execute(
+                update(SiteSettingsRecord)
+                .where(
+                    SiteSettingsRecord.id == cls.RECORD_ID,
+                    SiteSettingsRecord.version == version
+                )
+                .values(
+                    data=new_data,
+                    version=version + 1,
+                    updated_at=datetime.utcnow(),
+                    updated_by=user_id
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                db.session.commit()
+                with cls._lock:
+                    cls._build_cache(version + 1, new_data)
+                return copy.deepcopy(settings), version + 1
+
+            # Документ изменил другой воркер между чтением и записью
+            db.session.rollback()
+
+        raise VersionConflict(cls._read()[0])
+
+    @classmethod
+    def save(cls, settings, expected_version=None, user_id=None):
+        """Заменить настройки целиком (см. update)"""
+        def replace(current):
+            current.clear()
+            current.update(copy.deepcopy(settings))
+
+        return cls.update(replace, expected_version, user_id)
@@ -0,0 +1,117 @@
+"""
+Кэш пользователей по JWT identity
+
+Админские запросы проверяют роль и активность пользователя на каждом
+вызове. Вместо SELECT по users берется снимок из кэша процесса (TTL —
+USER_CACHE_TTL секунд). Любой коммит, изменивший или удаливший
+пользователя в этом процессе (пароль, роль, is_active...), сразу
+сбрасывает его запись; изменения из других воркеров видны не позже
+чем через TTL.
+
+Смена роли или деактивация увеличивает token_version пользователя:
+токены с прежней версией в claim 'tv' перестают приниматься
+(is_token_revoked).
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app import db
+from app.models import User
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class CachedUser:
+    """Снимок пользователя, не привязанный к сессии БД"""
+
+    __slots__ = ('id', 'username', 'role', 'is_active', 'token_version', 'data')
+
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.role = user.role
+        self.is_active = user.is_active
+        self.token_version = user.token_version
+        self.data = user.to_dict()
+
+    def to_dict(self):
+        return dict(self.data)
+
+
+def get_user(user_id):
+    """
+    Пользователь по ID (из кэша, при промахе — один запрос)
+
+    Returns:
+        CachedUser or None
+    """
+    user_id = int(user_id)
+    now = time.monotonic()
+
+    entry = _cache.get(user_id)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    user = db.session.get(User, user_id)
+    cached = CachedUser(user) if user else None
+    if cached is not None:
+        with _lock:
+            _cache[user_id] = (cached, now + current_app.config['USER_CACHE_TTL'])
+    return cached
+
+
+def invalidate(user_id=None):
+    """Сбросить запись пользователя (или весь кэш)"""
+    with _lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
+
+
+def is_token_revoked(jwt_payload):
+    """
+    Токен отозван: пользователь удален или отключен, либо версия токенов
+    в claim 'tv' не совпадает с текущей
+
+    Токены без 'tv' (выданные до появления claim) тоже считаются отозванными.
+    """
+    user = get_user(jwt_payload['sub'])
+    if user is None or not user.is_active:
+        return True
+    return jwt_payload.get('tv') != user.token_version
+
+
+@event.listens_for(Session, 'before_flush')
+def _revoke_on_access_change(session, flush_context, instances):
+    for obj in session.dirty:
+        if not isinstance(obj, User):
+            continue
+        if get_history(obj, 'role').has_changes() or get_history(obj, 'is_active').has_changes():
+            if not get_history(obj, 'token_version').has_changes():
+                obj.revoke_tokens()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('changed_user_ids', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
@@ -0,0 +1,196 @@
+"""
+Асинхронный сервис для работы с ЮКасса API
+
+Для ASGI-развертывания и фоновых async-задач: ожидание ответа ЮКассы не
+занимает поток, соединения берутся из одного пула на процесс.
+
+httpx.AsyncClient привязан к event loop, в котором открыт, поэтому общий
+клиент процесса рассчитан на один долгоживущий loop (ASGI-сервер,
+воркер задач). Его закрывает aclose() — вызывается из lifespan
+приложения:
+
+    app = Starlette(..., lifespan=yookassa_async_service.lifespan)
+
+Код, который запускает каждый вызов в своем loop (asyncio.run в скрипте,
+async-представления Flask), передает собственный клиент:
+
+    async with httpx.AsyncClient() as client:
+        service = AsyncYooKassaService(shop_id, secret_key, client=client)
+"""
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+
+import httpx
+
+from app.services.yookassa_service import YooKassaService
+
+
+# Лимиты общего пула соединений к API ЮКассы
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+REQUEST_TIMEOUT = httpx.Timeout(30.0)
+
+# Общий клиент процесса: (pid, event loop, клиент)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Общий AsyncClient процесса (создается при первом вызове)
+
+    После fork (воркеры gunicorn) и после aclose() создается новый клиент.
+
+    Raises:
+        RuntimeError: клиент уже открыт в другом event loop
+    """
+    global _client
+    loop = asyncio.get_running_loop()
+
+    with _client_lock:
+        if _client is not None:
+            pid, client_loop, client = _client
+            if pid == os.getpid() and not client.is_closed:
+                if client_loop is not loop:
+                    raise RuntimeError(
+                        'Shared YooKassa client is bound to another event loop, '
+                        'pass client= to AsyncYooKassaService'
+                    )
+                return client
+
+        client = httpx.AsyncClient(limits=POOL_LIMITS, timeout=REQUEST_TIMEOUT)
+        _client = (os.getpid(), loop, client)
+        return client
+
+
+async def aclose():
+    """Закрыть общий клиент процесса (при остановке приложения)"""
+    global _client
+    with _client_lock:
+        entry, _client = _client, None
+
+    if entry is not None and entry[0] == os.getpid():
+        await entry[2].aclose()
+
+
+@asynccontextmanager
+async def lifespan(app=None):
+    """Lifespan ASGI-приложения: при остановке закрывает общий клиент"""
+    try:
+        yield
+    finally:
+        await aclose()
+
+
+class AsyncYooKassaService:
+    """Асинхронный клиент API ЮКассы с тем же интерфейсом, что и YooKassaService"""
+
+    API_URL = YooKassaService.API_URL
+
+    def __init__(self, shop_id, secret_key, api_url=None, client=None):
+        """
+        Инициализация сервиса
+
+        Args:
+            shop_id: ID магазина в ЮКассе
+            secret_key: Секретный ключ
+            api_url: базовый URL API (по умолчанию API_URL)
+            client: httpx.AsyncClient (по умолчанию общий клиент процесса)
+        """
+        self.shop_id = shop_id
+        self.secret_key = secret_key
+        self.auth = (shop_id, secret_key)
+        self.api_url = api_url or self.API_URL
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client or get_client()
+
+    async def _request(self, method, path, on_success, **kwargs):
+        """Запрос к API: результат сервиса или {'success': False, 'error': ...}"""
+        # Клиент из чужого event loop — ошибка вызывающего кода, а не ответ API
+        client = self.client
+        try:
+            response = await client.request(
+                method,
+                f'{self.api_url}{path}',
+                auth=self.auth,
+                **kwargs
+            )
+            return YooKassaService._handle_response(response.status_code, response.json(), on_success)
+
+        except httpx.HTTPError as e:
+            return {
+                'success': False,
+                'error': f'Network error: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    async def _post(self, path, payload, on_success):
+        return await self._request(
+            'POST', path, on_success, json=payload, headers=YooKassaService._idempotence_headers()
+        )
+
+    async def _get(self, path, on_success):
+        return await self._request('GET', path, on_success)
+
+    async def create_payment(self, payment_data):
+        """
+        Создать платеж в ЮКассе
+
+        Args:
+            payment_data: см. YooKassaService.create_payment
+
+        Returns:
+            dict: см. YooKassaService.create_payment
+        """
+        try:
+            payment = YooKassaService._build_payment(payment_data)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+        return await self._post('/payments', payment, YooKassaService._payment_created)
+
+    async def check_payment_status(self, payment_id):
+        """
+        Проверить статус платежа
+
+        Returns:
+            dict: см. YooKassaService.check_payment_status
+        """
+        return await self._get(f'/payments/{payment_id}', YooKassaService._payment_status)
+
+    async def create_refund(self, payment_id, amount=None):
+        """
+        Создать возврат платежа
+
+        Returns:
+            dict: см. YooKassaService.create_refund
+        """
+        try:
+            refund_data = YooKassaService._build_refund(payment_id, amount)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+        return await self._post('/refunds', refund_data, YooKassaService._refund_created)
+
+    async def get_refund_status(self, refund_id):
+        """
+        Проверить статус возврата
+
+        Returns:
+            dict: см. YooKassaService.get_refund_status
+        """
+        return await self._get(f'/refunds/{refund_id}', YooKassaService._refund_status)
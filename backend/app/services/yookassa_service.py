@@ -1,7 +1,6 @@
 """
 Сервис для работы с ЮКасса API
 """
-import requests
 import uuid
 from datetime import datetime
 
@@ -11,17 +10,189 @@ class YooKassaService:
 
     API_URL = 'https://api.yookassa.ru/v3'
 
-    def __init__(self, shop_id, secret_key):
+    def __init__(self, shop_id, secret_key, api_url=None):
         """
         Инициализация сервиса
 
         Args:
             shop_id: ID магазина в ЮКассе
             secret_key: Секретный ключ
+            api_url: базовый URL API (по умолчанию API_URL)
         """
         self.shop_id = shop_id
         self.secret_key = secret_key
         self.auth = (shop_id, secret_key)
+        self.api_url = api_url or self.API_URL
+
+    # ------------------------------------------------------------------
+    # Формирование запросов и разбор ответов
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _idempotence_headers():
+        """Заголовки запроса с уникальным ключом идемпотентности"""
+        return {
+            'Idempotence-Key': str(uuid.uuid4()),
+            'Content-Type': 'application/json'
+        }
+
+    @staticmethod
+    def _build_payment(payment_data):
+        """Формирование тела запроса на создание платежа"""
+        payment = {
+            'amount': {
+                'value': f"{payment_data['amount']:.2f}",
+                'currency': 'RUB'
+            },
+            'confirmation': {
+                'type': 'redirect',
+                'return_url': payment_data['return_url']
+            },
+            'capture': True,
+            'description': f"Заказ {payment_data['order_number']}",
+            'metadata': {
+                'order_number': payment_data['order_number']
+            }
+        }
+
+        # Добавление метода оплаты, если указан
+        if payment_data.get('payment_method'):
+            payment['payment_method_data'] = {
+                'type': payment_data['payment_method']
+            }
+
+        # Добавление чека (54-ФЗ)
+        if payment_data.get('items'):
+            receipt = {
+                'customer': {
+                    'email': payment_data['customer_email']
+                },
+                'items': []
+            }
+
+            # Добавление телефона, если есть
+            if payment_data.get('customer_phone'):
+                receipt['customer']['phone'] = payment_data['customer_phone']
+
+            # Формирование товаров для чека
+            for item in payment_data['items']:
+                receipt['items'].append({
+                    'description': item['description'][:128],  # Максимум 128 символов
+                    'quantity': str(item['quantity']),
+                    'amount': {
+                        'value': f"{item['amount']:.2f}",
+                        'currency': 'RUB'
+                    },
+                    'vat_code': item.get('vat_code', 1),  # 1 = НДС 20%
+                    'payment_mode': 'full_payment',
+                    'payment_subject': 'commodity'
+                })
+
+            payment['receipt'] = receipt
+
+        return payment
+
+    @staticmethod
+    def _build_refund(payment_id, amount=None):
+        """Формирование тела запроса на возврат"""
+        refund_data = {
+            'payment_id': payment_id
+        }
+
+        # Если указана сумма, добавляем её
+        if amount is not None:
+            refund_data['amount'] = {
+                'value': f"{amount:.2f}",
+                'currency': 'RUB'
+            }
+
+        return refund_data
+
+    @staticmethod
+    def _payment_created(result):
+        return {
+            'success': True,
+            'payment_id': result['id'],
+            'confirmation_url': result['confirmation']['confirmation_url'],
+            'status': result['status']
+        }
+
+    @staticmethod
+    def _payment_status(result):
+        return {
+            'success': True,
+            'status': result['status'],
+            'paid': result['paid'],
+            'amount': float(result['amount']['value']),
+            'created_at': result['created_at']
+        }
+
+    @staticmethod
+    def _refund_created(result):
+        return {
+            'success': True,
+            'refund_id': result['id'],
+            'status': result['status'],
+            'amount': float(result['amount']['value'])
+        }
+
+    @staticmethod
+    def _refund_status(result):
+        return {
+            'success': True,
+            'status': result['status'],
+            'amount': float(result['amount']['value']),
+            'created_at': result['created_at']
+        }
+
+    @staticmethod
+    def _handle_response(status_code, body, on_success):
+        """
+        Преобразовать ответ API в результат сервиса
+
+        Args:
+            status_code: HTTP статус ответа
+            body: разобранный JSON ответа
+            on_success: функция, формирующая результат при статусе 200
+        """
+        if status_code == 200:
+            return on_success(body)
+        return {
+            'success': False,
+            'error': body.get('description', 'Unknown error')
+        }
+
+    def _request(self, method, path, on_success, **kwargs):
+        """Запрос к API: результат сервиса или {'success': False, 'error': ...}"""
+        # requests (~100 мс импорта) загружается при первом платеже, а не при старте воркера
+        import requests
+
+        try:
+            response = requests.request(
+                method,
+                f'{self.api_url}{path}',
+                auth=self.auth,
+                timeout=30,
+                **kwargs
+            )
+            return self._handle_response(response.status_code, response.json(), on_success)
+
+        except requests.exceptions.RequestException as e:
+            return {
+                'success': False,
+                'error': f'Network error: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def _post(self, path, payload, on_success):
+        return self._request('POST', path, on_success, json=payload, headers=self._idempotence_headers())
+
+    def _get(self, path, on_success):
+        return self._request('GET', path, on_success)
 
     def create_payment(self, payment_data):
         """
@@ -46,101 +217,15 @@ class YooKassaService:
             }
         """
         try:
-            # Генерация уникального ключа идемпотентности
-            idempotence_key = str(uuid.uuid4())
-
-            # Формирование данных платежа
-            payment = {
-                'amount': {
-                    'value': f"{payment_data['amount']:.2f}",
-                    'currency': 'RUB'
-                },
-                'confirmation': {
-                    'type': 'redirect',
-                    'return_url': payment_data['return_url']
-                },
-                'capture': True,
-                'description': f"Заказ {payment_data['order_number']}",
-                'metadata': {
-                    'order_number': payment_data['order_number']
-                }
-            }
-
-            # Добавление метода оплаты, если указан
-            if payment_data.get('payment_method'):
-                payment['payment_method_data'] = {
-                    'type': payment_data['payment_method']
-                }
-
-            # Добавление чека (54-ФЗ)
-            if payment_data.get('items'):
-                receipt = {
-                    'customer': {
-                        'email': payment_data['customer_email']
-                    },
-                    'items': []
-                }
-
-                # Добавление телефона, если есть
-                if payment_data.get('customer_phone'):
-                    receipt['customer']['phone'] = payment_data['customer_phone']
-
-                # Формирование товаров для чека
-                for item in payment_data['items']:
-                    receipt['items'].append({
-                        'description': item['description'][:128],  # Максимум 128 символов
-                        'quantity': str(item['quantity']),
-                        'amount': {
-                            'value': f"{item['amount']:.2f}",
-                            'currency': 'RUB'
-                        },
-                        'vat_code': item.get('vat_code', 1),  # 1 = НДС 20%
-                        'payment_mode': 'full_payment',
-                        'payment_subject': 'commodity'
-                    })
-
-                payment['receipt'] = receipt
-
-            # Отправка запроса
-            headers = {
-                'Idempotence-Key': idempotence_key,
-                'Content-Type': 'application/json'
-            }
-
-            response = requests.post(
-                f'{self.API_URL}/payments',
-                json=payment,
-                headers=headers,
-                auth=self.auth,
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    'success': True,
-                    'payment_id': result['id'],
-                    'confirmation_url': result['confirmation']['confirmation_url'],
-                    'status': result['status']
-                }
-            else:
-                error_data = response.json()
-                return {
-                    'success': False,
-                    'error': error_data.get('description', 'Unknown error')
-                }
-
-        except requests.exceptions.RequestException as e:
-            return {
-                'success': False,
-                'error': f'Network error: {str(e)}'
-            }
+            payment = self._build_payment(payment_data)
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e)
             }
 
+        return self._post('/payments', payment, self._payment_created)
+
     def check_payment_status(self, payment_id):
         """
         Проверить статус платежа
@@ -156,39 +241,7 @@ class YooKassaService:
                 'error': string (if failed)
             }
         """
-        try:
-            response = requests.get(
-                f'{self.API_URL}/payments/{payment_id}',
-                auth=self.auth,
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    'success': True,
-                    'status': result['status'],
-                    'paid': result['paid'],
-                    'amount': float(result['amount']['value']),
-                    'created_at': result['created_at']
-                }
-            else:
-                error_data = response.json()
-                return {
-                    'success': False,
-                    'error': error_data.get('description', 'Unknown error')
-                }
-
-        except requests.exceptions.RequestException as e:
-            return {
-                'success': False,
-                'error': f'Network error: {str(e)}'
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+        return self._get(f'/payments/{payment_id}', self._payment_status)
 
     def create_refund(self, payment_id, amount=None):
         """
@@ -207,61 +260,15 @@ class YooKassaService:
             }
         """
         try:
-            # Генерация уникального ключа идемпотентности
-            idempotence_key = str(uuid.uuid4())
-
-            # Формирование данных возврата
-            refund_data = {
-                'payment_id': payment_id
-            }
-
-            # Если указана сумма, добавляем её
-            if amount is not None:
-                refund_data['amount'] = {
-                    'value': f"{amount:.2f}",
-                    'currency': 'RUB'
-                }
-
-            # Отправка запроса
-            headers = {
-                'Idempotence-Key': idempotence_key,
-                'Content-Type': 'application/json'
-            }
-
-            response = requests.post(
-                f'{self.API_URL}/refunds',
-                json=refund_data,
-                headers=headers,
-                auth=self.auth,
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    'success': True,
-                    'refund_id': result['id'],
-                    'status': result['status'],
-                    'amount': float(result['amount']['value'])
-                }
-            else:
-                error_data = response.json()
-                return {
-                    'success': False,
-                    'error': error_data.get('description', 'Unknown error')
-                }
-
-        except requests.exceptions.RequestException as e:
-            return {
-                'success': False,
-                'error': f'Network error: {str(e)}'
-            }
+            refund_data = self._build_refund(payment_id, amount)
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e)
             }
 
+        return self._post('/refunds', refund_data, self._refund_created)
+
     def get_refund_status(self, refund_id):
         """
         Проверить статус возврата
@@ -277,35 +284,4 @@ class YooKassaService:
                 'error': string (if failed)
             }
         """
-        try:
-            response = requests.get(
-                f'{self.API_URL}/refunds/{refund_id}',
-                auth=self.auth,
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    'success': True,
-                    'status': result['status'],
-                    'amount': float(result['amount']['value']),
-                    'created_at': result['created_at']
-                }
-            else:
-                error_data = response.json()
-                return {
-                    'success': False,
-                    'error': error_data.get('description', 'Unknown error')
-                }
-
-        except requests.exceptions.RequestException as e:
-            return {
-                'success': False,
-                'error': f'Network error: {str(e)}'
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+        return self._get(f'/refunds/{refund_id}', self._refund_status)
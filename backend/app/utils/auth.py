@@ -0,0 +1,93 @@
+"""
+Авторизация по claims JWT
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, get_jwt, verify_jwt_in_request
+
+# Роли, которым доступна админка
+ADMIN_ROLES = ('admin', 'superadmin')
+
+
+def create_user_token(user):
+    """
+    Access token с ролью и версией токенов пользователя в claims
+
+    Роль проверяется admin_required без обращения к БД, версия —
+    при проверке отзыва (token_in_blocklist_loader). Имя нужно
+    /api/auth/verify, который отвечает только по claims.
+    """
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={'role': user.role, 'tv': user.token_version, 'username': user.username}
+    )
+
+
+def admin_required(*roles):
+    """
+    Декоратор: запрос с действительным JWT пользователя с одной из ролей
+
+    Args:
+        roles: допустимые роли (по умолчанию ADMIN_ROLES)
+
+    Пример:
+        @bp.route('', methods=['POST'])
+        @admin_required()
+        def create_product(): ...
+    """
+    allowed = roles or ADMIN_ROLES
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            if get_jwt().get('role') not in allowed:
+                return jsonify({'error': 'Admin access required'}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class CachedJWTManager(JWTManager):
+    """
+    JWTManager с LRU-кэшем проверенных токенов
+
+    Админка шлет один и тот же токен в каждом запросе, а проверка
+    подписи и разбор JSON выполняются заново каждый раз (трижды на
+    запрос). Результат успешной проверки кэшируется по строке токена
+    (JWT_DECODE_CACHE_SIZE записей, 0 — без кэша); срок действия (exp)
+    сверяется при каждом попадании, истекший токен проверяется заново и
+    получает обычную ошибку.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._decoded = OrderedDict()
+        self._decoded_lock = threading.Lock()
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        size = current_app.config.get('JWT_DECODE_CACHE_SIZE', 0)
+        if not size or csrf_value is not None:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        with self._decoded_lock:
+            payload = self._decoded.get(encoded_token)
+            if payload is not None:
+                self._decoded.move_to_end(encoded_token)
+
+        leeway = current_app.config['JWT_DECODE_LEEWAY']
+        if payload is not None and (allow_expired or 'exp' not in payload
+                                    or payload['exp'] + leeway > time.time()):
+            return payload
+
+        payload = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        with self._decoded_lock:
+            self._decoded[encoded_token] = payload
+            while len(self._decoded) > size:
+                self._decoded.popitem(last=False)
+        return payload
@@ -0,0 +1,255 @@
+"""
+Структурированные логи: JSON-строки, неблокирующая запись, request id
+
+Корневой логгер получает один обработчик — AsyncHandler: в потоке
+запроса запись только подставляет аргументы и кладется в ограниченную
+очередь, а форматирование и запись в stderr выполняет фоновый поток
+(QueueListener, свой в каждом воркере). Если очередь переполнена, записи
+отбрасываются (со счетчиком), а не тормозят запрос.
+
+Каждый HTTP-запрос получает request id (заголовок X-Request-ID клиента
+или прокси, иначе новый) — он попадает во все записи запроса и в ответ.
+
+Частые события (отказы JWT, строки импорта с ошибками, access log)
+пишутся через log_event() и сэмплируются по LOG_SAMPLING: отброшенное
+событие стоит одного random(). Уровни задаются LOG_LEVEL и по модулям
+LOG_LEVELS ("sqlalchemy.engine=INFO,app.services.images=WARNING").
+"""
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# Request id клиента принимается, только если он похож на идентификатор
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+
+# Стандартные атрибуты LogRecord; все остальные (extra=...) идут в JSON полями
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+# event -> доля записей, которые пишутся (из LOG_SAMPLING)
+_sampling = {}
+
+_handler = None
+
+access_logger = logging.getLogger('app.access')
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна JSON-строка: ts, level, logger, message и поля extra"""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Добавляет request id текущего HTTP-запроса (в потоке запроса)"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+        return True
+
+
+class AsyncHandler(QueueHandler):
+    """
+    Неблокирующий обработчик: запись уходит в очередь, пишет фоновый поток
+
+    Поток записи запускается при первой записи в процессе, поэтому после
+    fork (gunicorn --preload) каждый воркер заводит свою очередь и поток.
+    """
+
+    def __init__(self, target, maxsize):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.maxsize = maxsize
+        self.listener = None
+        self.pid = None
+        self.dropped = 0
+        self.start_lock = threading.Lock()
+
+    def ensure_listener(self):
+        if self.pid != os.getpid():
+            with self.start_lock:
+                if self.pid != os.getpid():
+                    # Очередь родителя могла остаться с захваченной блокировкой
+                    self.queue = queue.Queue(self.maxsize)
+                    self.dropped = 0
+                    self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+                    self.listener.start()
+                    self.pid = os.getpid()
+
+    def prepare(self, record):
+        # Аргументы подставляются сразу (объекты могут измениться), а
+        # форматирование (JSON, traceback) остается потоку записи. Запись
+        # не копируется: getMessage() после этого возвращает то же самое
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            try:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': 'Log queue full, dropped %d records' % dropped,
+                }))
+            except queue.Full:
+                self.dropped += dropped
+
+    def emit(self, record):
+        self.ensure_listener()
+        super().emit(record)
+
+    def close(self):
+        if self.listener is not None and self.pid == os.getpid():
+            try:
+                self.listener.stop()
+            except queue.Full:
+                pass
+            self.listener = None
+            self.pid = None
+        super().close()
+
+
+def parse_pairs(value, convert):
+    """"a=1,b=2" (или dict) -> {'a': convert('1'), 'b': convert('2')}"""
+    if isinstance(value, dict):
+        return {key: convert(item) for key, item in value.items()}
+    pairs = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            key, _, item_value = item.partition('=')
+            pairs[key.strip()] = convert(item_value.strip())
+    return pairs
+
+
+def parse_level(value):
+    return value if isinstance(value, int) else logging.getLevelName(value.upper())
+
+
+def configure(config):
+    """
+    Настроить логирование процесса (повторный вызов заменяет настройки)
+
+    Args:
+        config: конфигурация приложения (LOG_LEVEL, LOG_LEVELS, LOG_FORMAT,
+            LOG_SAMPLING, LOG_QUEUE_SIZE)
+    """
+    global _handler, _sampling
+
+    target = logging.StreamHandler(sys.stderr)
+    if config['LOG_FORMAT'] == 'json':
+        target.setFormatter(JsonFormatter())
+    else:
+        target.setFormatter(logging.Formatter(TEXT_FORMAT, defaults={'request_id': '-'}))
+
+    handler = AsyncHandler(target, config['LOG_QUEUE_SIZE'])
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+        _handler.close()
+    root.addHandler(handler)
+    root.setLevel(parse_level(config['LOG_LEVEL']))
+    for name, level in parse_pairs(config['LOG_LEVELS'], parse_level).items():
+        logging.getLogger(name).setLevel(level)
+
+    _handler = handler
+    _sampling = parse_pairs(config['LOG_SAMPLING'], float)
+
+
+def log_event(logger, level, event, msg, *args, **fields):
+    """
+    Записать частое событие с сэмплированием по LOG_SAMPLING
+
+    Записанное событие получает поля event и sample_rate (если < 1), чтобы
+    при подсчете умножить число записей на 1 / sample_rate.
+
+    Пример:
+        log_event(logger, logging.INFO, 'jwt.rejected', 'Token expired', reason='expired')
+    """
+    rate = _sampling.get(event, 1.0)
+    if rate < 1.0:
+        if random.random() >= rate:
+            return
+        fields['sample_rate'] = rate
+    if logger.isEnabledFor(level):
+        fields['event'] = event
+        logger.log(level, msg, *args, extra=fields)
+
+
+def valid_request_id(value):
+    """Похоже ли значение на request id (безопасно для заголовков и имен файлов)"""
+    return bool(_REQUEST_ID_RE.match(value or ''))
+
+
+def request_id():
+    """Request id текущего HTTP-запроса (None вне запроса)"""
+    return g.get('request_id') if has_request_context() else None
+
+
+def init_app(app):
+    """Логирование приложения, request id и access log"""
+    configure(app.config)
+
+    # Записи app.logger идут через корневой обработчик, а не в stderr Flask
+    from flask.logging import default_handler
+    app.logger.removeHandler(default_handler)
+
+    @app.before_request
+    def assign_request_id():
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = incoming if valid_request_id(incoming) else uuid.uuid4().hex
+        g.log_request_started = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        rid = g.get('request_id')
+        if rid is None:
+            return response
+        response.headers[REQUEST_ID_HEADER] = rid
+
+        duration_ms = round((time.perf_counter() - g.log_request_started) * 1000, 1)
+        if response.status_code >= 500:
+            access_logger.error('%s %s %s', request.method, request.path, response.status_code,
+                                extra={'event': 'http.access', 'status': response.status_code,
+                                       'duration_ms': duration_ms})
+        else:
+            log_event(access_logger, logging.INFO, 'http.access', '%s %s %s',
+                      request.method, request.path, response.status_code,
+                      status=response.status_code, duration_ms=duration_ms)
+        return response
@@ -0,0 +1,174 @@
+"""
+Учет SQL-запросов: число и время на запрос к API, медленные запросы, бюджет
+
+События Engine считают каждый запрос к БД в активные счетчики потока:
+счетчик текущего HTTP-запроса (создается в before_request) и счетчики
+count_queries(). По завершении HTTP-запроса число запросов и время в БД
+добавляются в заголовок Server-Timing:
+
+    Server-Timing: db;dur=3.2;desc="4 queries", app;dur=11.7
+
+Запросы дольше SLOW_QUERY_THRESHOLD секунд пишутся в лог с параметрами
+и эндпоинтом. query_budget(n) ограничивает число запросов роута: при
+превышении — предупреждение в лог, а с QUERY_BUDGET_RAISE (TestingConfig)
+— исключение QueryBudgetExceeded, чтобы тест упал.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Сколько символов параметров запроса писать в лог медленных запросов
+SLOW_QUERY_PARAMS_LIMIT = 500
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+# Порог медленного запроса (секунды), задается init_app; None — не логировать
+_slow_threshold = None
+
+
+class QueryBudgetExceeded(Exception):
+    """Роут выполнил больше запросов к БД, чем разрешено query_budget"""
+
+
+class QueryCounter:
+    """Число и суммарное время запросов к БД"""
+
+    __slots__ = ('count', 'duration', 'statements')
+
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = [] if keep_statements else None
+
+    def add(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+def _counters():
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = []
+    return counters
+
+
+@contextmanager
+def count_queries(keep_statements=False):
+    """
+    Считать запросы к БД в этом потоке внутри блока
+
+    Пример (тестовый клиент выполняет запрос в том же потоке):
+        with count_queries() as counter:
+            client.get('/api/products')
+        assert counter.count <= 3
+    """
+    counter = QueryCounter(keep_statements)
+    counters = _counters()
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+# Время старта хранится в контексте выполнения запроса: если запрос упал,
+# after_cursor_execute не вызывается, и метка уходит вместе с контекстом,
+# не оставаясь в соединении из пула
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_start', None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+
+    for counter in _counters():
+        counter.add(statement, duration)
+
+    if _slow_threshold is not None and duration >= _slow_threshold:
+        _log_slow_query(statement, parameters, duration)
+
+
+def _log_slow_query(statement, parameters, duration):
+    endpoint = request.endpoint if has_request_context() else None
+    params = repr(parameters)
+    if len(params) > SLOW_QUERY_PARAMS_LIMIT:
+        params = params[:SLOW_QUERY_PARAMS_LIMIT] + '...'
+    logger.warning(
+        'Slow query %.1f ms [%s]: %s; params=%s',
+        duration * 1000, endpoint or 'no request', ' '.join(statement.split()), params
+    )
+
+
+def query_budget(max_queries):
+    """
+    Декоратор роута: не больше max_queries запросов к БД
+
+    Пример:
+        @bp.route('', methods=['GET'])
+        @query_budget(8)
+        def get_bootstrap(): ...
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with count_queries(keep_statements=True) as counter:
+                response = fn(*args, **kwargs)
+
+            if counter.count > max_queries:
+                message = (f'{request.endpoint} executed {counter.count} queries '
+                           f'(budget {max_queries}): ' + ' | '.join(counter.statements))
+                if current_app.config['QUERY_BUDGET_RAISE']:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+        return wrapper
+
+    return decorator
+
+
+def init_app(app):
+    """Счетчик запросов к БД на каждый HTTP-запрос и заголовок Server-Timing"""
+    global _slow_threshold
+    _slow_threshold = app.config['SLOW_QUERY_THRESHOLD'] or None
+
+    if not app.config['QUERY_STATS_ENABLED']:
+        return
+
+    @app.before_request
+    def start_query_stats():
+        g.request_started = time.perf_counter()
+        g.query_counter = QueryCounter()
+        _counters().append(g.query_counter)
+
+    @app.after_request
+    def add_server_timing(response):
+        counter = g.get('query_counter')
+        if counter is not None:
+            elapsed = (time.perf_counter() - g.request_started) * 1000
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={counter.duration * 1000:.1f};desc="{counter.count} queries", app;dur={elapsed:.1f}'
+            )
+        return response
+
+    @app.teardown_request
+    def finish_query_stats(exc):
+        counter = g.pop('query_counter', None)
+        if counter is not None and counter in _counters():
+            _counters().remove(counter)
@@ -0,0 +1,254 @@
+"""
+Хранилище счетчиков rate limit в SQLite, общее для воркеров gunicorn
+
+Flask-Limiter по умолчанию держит счетчики в памяти процесса: при
+4 воркерах каждый считает свое, и фактический лимит в 4 раза больше
+заданного. Это хранилище кладет счетчики в файл SQLite (WAL), который
+видят все воркеры на машине, и не требует внешних сервисов. Для
+нескольких машин — redis:// (поддерживается limits при установленном
+пакете redis).
+
+    RATELIMIT_STORAGE_URI=sqlite:////var/lib/airshop/ratelimit.db
+
+Обновления счетчиков копятся в памяти процесса и записываются одной
+транзакцией не чаще раза в flush_interval секунд; прочитанный счетчик
+(с попаданиями других воркеров) перечитывается, когда он старше
+flush_interval. Поэтому лимит может быть превышен не больше чем на
+число запросов, принятых остальными воркерами за flush_interval.
+flush_interval=0 — запись и чтение на каждый запрос (точный подсчет).
+
+Поддерживаются стратегии fixed-window и sliding-window-counter.
+"""
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+# Как часто удалять истекшие счетчики (секунды)
+PURGE_INTERVAL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+UPSERT = """
+INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END,
+    expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END
+RETURNING count, expires_at
+"""
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Счетчики limits в файле SQLite с пакетной записью
+
+    URI как у SQLAlchemy: sqlite:///относительный/путь.db или
+    sqlite:////абсолютный/путь.db. Опция flush_interval (секунды)
+    передается через RATELIMIT_STORAGE_OPTIONS.
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, flush_interval=0.0, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri.split('://', 1)[1][1:]
+        self.flush_interval = float(flush_interval)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._connection = None
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self):
+        """
+        Соединение процесса
+
+        Хранилище создается в мастере gunicorn (--preload), поэтому после
+        fork соединение и несброшенные счетчики открываются заново.
+        """
+        if self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+            # key -> [приращение, expires_at для нового счетчика]
+            self._pending = {}
+            # key -> (count, expires_at, время чтения) по данным из файла
+            self._known = {}
+            self._flushed_at = 0.0
+            self._purged_at = time.time()
+        return self._connection
+
+    def _flush(self, force=False):
+        """Записать накопленные приращения одной транзакцией (не чаще flush_interval)"""
+        connection = self._connect()
+        now_monotonic = time.monotonic()
+        if not self._pending or (not force and now_monotonic - self._flushed_at < self.flush_interval):
+            return
+
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for key, (amount, expires_at) in self._pending.items():
+                count, expires_at = connection.execute(
+                    UPSERT, (key, amount, expires_at, now, now)
+                ).fetchone()
+                self._known[key] = (count, expires_at, now_monotonic)
+
+            if now - self._purged_at >= PURGE_INTERVAL:
+                connection.execute('DELETE FROM rate_limits WHERE expires_at <= ?', (now,))
+                self._known = {key: value for key, value in self._known.items() if value[1] > now}
+                self._purged_at = now
+
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+        self._pending.clear()
+        self._flushed_at = now_monotonic
+
+    def _load(self, key):
+        """Перечитать счетчик, если он старше flush_interval (там и чужие попадания)"""
+        now_monotonic = time.monotonic()
+        known = self._known.get(key)
+        if known is None or now_monotonic - known[2] >= self.flush_interval:
+            row = self._connect().execute(
+                'SELECT count, expires_at FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            count, expires_at = row or (0, 0.0)
+            self._known[key] = (count, expires_at, now_monotonic)
+
+    def _count(self, key, now):
+        count, expires_at, _ = self._known.get(key, (0, 0.0, 0.0))
+        if expires_at <= now:
+            count = 0
+        pending = self._pending.get(key)
+        return count + (pending[0] if pending else 0)
+
+    def _add(self, key, amount, expiry, now):
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = [amount, now + expiry]
+        else:
+            pending[0] += amount
+
+    def incr(self, key, expiry, amount=1):
+        with self._lock:
+            self._connect()
+            now = time.time()
+            self._load(key)
+            self._add(key, amount, expiry, now)
+            self._flush()
+            return self._count(key, now)
+
+    def get(self, key):
+        with self._lock:
+            self._connect()
+            self._load(key)
+            return self._count(key, time.time())
+
+    def get_expiry(self, key):
+        with self._lock:
+            self._connect()
+            self._load(key)
+            now = time.time()
+            expires_at = self._known[key][1]
+            if expires_at > now:
+                return expires_at
+            pending = self._pending.get(key)
+            return pending[1] if pending else now
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+
+        with self._lock:
+            self._connect()
+            now = time.time()
+            previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+            self._load(previous_key)
+            self._load(current_key)
+
+            previous_count, previous_ttl, current_count, _ = self._window(
+                previous_key, current_key, expiry, now
+            )
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+
+            # Счетчик окна живет два окна: в следующем он станет предыдущим
+            self._add(current_key, amount, 2 * expiry, now)
+            if self.flush_interval:
+                self._flush()
+                return True
+
+            # Без пакетной записи проверяем еще раз после записи: другой
+            # воркер мог занять последнее место одновременно с нами
+            self._flush(force=True)
+            current_count = self._count(current_key, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) > limit:
+                self._add(current_key, -amount, 2 * expiry, now)
+                self._flush(force=True)
+                return False
+            return True
+
+    def _window(self, previous_key, current_key, expiry, now):
+        previous_count = self._count(previous_key, now)
+        current_count = self._count(current_key, now)
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key, expiry):
+        with self._lock:
+            self._connect()
+            now = time.time()
+            previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+            self._load(previous_key)
+            self._load(current_key)
+            return self._window(previous_key, current_key, expiry, now)
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+    def clear(self, key):
+        with self._lock:
+            connection = self._connect()
+            self._pending.pop(key, None)
+            self._known.pop(key, None)
+            connection.execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+    def reset(self):
+        with self._lock:
+            connection = self._connect()
+            self._pending.clear()
+            self._known.clear()
+            return connection.execute('DELETE FROM rate_limits').rowcount
+
+    def check(self):
+        try:
+            with self._lock:
+                self._connect().execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
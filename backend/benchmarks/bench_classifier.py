@@ -0,0 +1,85 @@
+"""
+Бенчмарк определения категории товара
+
+Сравнивает скомпилированный классификатор (app.services.category_classifier)
+с прежними реализациями: перебор CATEGORY_MAP с проверкой подстроки
+и списки ключевых слов parse_category.
+
+    python -m benchmarks.bench_classifier --names 100000
+"""
+import argparse
+import json
+import random
+
+from benchmarks.common import BRANDS, MODELS, SUFFIXES, Timer
+
+
+def legacy_classifiers():
+    """Прежние get_category (перебор словаря) и parse_category (ключевые слова)"""
+    from app.services.category_classifier import DEFAULT_RULES_PATH
+
+    with open(DEFAULT_RULES_PATH, encoding='utf-8') as f:
+        categories = json.load(f)['categories']
+    category_map = {
+        phrase: category
+        for category, phrases in categories.items()
+        for phrase in phrases
+    }
+
+    def get_category(name):
+        full_name = name.lower()
+        for key, category in category_map.items():
+            if key in full_name:
+                return category
+        return 'unisex'
+
+    def parse_category(name):
+        name_lower = name.lower()
+        if any(word in name_lower for word in ['men', 'homme', 'мужск']):
+            return 'men'
+        elif any(word in name_lower for word in ['women', 'femme', 'женск', 'miss', 'lady']):
+            return 'women'
+        return 'unisex'
+
+    return get_category, parse_category
+
+
+def synthetic_names(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        f'{rng.choice(BRANDS)} {rng.choice(MODELS)} {rng.choice(SUFFIXES)} 100мл'
+        for _ in range(count)
+    ]
+
+
+def run(count):
+    from app.services.category_classifier import CategoryClassifier, classify
+
+    with Timer() as t:
+        CategoryClassifier.from_file()
+    print(f'build classifier: {t.elapsed * 1000:.2f}ms')
+
+    names = synthetic_names(count)
+    get_category, parse_category = legacy_classifiers()
+
+    for label, func in (
+        ('classifier', classify),
+        ('legacy map scan', get_category),
+        ('legacy keywords', parse_category),
+    ):
+        with Timer() as t:
+            for name in names:
+                func(name)
+        print(f'{label:>16}: {count} names in {t.elapsed:6.3f}s '
+              f'({t.elapsed / count * 1e6:6.2f}us/name)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--names', type=int, default=100_000)
+    args = parser.parse_args()
+    run(args.names)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Бенчмарк импорта каталога из CSV
+
+Сравнивает общий движок app.services.catalog_import (executemany пачками,
+дедупликация по предзагруженному множеству) с прежней схемой
+«session.add + filter_by(name).first() на каждую строку».
+
+    python -m benchmarks.bench_import --rows 100000 --legacy-rows 5000
+"""
+import argparse
+import csv
+import os
+import re
+
+from benchmarks.common import Timer, make_app, write_synthetic_csv
+
+
+def legacy_import(csv_path):
+    """Прежний построчный импорт (как в run.py до общего движка)"""
+    from app import db
+    from app.models import Product
+    from app.services.catalog_import import parse_category
+
+    imported = 0
+    with open(csv_path, 'r', encoding='utf-8-sig') as file:
+        for row in csv.DictReader(file, delimiter=';'):
+            name = row.get('Название', '').strip()
+            if not name or Product.query.filter_by(name=name).first():
+                continue
+            price_clean = re.sub(r'[^\d]', '', row.get('Цена', '0'))
+            price = float(price_clean) if price_clean else 0.0
+            discount_str = row.get('Скидка (в процентах)', '0').strip()
+            discount = int(discount_str) if discount_str.isdigit() else 0
+            volume_match = re.search(r'(\d+)\s*мл', name)
+            db.session.add(Product(
+                name=name,
+                brand=name.split()[0],
+                price=price,
+                old_price=price / (1 - discount / 100) if discount else None,
+                discount=discount,
+                volume=volume_match.group(1) + 'мл' if volume_match else '100мл',
+                category=parse_category(name),
+                description=row.get('Описание', '').strip(),
+                image=row.get('Изображения (через ;)', '').strip(),
+            ))
+            imported += 1
+    db.session.commit()
+    return imported
+
+
+def run(rows, legacy_rows):
+    from app import db
+    from app.models import Product
+    from app.services import catalog_import
+
+    app = make_app()
+    results = {}
+
+    with app.app_context():
+        path = write_synthetic_csv(rows)
+        try:
+            with Timer() as t:
+                result = catalog_import.import_file(path)
+                db.session.commit()
+            results['bulk'] = (result['imported'], t.elapsed)
+        finally:
+            os.remove(path)
+
+        if legacy_rows:
+            Product.query.delete()
+            db.session.commit()
+            path = write_synthetic_csv(legacy_rows)
+            try:
+                with Timer() as t:
+                    imported = legacy_import(path)
+                results['legacy'] = (imported, t.elapsed)
+            finally:
+                os.remove(path)
+
+    for name, (imported, elapsed) in results.items():
+        print(f'{name:>7}: {imported:>7} rows in {elapsed:7.2f}s '
+              f'({imported / elapsed:10.0f} rows/s)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--legacy-rows', type=int, default=5_000,
+                        help='строк для построчного импорта (0 — пропустить)')
+    args = parser.parse_args()
+    run(args.rows, args.legacy_rows)
+
+
+if __name__ == '__main__':
+    main()
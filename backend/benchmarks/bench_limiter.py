@@ -0,0 +1,129 @@
+"""
+Бенчмарк rate limit: накладные расходы на запрос и точность между воркерами
+
+1. Время запроса к пустому роуту через тестовый клиент: лимитер
+   выключен, memory://, SQLite с записью на каждый запрос и SQLite с
+   пакетной записью (flush_interval).
+2. Несколько процессов (как воркеры gunicorn) одновременно расходуют
+   один лимит: сколько запросов пропущено всего. С memory:// каждый
+   процесс считает свое, с общим хранилищем — около limit. Попытки идут
+   подряд без пауз (худший случай): при пакетной записи воркеры почти не
+   видят друг друга, пока не пройдет flush_interval.
+
+    python -m benchmarks.bench_limiter --requests 5000 --processes 4 --limit 200
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+from benchmarks.common import Timer
+
+STRATEGY = 'sliding-window-counter'
+
+
+def storage_variants(db_path, flush_interval):
+    return [
+        ('memory', 'memory://', {}),
+        ('sqlite flush=0', f'sqlite:///{db_path}', {'flush_interval': 0}),
+        (f'sqlite flush={flush_interval}', f'sqlite:///{db_path}', {'flush_interval': flush_interval}),
+    ]
+
+
+def remove_db(uri):
+    if uri.startswith('sqlite:///'):
+        path = uri[len('sqlite:///'):]
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def make_limited_app(storage_uri, options, enabled=True):
+    from config import TestingConfig, config
+    from app import create_app, limiter
+
+    class LimiterConfig(TestingConfig):
+        RATELIMIT_STORAGE_URI = storage_uri
+        RATELIMIT_STORAGE_OPTIONS = options
+        RATELIMIT_STRATEGY = STRATEGY
+        RATELIMIT_ENABLED = enabled
+
+    config['benchmark-limiter'] = LimiterConfig
+    app = create_app('benchmark-limiter')
+
+    @app.route('/bench-ping')
+    @limiter.limit('1000000 per hour;100000 per minute')
+    def bench_ping():
+        return {'ok': True}
+
+    return app
+
+
+def time_requests(app, count):
+    client = app.test_client()
+    for _ in range(100):
+        client.get('/bench-ping')
+    with Timer() as t:
+        for _ in range(count):
+            response = client.get('/bench-ping')
+    assert response.status_code == 200, response.status_code
+    return t.elapsed / count
+
+
+def consume(storage_uri, options, limit, attempts, start):
+    """Процесс-воркер: attempts попыток занять место в общем лимите"""
+    from limits import parse
+    from limits.storage import storage_from_string
+    from limits.strategies import STRATEGIES
+
+    from app.utils import rate_limit_storage  # noqa: F401
+
+    limiter = STRATEGIES[STRATEGY](storage_from_string(storage_uri, **options))
+    item = parse(f'{limit} per hour')
+    start.wait()
+    return sum(limiter.hit(item, 'bench', 'client') for _ in range(attempts))
+
+
+def shared_accuracy(storage_uri, options, processes, limit):
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Manager() as manager:
+        start = manager.Event()
+        with ctx.Pool(processes) as pool:
+            results = [pool.apply_async(consume, (storage_uri, options, limit, limit * 2, start))
+                       for _ in range(processes)]
+            start.set()
+            return sum(result.get() for result in results)
+
+
+def run(requests_count, processes, limit, flush_interval):
+    print(f'cores: {os.cpu_count()}, strategy: {STRATEGY}')
+
+    app = make_limited_app('memory://', {}, enabled=False)
+    baseline = time_requests(app, requests_count)
+    print(f'{"limiter off":<20}: {baseline * 1e6:7.0f} us/request')
+
+    for label, uri, options in storage_variants(tempfile.mktemp(suffix='.db'), flush_interval):
+        per_request = time_requests(make_limited_app(uri, options), requests_count)
+        print(f'{label:<20}: {per_request * 1e6:7.0f} us/request '
+              f'(+{(per_request - baseline) * 1e6:.0f} us limiter)')
+        remove_db(uri)
+
+    print(f'\n{processes} processes x {limit * 2} attempts, limit {limit}:')
+    for label, uri, options in storage_variants(tempfile.mktemp(suffix='.db'), flush_interval):
+        allowed = shared_accuracy(uri, options, processes, limit)
+        print(f'{label:<20}: {allowed:>6} allowed')
+        remove_db(uri)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument('--flush-interval', type=float, default=0.05)
+    args = parser.parse_args()
+    run(args.requests, args.processes, args.limit, args.flush_interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Бенчмарк стоимости записи в лог для потока запроса
+
+Время logger.info() с JSON-форматом: синхронный StreamHandler (как print
+в stdout под gunicorn) против AsyncHandler (очередь + фоновый поток), а
+также стоимость отброшенного сэмплированием log_event(). Запись идет в
+файл, с --write-delay-us каждая запись еще и ждет (медленный читатель
+pipe stdout/stderr — journald, docker logs).
+
+    python -m benchmarks.bench_logging --records 50000 --write-delay-us 50
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.common import Timer
+
+ROUNDS = 3
+
+
+class SlowStream:
+    """Файл, запись в который ждет delay секунд (как заполненный pipe)"""
+
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def time_records(logger, count):
+    with Timer() as t:
+        for i in range(count):
+            logger.info('Order %s marked as paid', i, extra={'order_id': i, 'status': 'paid'})
+    return t.elapsed / count
+
+
+def run(records, write_delay):
+    from app.utils import logs
+
+    fd, path = tempfile.mkstemp(prefix='airshop-bench-log-')
+    os.close(fd)
+    file = open(path, 'w')
+    stream = SlowStream(file, write_delay)
+    try:
+        sync_handler = logging.StreamHandler(stream)
+        sync_handler.setFormatter(logs.JsonFormatter())
+        target = logging.StreamHandler(stream)
+        target.setFormatter(logs.JsonFormatter())
+        async_handler = logs.AsyncHandler(target, maxsize=records * 2)
+
+        results = {}
+        for name, handler in (('sync', sync_handler), ('async', async_handler)):
+            logger = logging.getLogger(f'bench.{name}')
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(handler)
+            best = float('inf')
+            for _ in range(ROUNDS):
+                best = min(best, time_records(logger, records))
+                if handler is async_handler:
+                    # Дать потоку записи разобрать очередь перед следующим прогоном
+                    async_handler.listener.stop()
+                    async_handler.pid = None
+            results[name] = best
+
+        print(f'write delay {write_delay * 1e6:.0f} us')
+        print(f'{"sync":<16}: {results["sync"] * 1e6:6.2f} us/record')
+        print(f'{"async":<16}: {results["async"] * 1e6:6.2f} us/record '
+              f'({results["sync"] / results["async"]:.1f}x on the request path)')
+
+        logs._sampling = {'bench.event': 0.01}
+        logger = logging.getLogger('bench.async')
+        with Timer() as t:
+            for i in range(records):
+                logs.log_event(logger, logging.INFO, 'bench.event', 'Token expired', reason='expired')
+        print(f'{"sampled (1%)":<16}: {t.elapsed / records * 1e6:6.2f} us/event')
+        async_handler.close()
+    finally:
+        file.close()
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--write-delay-us', type=float, default=0)
+    args = parser.parse_args()
+    run(args.records, args.write_delay_us / 1e6)
+
+
+if __name__ == '__main__':
+    main()
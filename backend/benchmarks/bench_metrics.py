@@ -0,0 +1,101 @@
+"""
+Бенчмарк накладных расходов метрик запросов
+
+Время запроса к пустому роуту через тестовый клиент без метрик и с
+метриками (лучшее из нескольких чередующихся прогонов), а также время сборки /metrics по снимкам нескольких
+воркеров с заданным числом эндпоинтов.
+
+    python -m benchmarks.bench_metrics --requests 20000 --endpoints 50 --workers 4
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+
+from benchmarks.common import Timer
+
+ROUNDS = 3
+
+
+def make_metrics_app(enabled, metrics_dir):
+    from config import TestingConfig, config
+    from app import create_app, limiter
+
+    class MetricsConfig(TestingConfig):
+        METRICS_ENABLED = enabled
+        METRICS_DIR = metrics_dir
+
+    config['benchmark-metrics'] = MetricsConfig
+    app = create_app('benchmark-metrics')
+    limiter.enabled = False
+
+    @app.route('/bench-ping')
+    def bench_ping():
+        return {'ok': True}
+
+    return app
+
+
+def time_requests(app, count):
+    client = app.test_client()
+    for _ in range(200):
+        client.get('/bench-ping')
+    with Timer() as t:
+        for _ in range(count):
+            client.get('/bench-ping')
+    return t.elapsed / count
+
+
+def fake_worker_snapshots(metrics_dir, workers, endpoints):
+    """Снимки воркеров (живой pid — текущий процесс) с endpoints эндпоинтами"""
+    from app.services.metrics import Registry
+
+    rng = random.Random(42)
+    for worker in range(workers):
+        registry = Registry()
+        registry.directory = metrics_dir
+        registry.pid = os.getpid() if worker == 0 else 10_000_000 + worker
+        for i in range(endpoints):
+            for status in (200, 404, 500):
+                for _ in range(5):
+                    registry.observe(f'bp.endpoint_{i}', 'GET', status, rng.expovariate(20), rng.randrange(5000))
+        registry.flush()
+
+
+def run(requests_count, endpoints, workers):
+    metrics_dir = tempfile.mkdtemp(prefix='airshop-bench-metrics-')
+    try:
+        plain_app = make_metrics_app(False, metrics_dir)
+        app = make_metrics_app(True, metrics_dir)
+        baseline = per_request = float('inf')
+        for _ in range(ROUNDS):
+            baseline = min(baseline, time_requests(plain_app, requests_count))
+            per_request = min(per_request, time_requests(app, requests_count))
+        print(f'{"metrics off":<12}: {baseline * 1e6:7.1f} us/request')
+        print(f'{"metrics on":<12}: {per_request * 1e6:7.1f} us/request '
+              f'(+{(per_request - baseline) * 1e6:.1f} us, {(per_request / baseline - 1) * 100:+.1f}%)')
+
+        from app.services import metrics
+        fake_worker_snapshots(metrics_dir, workers, endpoints)
+        with app.app_context():
+            with Timer() as t:
+                for _ in range(20):
+                    body = metrics.render(metrics.collect())
+        print(f'/metrics ({workers} workers, {endpoints} endpoints): '
+              f'{t.elapsed / 20 * 1000:.1f} ms, {len(body) // 1024} KiB')
+    finally:
+        shutil.rmtree(metrics_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--endpoints', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    run(args.requests, args.endpoints, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Бенчмарк разбора строк фида: один процесс против пула процессов
+
+Измеряет только этап разбора/проверки (parse_rows и parse_rows_parallel
+с разным числом процессов), без записи в БД, и полный импорт в файловую
+SQLite с лучшим числом процессов. На машине с одним ядром ускорения
+не будет — смотрите на строку cores в выводе.
+
+    python -m benchmarks.bench_parse --rows 300000 --workers 1 2 4 8
+"""
+import argparse
+import csv
+import os
+import tempfile
+
+from benchmarks.common import Timer, make_file_app, write_synthetic_csv
+
+
+def parse_all(path, workers):
+    from app.services import catalog_import
+
+    with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+        reader = csv.DictReader(file, delimiter=catalog_import.CSV_DELIMITER)
+        ok = 0
+        for status, _, _ in catalog_import.iter_parsed(reader, workers):
+            ok += status == 'ok'
+    return ok
+
+
+def import_all(path, workers):
+    from app import db
+    from app.services import catalog_import
+
+    db_path = tempfile.mktemp(suffix='.db')
+    app = make_file_app(db_path)
+    try:
+        with app.app_context():
+            with Timer() as t:
+                result = catalog_import.import_file(path, workers=workers)
+                db.session.commit()
+            db.session.remove()
+            db.engine.dispose()
+        return result['imported'], t.elapsed
+    finally:
+        os.remove(db_path)
+
+
+def run(rows, workers_list):
+    print(f'cores: {os.cpu_count()}, rows: {rows}')
+    path = write_synthetic_csv(rows)
+    try:
+        baseline = None
+        timings = {}
+        for workers in workers_list:
+            with Timer() as t:
+                parsed = parse_all(path, workers)
+            timings[workers] = t.elapsed
+            baseline = baseline or t.elapsed
+            print(f'parse  workers={workers:<2}: {parsed:>7} rows in {t.elapsed:6.2f}s '
+                  f'({parsed / t.elapsed:9.0f} rows/s, x{baseline / t.elapsed:.2f})')
+
+        best = min(timings, key=timings.get)
+        for workers in sorted({1, best}):
+            imported, elapsed = import_all(path, workers)
+            print(f'import workers={workers:<2}: {imported:>7} rows in {elapsed:6.2f}s '
+                  f'({imported / elapsed:9.0f} rows/s)')
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=300_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='число процессов разбора (1 — в текущем процессе)')
+    args = parser.parse_args()
+    run(args.rows, args.workers)
+
+
+if __name__ == '__main__':
+    main()
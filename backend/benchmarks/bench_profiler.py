@@ -0,0 +1,85 @@
+"""
+Бенчмарк накладных расходов профилировщика
+
+Время запроса к роуту с фиксированной нагрузкой на CPU (~2 мс) без профилировщика и
+с профилированием доли запросов (лучшее из нескольких прогонов).
+
+    python -m benchmarks.bench_profiler --requests 500 --interval 0.005
+"""
+import argparse
+import shutil
+import tempfile
+
+from benchmarks.common import Timer
+
+ROUNDS = 3
+SAMPLE_RATES = (0.0, 0.1, 1.0)
+
+# Фиксированная работа роута (~2 мс)
+WORK_ITERATIONS = 10000
+
+
+def make_profiler_app(enabled, sample_rate, interval, profile_dir):
+    from config import TestingConfig, config
+    from app import create_app, limiter
+
+    class ProfilerConfig(TestingConfig):
+        PROFILER_ENABLED = enabled
+        PROFILER_SAMPLE_RATE = sample_rate
+        PROFILER_INTERVAL = interval
+        PROFILER_DIR = profile_dir
+
+    config['benchmark-profiler'] = ProfilerConfig
+    app = create_app('benchmark-profiler')
+    limiter.enabled = False
+
+    @app.route('/bench-work')
+    def bench_work():
+        total = 0
+        for i in range(WORK_ITERATIONS):
+            total += len(str(i))
+        return {'total': total}
+
+    return app
+
+
+def time_requests(app, count):
+    client = app.test_client()
+    for _ in range(20):
+        client.get('/bench-work')
+    with Timer() as t:
+        for _ in range(count):
+            client.get('/bench-work')
+    return t.elapsed / count
+
+
+def run(requests_count, interval):
+    profile_dir = tempfile.mkdtemp(prefix='airshop-bench-profiles-')
+    try:
+        baseline = float('inf')
+        plain_app = make_profiler_app(False, 0.0, interval, profile_dir)
+        for _ in range(ROUNDS):
+            baseline = min(baseline, time_requests(plain_app, requests_count))
+        print(f'{"profiler off":<18}: {baseline * 1000:6.3f} ms/request')
+
+        for rate in SAMPLE_RATES:
+            app = make_profiler_app(True, rate, interval, profile_dir)
+            per_request = float('inf')
+            for _ in range(ROUNDS):
+                per_request = min(per_request, time_requests(app, requests_count))
+            print(f'{f"sample rate {rate:g}":<18}: {per_request * 1000:6.3f} ms/request '
+                  f'({(per_request / baseline - 1) * 100:+.1f}%)')
+    finally:
+        shutil.rmtree(profile_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--interval', type=float, default=0.005)
+    args = parser.parse_args()
+    run(args.requests, args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Бенчмарк холодного старта приложения
+
+Каждый прогон — новый процесс Python (как воркер gunicorn или CLI-скрипт):
+импорт пакета app и создание приложения через run.py в production-конфигурации
+на файловой SQLite, подготовленной заранее `flask init-db`. Выводятся
+медиана и минимум по прогонам, в миллисекундах.
+
+    python -m benchmarks.bench_startup --runs 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import BACKEND_DIR, Timer
+
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+import run
+t2 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1}))
+"""
+
+
+def child_env(db_path):
+    env = dict(os.environ)
+    env.update({
+        'FLASK_ENV': 'production',
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'RATELIMIT_STORAGE_URI': 'memory://',
+        'LOG_LEVEL': 'WARNING',
+    })
+    return env
+
+
+def init_database(env):
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'run', 'init-db'],
+                   cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def start_once(env):
+    with Timer() as t:
+        out = subprocess.run([sys.executable, '-c', CHILD], cwd=BACKEND_DIR, env=env,
+                             check=True, capture_output=True, text=True).stdout
+    timings = json.loads(out.strip().splitlines()[-1])
+    timings['process'] = t.elapsed
+    return timings
+
+
+def run(runs):
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix='airshop-bench-startup-')
+    os.close(fd)
+    os.remove(db_path)
+    try:
+        env = child_env(db_path)
+        init_database(env)
+        # Прогрев: байткод (.pyc) и файловый кэш ОС
+        start_once(env)
+
+        samples = [start_once(env) for _ in range(runs)]
+        for key, title in (('import', 'import app'), ('create_app', 'create_app (run.py)'),
+                           ('process', 'whole process')):
+            values = [s[key] * 1000 for s in samples]
+            print(f'{title:<20}: median {statistics.median(values):7.1f} ms, min {min(values):7.1f} ms')
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+    run(args.runs)
+
+
+if __name__ == '__main__':
+    main()
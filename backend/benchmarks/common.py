@@ -0,0 +1,100 @@
+"""
+Общие утилиты для бенчмарков
+
+Запуск из каталога backend:
+    python -m benchmarks.<имя_модуля>
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Для ProductionConfig, который требует ключи уже при импорте config
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-jwt-secret')
+
+CATALOG_HEADER = [
+    'ID в системе', 'Название', 'Описание', 'Цена', 'Скидка (в процентах)',
+    'Изображения (через ;)', 'Названия опций (через ;)',
+    'Названия доп. опций (через ;)', 'Дата создания', 'Категория',
+]
+
+BRANDS = [
+    'Versace', 'Dior', 'Chanel', 'Tom Ford', 'Byredo', 'Gucci', 'Guerlain',
+    'Creed', 'Amouage', 'Xerjoff', 'Kilian', 'Givenchy', 'Burberry', 'Mancera',
+]
+MODELS = [
+    'Eros', 'Sauvage', 'Bleu', 'Noir Extreme', 'Gypsy Water', 'Bloom', 'Libre',
+    'Aventus', 'Guidance', 'Erba Pura', 'Princess', 'Irresistible', 'Blush',
+    'Pour Homme', 'Miss Blooming Bouquet', 'Ombre Leather', 'Rouge 540',
+]
+VOLUMES = ['30мл', '50мл', '75мл', '100мл', '']
+SUFFIXES = ['eau de parfum', 'eau de toilette', 'extrait', 'for women', 'pour femme', '']
+
+
+def synthetic_rows(count, seed=42):
+    """Синтетические строки каталога в формате table.csv"""
+    rng = random.Random(seed)
+    for i in range(count):
+        name = ' '.join(filter(None, [
+            rng.choice(BRANDS), rng.choice(MODELS), rng.choice(VOLUMES),
+            rng.choice(SUFFIXES), f'#{i}',
+        ]))
+        price = rng.randrange(1500, 30000, 100)
+        yield [
+            str(100000 + i),
+            name,
+            f'{name}. Верхние ноты: бергамот, мандарин; базовые ноты: мускус, пачули.',
+            f'{price:,} ₽'.replace(',', ' '),
+            str(rng.choice([0, 0, 0, 5, 10, 15, 20])),
+            f'https://cdn.example.com/{i}.jpg',
+            '', '', '03:36 11.09.2025', 'Без категории',
+        ]
+
+
+def write_synthetic_csv(count, path=None, seed=42):
+    """Записать синтетический каталог во временный CSV и вернуть путь"""
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.csv', prefix='airshop-bench-')
+        os.close(fd)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(CATALOG_HEADER)
+        writer.writerows(synthetic_rows(count, seed))
+    return path
+
+
+def make_app():
+    """Приложение на in-memory SQLite (TestingConfig)"""
+    from app import create_app
+    return create_app('testing')
+
+
+class Timer:
+    """Контекстный менеджер для замера времени"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
+
+
+def make_file_app(db_path):
+    """Приложение на файловой SQLite (нужно, когда БД используют несколько потоков)"""
+    from config import TestingConfig, config
+    from app import create_app
+
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+
+    config['benchmark-file'] = FileConfig
+    return create_app('benchmark-file')
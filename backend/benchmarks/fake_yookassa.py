@@ -0,0 +1,115 @@
+"""
+Фейковый API ЮКассы для нагрузочных тестов
+
+Отвечает на те же запросы, что делает YooKassaService (создание и статус
+платежа, возврат), с задержкой --latency, имитирующей сеть и провайдера.
+Приложение направляется сюда через YOOKASSA_API_URL.
+
+    python -m benchmarks.fake_yookassa --port 8099 --latency 0.05
+    YOOKASSA_API_URL=http://127.0.0.1:8099/v3 gunicorn run:app
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_PREFIX = '/v3'
+
+
+def payment_object(payment_id, status='pending', amount='0.00'):
+    return {
+        'id': payment_id,
+        'status': status,
+        'paid': status == 'succeeded',
+        'amount': {'value': amount, 'currency': 'RUB'},
+        'confirmation': {
+            'type': 'redirect',
+            'confirmation_url': f'https://yoomoney.example/checkout/{payment_id}',
+        },
+        'created_at': datetime.utcnow().isoformat(timespec='milliseconds') + 'Z',
+    }
+
+
+class FakeYooKassaHandler(BaseHTTPRequestHandler):
+    # Задается serve(): секунды ожидания перед ответом
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_POST(self):
+        body = self.read_json()
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.path == f'{API_PREFIX}/payments':
+            amount = body.get('amount', {}).get('value', '0.00')
+            self.send_json(200, payment_object(str(uuid.uuid4()), amount=amount))
+        elif self.path == f'{API_PREFIX}/refunds':
+            self.send_json(200, {
+                'id': str(uuid.uuid4()),
+                'payment_id': body.get('payment_id'),
+                'status': 'succeeded',
+                'amount': body.get('amount', {'value': '0.00', 'currency': 'RUB'}),
+                'created_at': datetime.utcnow().isoformat(timespec='milliseconds') + 'Z',
+            })
+        else:
+            self.send_json(404, {'type': 'error', 'description': 'Not found'})
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+        prefix = f'{API_PREFIX}/payments/'
+        if self.path.startswith(prefix):
+            self.send_json(200, payment_object(self.path[len(prefix):], status='succeeded', amount='1000.00'))
+        else:
+            self.send_json(404, {'type': 'error', 'description': 'Not found'})
+
+
+def serve(host='127.0.0.1', port=0, latency=0.0):
+    """
+    Запустить сервер в фоновом потоке
+
+    Returns:
+        tuple: (server, базовый URL для YOOKASSA_API_URL)
+    """
+    handler = type('Handler', (FakeYooKassaHandler,), {'latency': latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-yookassa', daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}{API_PREFIX}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per provider call')
+    args = parser.parse_args()
+
+    server, url = serve(args.host, args.port, args.latency)
+    print(f'Fake YooKassa at {url} (latency {args.latency * 1000:.0f} ms)')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,505 @@
+"""
+Нагрузочный тест витрины, оформления заказа и админки
+
+Заполняет отдельную БД (SQLite по умолчанию или --database-url) каталогом
+и заказами, запускает приложение под gunicorn (как в production) с
+фейковой ЮКассой (benchmarks/fake_yookassa.py) и гоняет смесь сценариев
+из --concurrency потоков:
+
+    browse        список товаров с фильтром по категории
+    search        поиск по названию/бренду
+    bootstrap     данные первой отрисовки витрины
+    product       карточка товара
+    checkout      POST /api/orders + POST /api/payment/create
+    admin_orders  список заказов в админке
+    admin_stats   статистика заказов
+
+Результат — пропускная способность и p50/p95/p99 по каждому запросу и в
+целом — печатается и сохраняется в JSON (с коммитом и параметрами), а
+--compare сравнивает с прошлым прогоном и возвращает код 1, если p95
+какого-то запроса вырос больше --threshold.
+
+    python -m benchmarks.loadtest --products 5000 --orders 20000 --duration 30
+    python -m benchmarks.loadtest --compare benchmarks/results/loadtest-abc1234.json
+
+Внимание: БД из --database-url очищается перед заполнением.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import requests
+
+from benchmarks.common import BACKEND_DIR, BRANDS, MODELS, VOLUMES
+from benchmarks import fake_yookassa
+
+DEFAULT_MIX = 'browse=35,search=15,bootstrap=10,product=25,checkout=8,admin_orders=5,admin_stats=2'
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+ADMIN_USERNAME = 'admin'
+ADMIN_PASSWORD = 'loadtest-admin-password'
+
+CATEGORIES = ('women', 'men', 'unisex')
+ORDER_STATUSES = ('pending', 'awaiting_payment', 'paid', 'processing', 'shipping', 'delivered', 'canceled')
+
+# Ответы, которые считаются успешными (остальные — ошибки)
+OK_STATUSES = (200, 201, 304)
+
+
+def parse_mix(value):
+    """"browse=35,search=15" -> {'browse': 35.0, 'search': 15.0}"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'Unknown scenario: {name}')
+        mix[name] = float(weight)
+    return mix
+
+
+# --- Заполнение БД ---
+
+def seed(database_url, products, orders, seed_value=42):
+    """
+    Пересоздать схему и заполнить БД
+
+    Returns:
+        list: id видимых товаров
+    """
+    from config import TestingConfig, config
+    from app import create_app, db
+    from app.models import Order, OrderItem, Product, User
+
+    class SeedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+        BCRYPT_LOG_ROUNDS = 12
+        # Схема пересоздается ниже
+        DB_AUTO_INIT = False
+
+    config['loadtest-seed'] = SeedConfig
+    app = create_app('loadtest-seed')
+    rng = random.Random(seed_value)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        admin = User(username=ADMIN_USERNAME, email='admin@loadtest.local', role='superadmin')
+        admin.set_password(ADMIN_PASSWORD)
+        db.session.add(admin)
+
+        rows = []
+        for i in range(products):
+            brand = rng.choice(BRANDS)
+            price = float(rng.randrange(1500, 30000, 100))
+            discount = rng.choice([0, 0, 0, 10, 15, 20])
+            rows.append({
+                'external_id': f'lt-{i}',
+                'name': f'{brand} {rng.choice(MODELS)} #{i}',
+                'brand': brand,
+                'price': price,
+                'old_price': round(price / (1 - discount / 100)) if discount else None,
+                'discount': discount,
+                'volume': rng.choice(VOLUMES) or '100мл',
+                'category': rng.choice(CATEGORIES),
+                'description': f'{brand}. Верхние ноты: бергамот, мандарин; базовые ноты: мускус.',
+                'image': f'https://cdn.example.com/{i}.jpg',
+                'is_featured': i < 8,
+                'is_new': rng.random() < 0.1,
+                'is_visible': rng.random() < 0.95,
+            })
+        for start in range(0, len(rows), 1000):
+            db.session.execute(db.insert(Product), rows[start:start + 1000])
+        db.session.commit()
+
+        catalog = db.session.execute(db.select(Product.id, Product.name, Product.price)).all()
+        now = datetime.utcnow()
+        for start in range(0, orders, 1000):
+            order_rows, item_rows = [], []
+            for i in range(start, min(start + 1000, orders)):
+                cart = rng.sample(catalog, k=min(len(catalog), rng.randint(1, 3)))
+                subtotal = sum(price for _, _, price in cart)
+                shipping = 0 if subtotal >= 5000 else 300
+                created = now - timedelta(minutes=rng.randrange(90 * 24 * 60))
+                order_rows.append({
+                    'order_number': f'SEED-{i}',
+                    'customer_name': f'Покупатель {i}',
+                    'customer_email': f'customer{i}@example.com',
+                    'customer_phone': f'+7900{i:07d}',
+                    'delivery_address': f'ул. Тестовая, {i % 200}',
+                    'delivery_city': 'Москва',
+                    'delivery_zipcode': '101000',
+                    'subtotal': subtotal,
+                    'shipping_cost': shipping,
+                    'total_amount': subtotal + shipping,
+                    'payment_method': rng.choice(['card', 'sbp', 'cash']),
+                    'status': rng.choice(ORDER_STATUSES),
+                    'created_at': created,
+                    'updated_at': created,
+                })
+                item_rows.append(cart)
+
+            result = db.session.execute(
+                db.insert(Order).returning(Order.id, sort_by_parameter_order=True), order_rows
+            )
+            order_ids = result.scalars().all()
+            db.session.execute(db.insert(OrderItem), [
+                {'order_id': order_id, 'product_id': product_id, 'product_name': name,
+                 'product_price': price, 'quantity': 1}
+                for order_id, cart in zip(order_ids, item_rows)
+                for product_id, name, price in cart
+            ])
+            db.session.commit()
+
+        visible_ids = db.session.execute(
+            db.select(Product.id).where(Product.is_visible.is_(True))
+        ).scalars().all()
+        db.session.remove()
+        db.engine.dispose()
+
+    return visible_ids
+
+
+# --- Сервер ---
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(database_url, workers, provider_url, work_dir, log_path):
+    """Запустить gunicorn (production-конфигурация) и дождаться готовности"""
+    port = free_port()
+    env = dict(
+        os.environ,
+        FLASK_ENV='production',
+        DATABASE_URL=database_url,
+        YOOKASSA_API_URL=provider_url,
+        YOOKASSA_SHOP_ID='loadtest',
+        YOOKASSA_SECRET_KEY='loadtest',
+        # Лимиты рассчитаны на одного клиента с одного IP — здесь все запросы с одного
+        RATELIMIT_ENABLED=os.environ.get('RATELIMIT_ENABLED', 'false'),
+        RATELIMIT_STORAGE_URI='sqlite:///' + os.path.join(work_dir, 'ratelimit.db'),
+        METRICS_ENABLED=os.environ.get('METRICS_ENABLED', 'true'),
+        METRICS_DIR=os.path.join(work_dir, 'metrics'),
+        LOG_LEVEL=os.environ.get('LOG_LEVEL', 'WARNING'),
+    )
+    env.setdefault('SECRET_KEY', 'loadtest-secret')
+    env.setdefault('JWT_SECRET_KEY', 'loadtest-jwt-secret')
+    env.setdefault('METRICS_TOKEN', 'loadtest-metrics')
+
+    log = open(log_path, 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--preload', '-w', str(workers),
+         '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'run:app'],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with code {process.returncode}, see {log_path}')
+        try:
+            if requests.get(f'{base_url}/api/settings', timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError(f'gunicorn did not start in 60 s, see {log_path}')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# --- Сценарии ---
+
+class VirtualUser:
+    """Один поток нагрузки: своя сессия (keep-alive) и свои замеры"""
+
+    def __init__(self, base_url, product_ids, admin_headers, seed_value):
+        self.base_url = base_url
+        self.product_ids = product_ids
+        self.admin_headers = admin_headers
+        self.rng = random.Random(seed_value)
+        self.session = requests.Session()
+        self.recording = False
+        # метка -> [задержки успешных ответов]
+        self.latencies = {}
+        # метка -> {статус или тип ошибки: число}
+        self.errors = {}
+
+    def request(self, label, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=30, **kwargs)
+            status = response.status_code
+        except requests.RequestException as e:
+            response, status = None, type(e).__name__
+        elapsed = time.perf_counter() - start
+
+        if self.recording:
+            if status in OK_STATUSES:
+                self.latencies.setdefault(label, []).append(elapsed)
+            else:
+                errors = self.errors.setdefault(label, {})
+                errors[str(status)] = errors.get(str(status), 0) + 1
+        return response if status in OK_STATUSES else None
+
+    def browse(self):
+        category = self.rng.choice(('all',) + CATEGORIES)
+        self.request('GET /api/products?category', 'GET', '/api/products', params={'category': category})
+
+    def search(self):
+        term = self.rng.choice(BRANDS + MODELS).split()[0][:5].lower()
+        self.request('GET /api/products?search', 'GET', '/api/products', params={'search': term})
+
+    def bootstrap(self):
+        self.request('GET /api/bootstrap', 'GET', '/api/bootstrap')
+
+    def product(self):
+        product_id = self.rng.choice(self.product_ids)
+        self.request('GET /api/products/<id>', 'GET', f'/api/products/{product_id}')
+
+    def checkout(self):
+        cart = self.rng.sample(self.product_ids, k=min(len(self.product_ids), self.rng.randint(1, 3)))
+        order_number = f'LT-{uuid.uuid4().hex[:12]}'
+        response = self.request('POST /api/orders', 'POST', '/api/orders', json={
+            'orderNumber': order_number,
+            'customer': {'name': 'Нагрузочный тест', 'email': 'loadtest@example.com', 'phone': '+79000000000'},
+            'delivery': {'address': 'ул. Тестовая, 1', 'city': 'Москва', 'zipcode': '101000'},
+            'items': [{'productId': product_id, 'quantity': 1} for product_id in cart],
+            'paymentMethod': 'card',
+        })
+        if response is None:
+            return
+        self.request('POST /api/payment/create', 'POST', '/api/payment/create', json={
+            'orderNumber': order_number,
+            'amount': response.json()['order']['totalAmount'],
+            'paymentMethod': 'bank_card',
+        })
+
+    def admin_orders(self):
+        self.request('GET /api/orders', 'GET', '/api/orders', params={'limit': 50},
+                     headers=self.admin_headers)
+
+    def admin_stats(self):
+        self.request('GET /api/orders/stats', 'GET', '/api/orders/stats', headers=self.admin_headers)
+
+    def run(self, mix, warmup_until, deadline):
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            self.recording = now >= warmup_until
+            getattr(self, self.rng.choices(names, weights)[0])()
+
+
+SCENARIOS = ('browse', 'search', 'bootstrap', 'product', 'checkout', 'admin_orders', 'admin_stats')
+
+
+# --- Статистика ---
+
+def percentile(sorted_values, p):
+    """Перцентиль по ближайшему рангу"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, errors, duration):
+    values = sorted(latencies)
+    ms = lambda value: round(value * 1000, 2) if value is not None else None  # noqa: E731
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput': round(len(values) / duration, 1),
+        'mean_ms': ms(sum(values) / len(values)) if values else None,
+        'p50_ms': ms(percentile(values, 50)),
+        'p95_ms': ms(percentile(values, 95)),
+        'p99_ms': ms(percentile(values, 99)),
+        'max_ms': ms(values[-1]) if values else None,
+    }
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BACKEND_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def print_report(report):
+    print(f'\n{"request":<28} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    rows = list(report['requests'].items()) + [('TOTAL', report['total'])]
+    for label, stats in rows:
+        errors = sum(stats['errors'].values())
+        print(f'{label:<28} {stats["throughput"]:>8.1f} {stats["p50_ms"] or 0:>8.1f} '
+              f'{stats["p95_ms"] or 0:>8.1f} {stats["p99_ms"] or 0:>8.1f} {errors:>7}')
+
+
+def compare(report, baseline, threshold):
+    """Сравнить с прошлым прогоном; True — есть регрессия p95"""
+    print(f'\nvs {baseline["meta"].get("commit")} ({baseline["meta"].get("timestamp")}):')
+    print(f'{"request":<28} {"req/s":>9} {"p50":>8} {"p95":>8} {"p99":>8}')
+
+    def delta(new, old):
+        if not new or not old:
+            return None
+        return (new / old - 1) * 100
+
+    regressed = False
+    rows = list(report['requests'].items()) + [('TOTAL', report['total'])]
+    for label, stats in rows:
+        old = baseline['total'] if label == 'TOTAL' else baseline['requests'].get(label)
+        if old is None:
+            continue
+        deltas = [delta(stats[key], old[key]) for key in ('throughput', 'p50_ms', 'p95_ms', 'p99_ms')]
+        cells = ' '.join(f'{value:>+7.1f}%' if value is not None else f'{"-":>8}' for value in deltas)
+        mark = ''
+        if deltas[2] is not None and deltas[2] > threshold:
+            regressed = True
+            mark = '  <-- p95 regression'
+        print(f'{label:<28} {cells}{mark}')
+    return regressed
+
+
+# --- Запуск ---
+
+def run_load(base_url, product_ids, mix, concurrency, duration, warmup):
+    login = requests.post(f'{base_url}/api/auth/login',
+                          json={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD}, timeout=30)
+    login.raise_for_status()
+    admin_headers = {'Authorization': f'Bearer {login.json()["access_token"]}'}
+
+    users = [VirtualUser(base_url, product_ids, admin_headers, seed_value=i) for i in range(concurrency)]
+    start = time.perf_counter()
+    warmup_until = start + warmup
+    deadline = warmup_until + duration
+    threads = [threading.Thread(target=user.run, args=(mix, warmup_until, deadline)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies, errors = {}, {}
+    for user in users:
+        for label, values in user.latencies.items():
+            latencies.setdefault(label, []).extend(values)
+        for label, counts in user.errors.items():
+            target = errors.setdefault(label, {})
+            for status, count in counts.items():
+                target[status] = target.get(status, 0) + count
+
+    all_errors = {}
+    for counts in errors.values():
+        for status, count in counts.items():
+            all_errors[status] = all_errors.get(status, 0) + count
+
+    return {
+        'requests': {
+            label: summarize(latencies.get(label, []), errors.get(label, {}), duration)
+            for label in sorted(set(latencies) | set(errors))
+        },
+        'total': summarize([value for values in latencies.values() for value in values], all_errors, duration),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='БД для теста (очищается!); по умолчанию временный SQLite')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=4, help='воркеры gunicorn')
+    parser.add_argument('--concurrency', type=int, default=16, help='потоки нагрузки')
+    parser.add_argument('--duration', type=float, default=30, help='секунды замера')
+    parser.add_argument('--warmup', type=float, default=5, help='секунды прогрева (не учитываются)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument('--provider-latency', type=float, default=0.05, help='секунды на вызов фейковой ЮКассы')
+    parser.add_argument('--output', help=f'JSON с результатом (по умолчанию {RESULTS_DIR}/loadtest-<commit>.json)')
+    parser.add_argument('--compare', help='JSON прошлого прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=10.0, help='допустимый рост p95, %%')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='airshop-loadtest-')
+    database_url = args.database_url or 'sqlite:///' + os.path.join(work_dir, 'loadtest.db')
+    server = provider = None
+    try:
+        print(f'Seeding {args.products} products, {args.orders} orders...')
+        product_ids = seed(database_url, args.products, args.orders, args.seed)
+
+        provider, provider_url = fake_yookassa.serve(latency=args.provider_latency)
+        server, base_url = start_server(database_url, args.workers, provider_url, work_dir,
+                                        os.path.join(work_dir, 'gunicorn.log'))
+        print(f'Running {args.concurrency} users against {args.workers} workers '
+              f'for {args.warmup:g}+{args.duration:g} s...')
+        report = run_load(base_url, product_ids, args.mix, args.concurrency, args.duration, args.warmup)
+    finally:
+        if server is not None:
+            stop_server(server)
+        if provider is not None:
+            provider.shutdown()
+
+    commit, dirty = git_revision()
+    report['meta'] = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'database': database_url.split(':', 1)[0],
+        'products': args.products,
+        'orders': args.orders,
+        'workers': args.workers,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'mix': args.mix,
+        'provider_latency': args.provider_latency,
+    }
+    print_report(report)
+
+    output = args.output or os.path.join(RESULTS_DIR, f'loadtest-{commit or "unknown"}{"-dirty" if dirty else ""}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f'\nSaved {output}')
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Разбор строк фида импорта: цена, категория, строка и весь table.csv
+
+Размер синтетического фида (строки table.csv, повторенные с новыми ID)
+задается MICRO_CSV_ROWS (по умолчанию 10000).
+"""
+import csv
+import io
+import os
+
+import pytest
+
+from app.services import catalog_import
+from conftest import TABLE_CSV
+
+CSV_ROWS = int(os.getenv('MICRO_CSV_ROWS', 10000))
+
+
+@pytest.fixture(scope='module')
+def table_rows():
+    with open(TABLE_CSV, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f, delimiter=catalog_import.CSV_DELIMITER)
+        header = next(reader)
+        rows = [row for row in reader if len(row) > 1 and row[1].strip()]
+    return header, rows
+
+
+@pytest.fixture(scope='module')
+def names(table_rows):
+    return [row[1] for row in table_rows[1]]
+
+
+@pytest.fixture(scope='module')
+def scaled_csv(table_rows):
+    """table.csv, повторенный до CSV_ROWS строк"""
+    header, rows = table_rows
+    out = io.StringIO()
+    writer = csv.writer(out, delimiter=catalog_import.CSV_DELIMITER)
+    writer.writerow(header)
+    for i in range(CSV_ROWS):
+        row = list(rows[i % len(rows)])
+        row[0] = str(1_000_000 + i)
+        writer.writerow(row)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('value', ['7 500 ₽', '12,000.00', '1500'])
+def bench_parse_price(benchmark, value):
+    benchmark(catalog_import.parse_price, value)
+
+
+def bench_parse_category(benchmark, names):
+    """Все названия table.csv (на одно название — результат / число названий)"""
+    parse_category = catalog_import.parse_category
+    benchmark(lambda: [parse_category(name) for name in names])
+
+
+def bench_get_category(benchmark, names):
+    get_category = catalog_import.get_category
+    pairs = [(name.split()[0], ' '.join(name.split()[1:])) for name in names]
+    benchmark(lambda: [get_category(brand, model) for brand, model in pairs])
+
+
+def bench_parse_catalog_row(benchmark, table_rows):
+    header, rows = table_rows
+    row = dict(zip(header, rows[0]))
+    benchmark(catalog_import.parse_catalog_row, row)
+
+
+def bench_parse_csv(benchmark, scaled_csv):
+    """Полный разбор фида из CSV_ROWS строк (DictReader + parse_rows + content_hash)"""
+    def parse():
+        reader = csv.DictReader(io.StringIO(scaled_csv), delimiter=catalog_import.CSV_DELIMITER)
+        return sum(status == 'ok' for status, _, _ in catalog_import.parse_rows(reader))
+
+    ok = benchmark.pedantic(parse, rounds=5, iterations=1, warmup_rounds=1)
+    assert ok == CSV_ROWS
@@ -0,0 +1,15 @@
+"""
+Сериализация моделей для API (to_dict)
+"""
+
+
+def bench_product_to_dict(benchmark, product):
+    benchmark(product.to_dict)
+
+
+def bench_order_to_dict(benchmark, order):
+    benchmark(order.to_dict)
+
+
+def bench_order_to_dict_without_items(benchmark, order):
+    benchmark(order.to_dict, include_items=False)
@@ -0,0 +1,86 @@
+"""
+Фикстуры микробенчмарков
+
+Результаты (--benchmark-autosave, --benchmark-compare) хранятся в
+benchmarks/results/micro, а не в .benchmarks текущего каталога.
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import make_app  # noqa: E402
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results', 'micro')
+TABLE_CSV = os.path.join(BACKEND_DIR, '..', 'table.csv')
+
+DEFAULT_STORAGE = 'file://./.benchmarks'
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    if getattr(config.option, 'benchmark_storage', None) == DEFAULT_STORAGE:
+        config.option.benchmark_storage = 'file://' + RESULTS_DIR
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = make_app()
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture(scope='session')
+def product(app):
+    from app import db
+    from app.models import Product
+
+    product = Product(
+        external_id='38932',
+        name='Versace Eros energy 100мл eau de parfum',
+        brand='Versace',
+        price=7500.0,
+        old_price=8824.0,
+        discount=15,
+        volume='100мл',
+        category='men',
+        description='Versace Eros energy eau de parfum, 100мл. Верхние ноты: лимон, лайм, грейпфрут.',
+        image='https://cdn.example.com/38932.jpg',
+        is_featured=True,
+    )
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+@pytest.fixture(scope='session')
+def order(app, product):
+    """Заказ с тремя позициями (items — dynamic relationship, читается запросом)"""
+    from app import db
+    from app.models import Order, OrderItem
+
+    order = Order(
+        order_number='MICRO-1',
+        customer_name='Покупатель',
+        customer_email='customer@example.com',
+        customer_phone='+79000000000',
+        delivery_address='ул. Тестовая, 1',
+        delivery_city='Москва',
+        delivery_zipcode='101000',
+        subtotal=22500.0,
+        shipping_cost=0,
+        total_amount=22500.0,
+        payment_method='card',
+        status='paid',
+    )
+    db.session.add(order)
+    db.session.flush()
+    for quantity in (1, 1, 2):
+        db.session.add(OrderItem(order_id=order.id, product_id=product.id, product_name=product.name,
+                                 product_price=product.price, quantity=quantity))
+    db.session.commit()
+    return order
@@ -2,6 +2,7 @@
 Конфигурация Flask приложения
 """
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -40,11 +41,21 @@ class Config:
     else:
         SQLALCHEMY_ENGINE_OPTIONS = {}
 
+    # Схему создает и обновляет `flask init-db` (миграции). True — create_all
+    # и администратор при каждом create_app (in-memory БД тестов)
+    DB_AUTO_INIT = os.getenv('DB_AUTO_INIT', 'False').lower() == 'true'
+
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(
         seconds=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 3600))
     )
+    # Refresh-токены (одноразовые, с ротацией): сколько живет вход без пароля
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(
+        seconds=int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 30 * 24 * 3600))
+    )
+    # Сколько проверенных токенов помнить, чтобы не проверять подпись заново (0 — не кэшировать)
+    JWT_DECODE_CACHE_SIZE = 1024
     JWT_TOKEN_LOCATION = ['headers']
     JWT_HEADER_NAME = 'Authorization'
     JWT_HEADER_TYPE = 'Bearer'
@@ -61,7 +72,7 @@ class Config:
     # ЮКасса
     YOOKASSA_SHOP_ID = os.getenv('YOOKASSA_SHOP_ID', '')
     YOOKASSA_SECRET_KEY = os.getenv('YOOKASSA_SECRET_KEY', '')
-    YOOKASSA_API_URL = 'https://api.yookassa.ru/v3'
+    YOOKASSA_API_URL = os.getenv('YOOKASSA_API_URL', 'https://api.yookassa.ru/v3')
     PAYMENT_RETURN_URL = os.getenv('PAYMENT_RETURN_URL', f"{FRONTEND_URL}/payment/success")
 
     # Email (опционально)
@@ -76,11 +87,103 @@ class Config:
     ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'changeme123')
     ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@airshop.ru')
 
-    # Rate Limiting
-    RATELIMIT_STORAGE_URL = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
+    # Rate Limiting: RATELIMIT_ENABLED=false отключает лимиты (нагрузочные
+    # тесты с одного IP); счетчики общие для всех воркеров gunicorn.
+    # sqlite:///путь — файл на этой машине (app/utils/rate_limit_storage.py),
+    # redis://host:6379 — общий для нескольких машин (нужен пакет redis),
+    # memory:// — свои счетчики у каждого воркера
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True').lower() == 'true'
+    RATELIMIT_STORAGE_URI = os.getenv(
+        'RATELIMIT_STORAGE_URI',
+        os.getenv('RATELIMIT_STORAGE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'airshop-ratelimit.db'))
+    )
+    # Как часто (секунды) воркер записывает накопленные счетчики в SQLite
+    # и перечитывает чужие. 0 — на каждый запрос, точный подсчет; больше
+    # нуля — меньше записей, но лимит может быть превышен на число запросов
+    # других воркеров за этот интервал
+    RATELIMIT_STORAGE_OPTIONS = (
+        {'flush_interval': float(os.getenv('RATELIMIT_FLUSH_INTERVAL', 0))}
+        if RATELIMIT_STORAGE_URI.startswith('sqlite://') else {}
+    )
+    RATELIMIT_STRATEGY = os.getenv('RATELIMIT_STRATEGY', 'sliding-window-counter')
+    # Если хранилище недоступно, лимиты временно считаются в памяти процесса
+    RATELIMIT_IN_MEMORY_FALLBACK_ENABLED = True
     RATELIMIT_DEFAULT = "200 per day;50 per hour"
     RATELIMIT_HEADERS_ENABLED = True
 
+    # Фоновые задания импорта каталога
+    IMPORT_JOB_WORKERS = int(os.getenv('IMPORT_JOB_WORKERS', 1))
+    IMPORT_UPLOAD_DIR = os.getenv('IMPORT_UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'airshop-imports'))
+    # Процессы разбора строк для больших фидов (1 — разбор в потоке задания)
+    IMPORT_PARSE_WORKERS = int(os.getenv('IMPORT_PARSE_WORKERS', os.cpu_count() or 1))
+    # Через сколько секунд без отметки воркера его задания считаются оборванными
+    # (отметка ставится после каждой пачки; применение плана одной транзакцией
+    # должно укладываться в этот интервал)
+    IMPORT_JOB_STALE_AFTER = int(os.getenv('IMPORT_JOB_STALE_AFTER', 600))
+
+    # Изображения товаров: скачиваются один раз, хранятся по sha256 содержимого,
+    # варианты (сторона в пикселях) создаются в фоновом пуле
+    MEDIA_ROOT = os.getenv('MEDIA_ROOT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media'))
+    MEDIA_URL = os.getenv('MEDIA_URL', '/media')  # публичный адрес /media (можно CDN)
+    IMAGE_SIZES = {'thumb': 160, 'card': 400, 'large': 800}
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+    IMAGE_MAX_BYTES = 10 * 1024 * 1024
+    IMAGE_FETCH_TIMEOUT = 15
+    # Функция url -> bytes (по умолчанию images.fetch_image)
+    IMAGE_FETCHER = None
+    # Разрешить изображения с частных и loopback-адресов (только для локальной
+    # разработки: URL приходят из фида, и сервер не должен ходить в свою сеть)
+    IMAGE_ALLOW_PRIVATE_HOSTS = os.getenv('IMAGE_ALLOW_PRIVATE_HOSTS', 'false').lower() == 'true'
+
+    # GET /api/bootstrap: сколько избранных товаров отдавать и сколько секунд
+    # браузер/CDN может не перепроверять ответ (0 — всегда по ETag)
+    BOOTSTRAP_FEATURED_LIMIT = 4
+    BOOTSTRAP_MAX_AGE = int(os.getenv('BOOTSTRAP_MAX_AGE', 0))
+
+    # Пароли: стоимость bcrypt (при смене хэши пересчитываются при входе)
+    # и пул потоков для bcrypt
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    BCRYPT_POOL_SIZE = int(os.getenv('BCRYPT_POOL_SIZE', 2))
+    BCRYPT_QUEUE_SIZE = int(os.getenv('BCRYPT_QUEUE_SIZE', 16))
+    BCRYPT_QUEUE_TIMEOUT = 5
+
+    # Кэш пользователей по JWT identity (секунды)
+    USER_CACHE_TTL = 30
+
+    # Метрики запросов (GET /metrics, формат Prometheus), по умолчанию
+    # выключены. Воркеры пишут снимки в METRICS_DIR не чаще раза в
+    # METRICS_FLUSH_INTERVAL секунд; если задан METRICS_TOKEN, /metrics
+    # требует Authorization: Bearer <токен> (в production — обязательно)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False').lower() == 'true'
+    METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'airshop-metrics'))
+    METRICS_FLUSH_INTERVAL = 1.0
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+    # Учет SQL-запросов: Server-Timing с числом запросов и временем в БД,
+    # лог запросов дольше SLOW_QUERY_THRESHOLD секунд (0 — не логировать),
+    # QUERY_BUDGET_RAISE — превышение query_budget роутом падает исключением
+    QUERY_STATS_ENABLED = os.getenv('QUERY_STATS_ENABLED', 'True').lower() == 'true'
+    SLOW_QUERY_THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', 0.2))
+    QUERY_BUDGET_RAISE = False
+
+    # Профилировщик (выключен по умолчанию): доля профилируемых запросов,
+    # интервал снятия стеков (секунды) и каталог профилей воркеров.
+    # Администратор может профилировать свой запрос заголовком X-Profile: 1
+    PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'False').lower() == 'true'
+    PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', 0))
+    PROFILER_INTERVAL = float(os.getenv('PROFILER_INTERVAL', 0.005))
+    PROFILER_DIR = os.getenv('PROFILER_DIR', os.path.join(tempfile.gettempdir(), 'airshop-profiles'))
+
+    # Логи: JSON-строки в stderr через фоновый поток (LOG_FORMAT=text — для
+    # чтения глазами), уровень по умолчанию и по модулям ("имя=УРОВЕНЬ,...").
+    # LOG_SAMPLING — доля записываемых частых событий ("событие=доля,...");
+    # при переполнении очереди (LOG_QUEUE_SIZE) записи отбрасываются
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+    LOG_SAMPLING = os.getenv('LOG_SAMPLING', 'http.access=0.01,jwt.rejected=0.1,import.row_error=0.1')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+
     # Pagination
     PRODUCTS_PER_PAGE = 20
     ORDERS_PER_PAGE = 50
@@ -89,7 +192,9 @@ class Config:
 class DevelopmentConfig(Config):
     """Конфигурация для разработки"""
     DEBUG = True
-    SQLALCHEMY_ECHO = True
+    # Все SQL-запросы в лог (шумно); число запросов на HTTP-запрос видно в Server-Timing
+    SQLALCHEMY_ECHO = os.getenv('SQLALCHEMY_ECHO', 'False').lower() == 'true'
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
 
 
 class ProductionConfig(Config):
@@ -106,12 +211,21 @@ class ProductionConfig(Config):
         raise ValueError("SECRET_KEY must be set in production!")
     if not JWT_SECRET_KEY:
         raise ValueError("JWT_SECRET_KEY must be set in production!")
+    if Config.METRICS_ENABLED and not Config.METRICS_TOKEN:
+        raise ValueError("METRICS_TOKEN must be set in production when METRICS_ENABLED is true!")
 
 
 class TestingConfig(Config):
     """Конфигурация для тестирования"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    DB_AUTO_INIT = True
+    RATELIMIT_STORAGE_URI = 'memory://'
+    RATELIMIT_STORAGE_OPTIONS = {}
+    BCRYPT_LOG_ROUNDS = 4
+    QUERY_BUDGET_RAISE = True
+    LOG_FORMAT = 'text'
+    LOG_LEVEL = 'WARNING'
     WTF_CSRF_ENABLED = False
 
 
@@ -0,0 +1,180 @@
+"""catalog sync, images, import jobs, tokens
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 19:25:13
+
+Таблицы и колонки, появившиеся до миграций. Базы, созданные create_all
+на промежуточных версиях, уже могут содержать их часть, поэтому
+существующие таблицы и колонки пропускаются.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def has_column(table, column):
+    return column in {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def has_unique(table, columns):
+    """Уникальность по columns: ограничение UNIQUE или уникальный индекс"""
+    inspector = sa.inspect(op.get_bind())
+    existing = [c['column_names'] for c in inspector.get_unique_constraints(table)]
+    existing += [i['column_names'] for i in inspector.get_indexes(table) if i['unique']]
+    return list(columns) in existing
+
+
+def upgrade():
+    if not has_column('users', 'token_version'):
+        with op.batch_alter_table('users', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('token_version', sa.Integer(), nullable=False, server_default='1'))
+
+    # Колонки появлялись в разных версиях — каждая проверяется отдельно
+    product_columns = [
+        sa.Column('external_id', sa.String(length=200), nullable=True),
+        sa.Column('image_hash', sa.String(length=64), nullable=True),
+        sa.Column('content_hash', sa.String(length=40), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    ]
+    missing = [column for column in product_columns if not has_column('products', column.name)]
+    add_unique = not has_unique('products', ['external_id'])
+
+    if missing or add_unique:
+        with op.batch_alter_table('products', schema=None) as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+            if add_unique:
+                batch_op.create_unique_constraint('uq_products_external_id', ['external_id'])
+
+    if not has_table('image_assets'):
+        op.create_table('image_assets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('source_url', sa.String(length=500), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source_url')
+        )
+
+    if not has_table('product_staging'):
+        op.create_table('product_staging',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('import_id', sa.String(length=36), nullable=False),
+        sa.Column('row_num', sa.Integer(), nullable=False),
+        sa.Column('external_id', sa.String(length=200), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('brand', sa.String(length=100), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('old_price', sa.Float(), nullable=True),
+        sa.Column('discount', sa.Integer(), nullable=True),
+        sa.Column('volume', sa.String(length=50), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('image', sa.String(length=500), nullable=False),
+        sa.Column('is_featured', sa.Boolean(), nullable=True),
+        sa.Column('is_new', sa.Boolean(), nullable=True),
+        sa.Column('is_visible', sa.Boolean(), nullable=True),
+        sa.Column('content_hash', sa.String(length=40), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('product_staging', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_product_staging_import_id'), ['import_id'], unique=False)
+
+    if not has_table('import_jobs'):
+        op.create_table('import_jobs',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('source', sa.String(length=20), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('force', sa.Boolean(), nullable=False),
+        sa.Column('featured_count', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('staged', sa.Integer(), nullable=False),
+        sa.Column('inserted', sa.Integer(), nullable=False),
+        sa.Column('updated', sa.Integer(), nullable=False),
+        sa.Column('unchanged', sa.Integer(), nullable=False),
+        sa.Column('deleted', sa.Integer(), nullable=False),
+        sa.Column('skipped', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('errors_json', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if not has_table('refresh_tokens'):
+        op.create_table('refresh_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('jti', sa.String(length=36), nullable=False),
+        sa.Column('family_id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('used_at', sa.DateTime(), nullable=True),
+        sa.Column('revoked_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_refresh_tokens_family_id'), ['family_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_refresh_tokens_jti'), ['jti'], unique=True)
+            batch_op.create_index(batch_op.f('ix_refresh_tokens_user_id'), ['user_id'], unique=False)
+
+    if not has_table('site_settings'):
+        op.create_table('site_settings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_by', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['updated_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('site_settings')
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_user_id'))
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_jti'))
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_family_id'))
+
+    op.drop_table('refresh_tokens')
+    op.drop_table('import_jobs')
+    with op.batch_alter_table('product_staging', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_staging_import_id'))
+
+    op.drop_table('product_staging')
+    op.drop_table('image_assets')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_products_external_id', type_='unique')
+        batch_op.drop_column('deleted_at')
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('image_hash')
+        batch_op.drop_column('external_id')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,85 @@
+"""indexes for hot predicates
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 19:40:12
+
+Индексы для условий, по которым фильтруют и сортируют роуты: каталог
+(категория, видимость, избранные, название), список и статистика заказов
+(статус, дата), webhook и статус платежа (payment_id), позиции заказа
+(order_id, product_id).
+
+На PostgreSQL индексы строятся CONCURRENTLY вне транзакции — таблицы не
+блокируются на запись, магазин работает во время миграции. Индекс,
+оставшийся невалидным после прерванной сборки, пересоздается. На других
+БД — обычный CREATE INDEX. Уже существующие индексы (база создана
+create_all с этими моделями) пропускаются.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('orders', 'status'),
+    ('orders', 'created_at'),
+    ('orders', 'payment_id'),
+    ('order_items', 'order_id'),
+    ('order_items', 'product_id'),
+    ('products', 'category'),
+    ('products', 'is_visible'),
+    ('products', 'is_featured'),
+    ('products', 'name'),
+]
+
+
+def index_name(table, column):
+    return op.f(f'ix_{table}_{column}')
+
+
+def existing_indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def invalid_postgresql_indexes():
+    """Индексы, которые CREATE INDEX CONCURRENTLY не достроил (indisvalid = false)"""
+    rows = op.get_bind().execute(sa.text(
+        'SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+        'WHERE NOT i.indisvalid'
+    ))
+    return {row[0] for row in rows}
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        invalid = invalid_postgresql_indexes()
+        with op.get_context().autocommit_block():
+            for table, column in INDEXES:
+                name = index_name(table, column)
+                if name in invalid:
+                    op.drop_index(name, table_name=table, postgresql_concurrently=True)
+                elif name in existing_indexes(table):
+                    continue
+                op.create_index(name, table, [column], unique=False, postgresql_concurrently=True)
+        return
+
+    for table, column in INDEXES:
+        name = index_name(table, column)
+        if name not in existing_indexes(table):
+            op.create_index(name, table, [column], unique=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for table, column in reversed(INDEXES):
+                op.drop_index(index_name(table, column), table_name=table, postgresql_concurrently=True)
+        return
+
+    for table, column in reversed(INDEXES):
+        op.drop_index(index_name(table, column), table_name=table)
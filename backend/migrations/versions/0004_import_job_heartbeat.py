@@ -0,0 +1,41 @@
+"""import job heartbeat
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 20:05:31
+
+Владелец задания импорта (воркер 'host:pid') и время его последней
+отметки. Задание, чей воркер давно не отмечался, считается оборванным.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def has_column(table, column):
+    return column in {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    columns = [
+        sa.Column('worker', sa.String(length=100), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    ]
+    missing = [column for column in columns if not has_column('import_jobs', column.name)]
+
+    if missing:
+        with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('worker')
@@ -0,0 +1,87 @@
+"""
+Фикстуры тестов
+
+Каждый тест получает приложение TestingConfig на своей файловой SQLite
+и своем MEDIA_ROOT (в tmp_path): фоновые пулы (изображения, импорт)
+работают в других потоках, а in-memory БД у каждого соединения своя.
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Для ProductionConfig, который требует ключи уже при импорте config
+os.environ.setdefault('SECRET_KEY', 'test-secret')
+os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-with-at-least-32-bytes')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    from config import TestingConfig, config
+    from app import create_app, db
+    from app.services import bootstrap, user_cache
+    from app.services.site_settings import SiteSettings
+
+    class TestsConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'airshop.db'}"
+        MEDIA_ROOT = str(tmp_path / 'media')
+        IMPORT_UPLOAD_DIR = str(tmp_path / 'imports')
+
+    # Кэши процесса общие для всех приложений — у каждого теста своя БД
+    monkeypatch.setattr(bootstrap, '_cache', None)
+    monkeypatch.setattr(SiteSettings, '_cache', None)
+    user_cache.invalidate()
+
+    config['tests'] = TestsConfig
+    app = create_app('tests')
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(app):
+    from app.models import User
+    return User.query.filter_by(username=app.config['ADMIN_USERNAME']).one()
+
+
+@pytest.fixture
+def admin_headers(admin):
+    from app.utils.auth import create_user_token
+    return {'Authorization': f'Bearer {create_user_token(admin)}'}
+
+
+@pytest.fixture
+def make_product(app):
+    """Создать товар (поля по умолчанию можно переопределить)"""
+    from app import db
+    from app.models import Product
+
+    def make(**fields):
+        values = {
+            'name': 'Versace Eros energy 100мл eau de parfum',
+            'brand': 'Versace',
+            'price': 7500.0,
+            'volume': '100мл',
+            'category': 'men',
+            'description': 'Versace Eros energy eau de parfum, 100мл.',
+            'image': 'https://cdn.example.com/38932.jpg',
+        }
+        values.update(fields)
+        product = Product(**values)
+        db.session.add(product)
+        db.session.commit()
+        return product
+
+    return make
@@ -0,0 +1,79 @@
+"""
+Вход и refresh-токены: ротация, повторное использование, отзыв
+"""
+from app import db
+from app.models import RefreshToken
+
+
+def login(client, app):
+    response = client.post('/api/auth/login', json={
+        'username': app.config['ADMIN_USERNAME'],
+        'password': app.config['ADMIN_PASSWORD'],
+    })
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def refresh(client, token):
+    return client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {token}'})
+
+
+def test_refresh_rotates_the_token(app, client):
+    first = login(client, app)['refresh_token']
+
+    response = refresh(client, first)
+    assert response.status_code == 200
+    second = response.get_json()
+    assert second['refresh_token'] != first
+
+    verify = client.get('/api/auth/verify', headers={'Authorization': f"Bearer {second['access_token']}"})
+    assert verify.status_code == 200
+
+    assert refresh(client, second['refresh_token']).status_code == 200
+    # Все токены одного входа — в одном семействе, погашены все, кроме последнего
+    tokens = RefreshToken.query.all()
+    assert len({token.family_id for token in tokens}) == 1
+    assert [token.used_at is None for token in tokens].count(True) == 1
+
+
+def test_reused_refresh_token_revokes_the_family(app, client):
+    first = login(client, app)['refresh_token']
+    second = refresh(client, first).get_json()['refresh_token']
+
+    reused = refresh(client, first)
+    assert reused.status_code == 401
+    assert reused.get_json()['error'] == 'Refresh token reuse detected'
+
+    # Токен, выданный по украденному, тоже больше не действует
+    response = refresh(client, second)
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Refresh token has been revoked'
+
+
+def test_other_logins_survive_reuse_detection(app, client):
+    stolen = login(client, app)['refresh_token']
+    other = login(client, app)['refresh_token']
+    refresh(client, stolen)
+    refresh(client, stolen)
+
+    assert refresh(client, other).status_code == 200
+
+
+def test_logout_revokes_the_refresh_token(app, client):
+    token = login(client, app)['refresh_token']
+
+    response = client.post('/api/auth/logout', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+
+    assert refresh(client, token).status_code == 401
+
+
+def test_token_version_change_revokes_refresh_tokens(app, client, admin):
+    token = login(client, app)['refresh_token']
+
+    admin.revoke_tokens()
+    db.session.commit()
+
+    response = refresh(client, token)
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Token has been revoked'
@@ -0,0 +1,243 @@
+"""
+Движок импорта каталога (catalog_import)
+"""
+import csv
+import io
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import Product, ProductStaging
+from app.services import catalog_import
+
+CATALOG_HEADER = ['ID в системе', 'Название', 'Описание', 'Цена', 'Скидка (в процентах)', 'Изображения (через ;)']
+UPDATE_HEADER = ['Бренд', 'Модель', 'Описание', 'Цена', 'Скидка (в процентах)', 'Изображения (через ;)']
+
+
+def csv_text(header, rows):
+    out = io.StringIO()
+    writer = csv.writer(out, delimiter=catalog_import.CSV_DELIMITER)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+def catalog_row(i, price=1000):
+    return [str(100 + i), f'Dior Sauvage {i} 100мл', f'Описание {i}', f'{price} ₽', '0', f'https://cdn.example.com/{i}.jpg']
+
+
+def feed(count=5, **prices):
+    """Фид каталога из count товаров; prices: {'p<i>': цена}"""
+    return csv_text(CATALOG_HEADER, [catalog_row(i, prices.get(f'p{i}', 1000)) for i in range(count)])
+
+
+def test_import_skips_products_already_in_catalog(app):
+    first = catalog_import.import_text(feed(3))
+    db.session.commit()
+    second = catalog_import.import_text(feed(5))
+    db.session.commit()
+
+    assert (first['imported'], first['skipped']) == (3, 0)
+    assert (second['imported'], second['skipped']) == (2, 3)
+    assert Product.query.count() == 5
+
+
+def test_import_counts_failed_rows_beyond_the_error_report(app, monkeypatch):
+    monkeypatch.setattr(catalog_import, 'MAX_ERRORS', 2)
+    # Строки без колонок формата обновления не разбираются
+    rows = [['Dior']] * 5 + [['Dior', 'Sauvage', 'Описание', '9 900 ₽', '10', 'https://cdn.example.com/1.jpg']]
+
+    result = catalog_import.import_text(csv_text(UPDATE_HEADER, rows))
+
+    assert result['imported'] == 1
+    assert result['failed'] == 5
+    assert len(result['errors']) == 2
+    assert [error['row'] for error in result['errors']] == [2, 3]
+
+
+@pytest.mark.parametrize('price, expected', [('7 500 ₽', 7500.0), ('', 0.0), ('цена по запросу', 0.0)])
+def test_parse_price(price, expected):
+    assert catalog_import.parse_price(price) == expected
+
+
+@contextmanager
+def product_writes():
+    """Строки живого каталога, измененные внутри блока: [(statement, rowcount)]"""
+    pattern = re.compile(r'^\s*(INSERT INTO|UPDATE|DELETE FROM) products\b', re.IGNORECASE)
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if pattern.match(statement) and cursor.rowcount:
+            writes.append((statement, cursor.rowcount))
+
+    event.listen(db.engine, 'after_cursor_execute', record)
+    try:
+        yield writes
+    finally:
+        event.remove(db.engine, 'after_cursor_execute', record)
+
+
+def test_unchanged_feed_writes_nothing_to_products(app):
+    catalog_import.sync_text(feed(5))
+
+    with product_writes() as writes:
+        result = catalog_import.sync_text(feed(5))
+
+    assert (result['inserted'], result['updated'], result['unchanged'], result['deleted']) == (0, 0, 5, 0)
+    assert writes == []
+
+
+def test_changed_row_is_updated_in_place(app):
+    catalog_import.sync_text(feed(5))
+    before = {p.external_id: p.id for p in Product.query}
+
+    with product_writes() as writes:
+        result = catalog_import.sync_text(feed(5, p2=2500))
+
+    assert (result['inserted'], result['updated'], result['unchanged']) == (0, 1, 4)
+    assert [rowcount for _, rowcount in writes] == [1]
+    db.session.expire_all()
+    product = Product.query.filter_by(external_id='102').one()
+    assert product.id == before['102']
+    assert product.price == 2500.0
+    assert {p.external_id: p.id for p in Product.query} == before
+
+
+def test_missing_row_is_soft_deleted(app):
+    catalog_import.sync_text(feed(5))
+
+    result = catalog_import.sync_text(feed(4))
+
+    assert result['deleted'] == 1
+    db.session.expire_all()
+    removed = Product.query.filter_by(external_id='104').one()
+    assert removed.deleted_at is not None
+    assert Product.live().count() == 4
+
+    # Товар вернулся в фид — снова живой, с тем же id
+    result = catalog_import.sync_text(feed(5))
+    assert (result['inserted'], result['updated']) == (0, 1)
+    db.session.expire_all()
+    assert db.session.get(Product, removed.id).deleted_at is None
+
+
+def catalog_snapshot():
+    db.session.expire_all()
+    return [(p.id, p.external_id, p.price, p.deleted_at) for p in Product.query.order_by(Product.id)]
+
+
+def test_rejected_feed_leaves_catalog_and_staging_untouched(app):
+    catalog_import.sync_text(feed(5))
+    before = catalog_snapshot()
+
+    # Фид удалил бы 3 товара из 5 и заодно поменял цену — не применяется ничего
+    rejected = csv_text(CATALOG_HEADER, [catalog_row(0, price=1), catalog_row(1)])
+    with pytest.raises(catalog_import.CatalogImportError, match='would remove 3 of 5'):
+        catalog_import.sync_text(rejected)
+
+    assert catalog_snapshot() == before
+    assert ProductStaging.query.count() == 0
+
+    result = catalog_import.sync_text(rejected, force=True)
+    assert (result['updated'], result['deleted']) == (1, 3)
+    assert ProductStaging.query.count() == 0
+
+
+def test_feed_with_too_many_invalid_rows_is_rejected(app):
+    catalog_import.sync_text(feed(5))
+    before = catalog_snapshot()
+
+    rows = [['Dior']] * 3 + [['Dior', 'Sauvage', 'Описание', '9 900 ₽', '10', 'https://cdn.example.com/1.jpg']]
+    with pytest.raises(catalog_import.CatalogImportError, match='Too many invalid rows'):
+        catalog_import.sync_text(csv_text(UPDATE_HEADER, rows), force=True)
+
+    assert catalog_snapshot() == before
+    assert ProductStaging.query.count() == 0
+
+
+def mixed_catalog_feed():
+    rows = [catalog_row(i, price=1000 + i) for i in range(7)]
+    rows[1][1] = ''                                    # без названия — пропуск
+    rows[3][3] = 'цена по запросу'                     # цена не разобрана — 0
+    rows[4] = rows[4] + ['лишнее значение']            # значение под restkey
+    rows[5] = rows[5][:2]                              # недостающие колонки
+    # Пустая строка после заголовка: DictReader ее пропускает
+    return csv_text(CATALOG_HEADER, rows).replace('\r\n', '\r\n\r\n', 1)
+
+
+def mixed_update_feed():
+    ok = ['Dior', 'Sauvage', 'Описание', '9 900 ₽', '10', 'https://cdn.example.com/1.jpg']
+    return csv_text(UPDATE_HEADER, [ok, ['Dior'], ok[:1] + ['Homme'] + ok[2:], ['Dior'], ok])
+
+
+@pytest.mark.parametrize('make_feed, statuses', [
+    (mixed_catalog_feed, {'ok', 'skip'}),
+    (mixed_update_feed, {'ok', 'error'}),
+])
+def test_parallel_parse_matches_sequential_parse(make_feed, statuses):
+    text = make_feed()
+
+    def reader():
+        return csv.DictReader(io.StringIO(text), delimiter=catalog_import.CSV_DELIMITER)
+
+    sequential = list(catalog_import.parse_rows(reader()))
+    parallel = list(catalog_import.parse_rows_parallel(reader(), workers=2, batch_rows=2))
+
+    assert parallel == sequential
+    assert {status for status, _, _ in sequential} == statuses
+
+
+def test_dry_run_summary_and_diff_pages(client, admin_headers):
+    catalog_import.sync_text(feed(5))
+    # p0 изменен, 1-2 без изменений, 3-4 пропали из фида, 5-7 новые, строка 2 повторена
+    rows = [catalog_row(0, price=2500), catalog_row(1), catalog_row(2), catalog_row(2)]
+    rows += [catalog_row(i) for i in range(5, 8)]
+    text = csv_text(CATALOG_HEADER, rows)
+
+    def dry_run(query=''):
+        response = client.post(f'/api/admin/import-csv?dry_run=true{query}',
+                               json={'csv_data': text}, headers=admin_headers)
+        assert response.status_code == 200
+        return response.get_json()
+
+    with product_writes() as writes:
+        result = dry_run()
+        page = dry_run('&action=insert&limit=2&offset=1')
+        unchanged = dry_run('&action=unchanged,delete')
+
+    assert writes == []
+    assert ProductStaging.query.count() == 0
+
+    assert result['summary'] == {
+        'rows': 7, 'inserted': 3, 'updated': 1, 'unchanged': 2,
+        'deleted': 2, 'skipped': 1, 'failed': 0, 'rejected': None
+    }
+    assert result['total'] == 6
+    assert [entry['action'] for entry in result['diff']] == ['update'] + ['insert'] * 3 + ['delete'] * 2
+    assert result['diff'][0]['externalId'] == '100'
+
+    assert (page['total'], page['offset'], page['limit']) == (3, 1, 2)
+    assert [entry['externalId'] for entry in page['diff']] == ['106', '107']
+    assert page['summary'] == result['summary']
+
+    assert [(entry['action'], entry['externalId']) for entry in unchanged['diff']] == [
+        ('unchanged', '101'), ('unchanged', '102'), ('delete', '103'), ('delete', '104')
+    ]
+
+
+def test_dry_run_reports_why_the_feed_would_be_rejected(app):
+    catalog_import.sync_text(feed(5))
+
+    result = catalog_import.dry_run_text(feed(2))
+    forced = catalog_import.dry_run_text(feed(2), force=True)
+
+    assert result['summary']['deleted'] == 3
+    assert 'would remove 3 of 5' in result['summary']['rejected']
+    assert forced['summary']['rejected'] is None
+
+    page = catalog_import.dry_run_page(result, ['delete'], offset=2, limit=10)
+    assert [entry['externalId'] for entry in page['diff']] == ['104']
+    assert page['total'] == 3
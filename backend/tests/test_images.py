@@ -0,0 +1,198 @@
+"""
+Пайплайн изображений: скачивание по HTTP, варианты на диске, /media
+"""
+import functools
+import hashlib
+import io
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from app import db  # noqa: E402
+from app.models import ImageAsset  # noqa: E402
+from app.services import images  # noqa: E402
+
+# Исходник больше всех IMAGE_SIZES, чтобы каждый вариант уменьшался
+SOURCE_SIZE = (1000, 600)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def png_bytes():
+    image = Image.new('RGBA', SOURCE_SIZE, (200, 30, 60, 255))
+    out = io.BytesIO()
+    image.save(out, 'PNG')
+    return out.getvalue()
+
+
+@pytest.fixture
+def image_server(app, tmp_path, png_bytes):
+    """Локальный HTTP-сервер со статикой из tmp_path/static (в фоновом потоке)"""
+    static = tmp_path / 'static'
+    static.mkdir()
+    (static / 'perfume.png').write_bytes(png_bytes)
+    # /moved переадресуется на /moved/ (каталог) и отдает index.html
+    (static / 'moved').mkdir()
+    (static / 'moved' / 'index.html').write_bytes(png_bytes)
+
+    # Сервер слушает 127.0.0.1 — по умолчанию такие адреса запрещены
+    app.config['IMAGE_ALLOW_PRIVATE_HOSTS'] = True
+
+    handler = functools.partial(QuietHandler, directory=str(static))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+
+    server.shutdown()
+    server.server_close()
+
+
+def wait_for_asset(url, timeout=10):
+    """Дождаться, пока пул обработает изображение (статус не 'pending')"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.session.rollback()
+        asset = ImageAsset.query.filter_by(source_url=url).one()
+        if asset.status != 'pending':
+            return asset
+        time.sleep(0.05)
+    raise AssertionError(f'Image {url} was not processed in {timeout}s')
+
+
+@pytest.fixture
+def processed(app, image_server, make_product):
+    """Товар, изображение которого скачано пайплайном"""
+    url = f'{image_server}/perfume.png'
+    product = make_product(image=url)
+
+    images.schedule([product])
+    asset = wait_for_asset(url)
+    db.session.refresh(product)
+    return product, asset
+
+
+def test_original_is_stored_under_sha256(app, processed, png_bytes):
+    product, asset = processed
+    content_hash = hashlib.sha256(png_bytes).hexdigest()
+
+    assert asset.status == 'ready', asset.error
+    assert asset.content_hash == content_hash
+    assert (asset.width, asset.height) == SOURCE_SIZE
+    assert product.image_hash == content_hash
+
+    original = images.media_path(app.config['MEDIA_ROOT'], 'original', content_hash)
+    with open(original, 'rb') as f:
+        assert f.read() == png_bytes
+
+
+def test_variants_are_rendered_for_every_size(app, processed):
+    _, asset = processed
+
+    for size_name, size in app.config['IMAGE_SIZES'].items():
+        for ext, fmt in ImageAsset.FORMATS.items():
+            path = images.media_path(app.config['MEDIA_ROOT'], size_name, asset.content_hash, ext)
+            with Image.open(path) as variant:
+                assert variant.format == fmt
+                assert variant.size == (size, size * SOURCE_SIZE[1] // SOURCE_SIZE[0])
+
+
+def test_to_dict_returns_local_variant_urls(app, processed):
+    product, asset = processed
+    data = product.to_dict()
+
+    assert data['images'] == {
+        size: {
+            'webp': f'/media/{size}/{asset.content_hash}.webp',
+            'jpeg': f'/media/{size}/{asset.content_hash}.jpg',
+        }
+        for size in app.config['IMAGE_SIZES']
+    }
+    assert data['image'] == data['images']['card']['jpeg']
+
+
+def test_media_is_served_immutable_with_etag(client, processed):
+    _, asset = processed
+
+    response = client.get(f'/media/card/{asset.content_hash}.webp')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    assert response.cache_control.public
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 365 * 24 * 3600
+
+    etag = response.headers['ETag']
+    assert etag
+
+    cached = client.get(f'/media/card/{asset.content_hash}.webp', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+
+
+@pytest.mark.parametrize('path', [
+    '/media/huge/{hash}.webp',
+    '/media/card/{hash}.png',
+    '/media/card/../{hash}.webp',
+    '/media/card/{missing}.jpg',
+])
+def test_media_rejects_unknown_files(client, processed, path):
+    _, asset = processed
+    response = client.get(path.format(hash=asset.content_hash, missing='0' * 64))
+    assert response.status_code == 404
+
+
+def test_failed_download_keeps_source_url(app, image_server, make_product):
+    url = f'{image_server}/missing.png'
+    product = make_product(image=url)
+
+    images.schedule([product])
+    asset = wait_for_asset(url)
+    db.session.refresh(product)
+
+    assert asset.status == 'failed'
+    assert '404' in asset.error
+    assert product.image_hash is None
+    assert product.to_dict()['image'] == url
+    assert product.to_dict()['images'] is None
+
+
+def test_redirects_are_followed(app, image_server, png_bytes):
+    data = images.fetch_image(f'{image_server}/moved', 1024 * 1024, 5, allow_private_hosts=True)
+    assert data == png_bytes
+
+
+def test_private_hosts_are_refused_by_default(app, image_server, make_product):
+    app.config['IMAGE_ALLOW_PRIVATE_HOSTS'] = False
+    url = f'{image_server}/perfume.png'
+    product = make_product(image=url)
+
+    images.schedule([product])
+    asset = wait_for_asset(url)
+
+    assert asset.status == 'failed'
+    assert 'non-public address 127.0.0.1' in asset.error
+
+
+@pytest.mark.parametrize('url', [
+    'http://127.0.0.1/a.png',
+    'http://10.0.0.5/a.png',
+    'http://192.168.1.1/a.png',
+    'http://169.254.169.254/latest/meta-data/',
+    'http://[::1]/a.png',
+    'http://0.0.0.0/a.png',
+])
+def test_check_public_host_refuses_internal_addresses(url):
+    with pytest.raises(ValueError, match='non-public address'):
+        images.check_public_host(url)
+
+
+def test_check_public_host_accepts_public_addresses():
+    images.check_public_host('https://93.184.216.34/a.png')
@@ -0,0 +1,149 @@
+"""
+Фоновые задания импорта (import_jobs): жизненный цикл, отмена, оборванные задания
+"""
+import csv
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import ImportJob, Product, ProductStaging
+from app.services import catalog_import, import_jobs
+
+# Фид на две пачки: прогресс записывается после первой, до применения плана
+TWO_CHUNKS = catalog_import.CHUNK_SIZE + 1
+
+CATALOG_HEADER = ['ID в системе', 'Название', 'Описание', 'Цена', 'Скидка (в процентах)', 'Изображения (через ;)']
+
+
+def offline_fetcher(url, max_bytes, timeout):
+    raise OSError(f'offline: {url}')
+
+
+@pytest.fixture
+def upload(app, tmp_path):
+    """CSV из count товаров в IMPORT_UPLOAD_DIR, как после save_upload"""
+    # Изображения после импорта не скачиваются из сети
+    app.config['IMAGE_FETCHER'] = offline_fetcher
+
+    def write(count=3):
+        path = tmp_path / f'{uuid.uuid4()}.csv'
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, delimiter=catalog_import.CSV_DELIMITER)
+            writer.writerow(CATALOG_HEADER)
+            for i in range(count):
+                writer.writerow([str(100 + i), f'Dior Sauvage {i} 100мл', f'Описание {i}', '1000 ₽', '0',
+                                 f'https://cdn.example.com/{i}.jpg'])
+        return str(path)
+
+    return write
+
+
+def make_job(file_path, **fields):
+    job = ImportJob(id=str(uuid.uuid4()), source='upload', file_path=file_path, **fields)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def reload(job_id):
+    db.session.expire_all()
+    return db.session.get(ImportJob, job_id)
+
+
+def test_job_runs_from_queued_to_done(app, upload):
+    path = upload(3)
+    job_id = make_job(path)
+    assert reload(job_id).status == 'queued'
+
+    import_jobs.run_job(app, job_id)
+
+    job = reload(job_id)
+    assert job.status == 'done'
+    assert job.error is None
+    assert (job.rows, job.inserted, job.failed) == (3, 3, 0)
+    assert job.worker == import_jobs.worker_id()
+    assert job.started_at <= job.heartbeat_at <= job.finished_at
+    assert Product.query.count() == 3
+    assert ProductStaging.query.count() == 0
+    assert not os.path.exists(path)
+
+
+def test_job_canceled_in_queue_never_runs(app, upload):
+    path = upload(3)
+    job_id = make_job(path)
+
+    import_jobs.request_cancel(reload(job_id))
+    import_jobs.run_job(app, job_id)
+
+    job = reload(job_id)
+    assert job.status == 'canceled'
+    assert job.started_at is None
+    assert Product.query.count() == 0
+
+
+def test_running_job_stops_after_cancel(app, upload, monkeypatch):
+    job_id = make_job(upload(TWO_CHUNKS))
+    save_progress = import_jobs.save_progress
+
+    def cancel_after_first_chunk(job, progress):
+        running = save_progress(job, progress)
+        import_jobs.request_cancel(job)
+        return running
+
+    monkeypatch.setattr(import_jobs, 'save_progress', cancel_after_first_chunk)
+    import_jobs.run_job(app, job_id)
+
+    job = reload(job_id)
+    assert job.status == 'canceled'
+    assert job.staged == catalog_import.CHUNK_SIZE
+    assert Product.query.count() == 0
+    assert ProductStaging.query.count() == 0
+
+
+def test_stale_jobs_are_failed_and_live_ones_kept(app, upload):
+    old = datetime.utcnow() - timedelta(seconds=app.config['IMPORT_JOB_STALE_AFTER'] + 60)
+    dead_path = upload(1)
+    dead = make_job(dead_path, status='running', worker='gone:1', heartbeat_at=old)
+    # Воркер жив: одно задание выполняется, другое давно ждет в его очереди
+    live = make_job(upload(1), status='running', worker='here:2', heartbeat_at=datetime.utcnow())
+    waiting = make_job(upload(1), worker='here:2', heartbeat_at=old)
+
+    assert import_jobs.fail_interrupted() == 1
+
+    assert reload(dead).status == 'failed'
+    assert reload(dead).error == import_jobs.INTERRUPTED_ERROR
+    assert not os.path.exists(dead_path)
+    assert reload(live).status == 'running'
+    assert reload(waiting).status == 'queued'
+
+    # Оборванное задание не получает статус от воркера, которого сочли мертвым,
+    # кроме 'done': каталог тогда уже применен
+    assert not import_jobs.finish(dead, 'canceled')
+    assert reload(dead).status == 'failed'
+    assert import_jobs.finish(dead, 'done')
+    assert reload(dead).status == 'done'
+
+
+def test_job_marked_interrupted_while_running_leaves_catalog_alone(app, upload, monkeypatch):
+    job_id = make_job(upload(TWO_CHUNKS))
+    save_progress = import_jobs.save_progress
+
+    def reclaimed_by_another_worker(job, progress):
+        db.session.execute(
+            db.update(ImportJob).where(ImportJob.id == job.id)
+            .values(status='failed', error=import_jobs.INTERRUPTED_ERROR)
+        )
+        db.session.commit()
+        return save_progress(job, progress)
+
+    monkeypatch.setattr(import_jobs, 'save_progress', reclaimed_by_another_worker)
+    import_jobs.run_job(app, job_id)
+
+    job = reload(job_id)
+    assert job.status == 'failed'
+    assert job.error == import_jobs.INTERRUPTED_ERROR
+    assert Product.query.count() == 0
+    assert ProductStaging.query.count() == 0
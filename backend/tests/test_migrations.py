@@ -0,0 +1,46 @@
+"""
+Миграции на базах, созданных create_all на промежуточных версиях
+"""
+import pytest
+from sqlalchemy import inspect, text
+
+pytest.importorskip('flask_migrate')
+
+from app import db  # noqa: E402
+from app.services import schema  # noqa: E402
+
+
+def product_columns():
+    return {column['name'] for column in inspect(db.engine).get_columns('products')}
+
+
+def external_id_unique_count():
+    inspector = inspect(db.engine)
+    constraints = [c for c in inspector.get_unique_constraints('products') if c['column_names'] == ['external_id']]
+    indexes = [i for i in inspector.get_indexes('products') if i['unique'] and i['column_names'] == ['external_id']]
+    return len(constraints) + len(indexes)
+
+
+def test_upgrade_adds_columns_missing_from_an_intermediate_schema(app):
+    # Схема после синхронизации каталога, но до пайплайна изображений:
+    # external_id уже есть, image_hash и image_assets — нет
+    with db.engine.begin() as connection:
+        connection.execute(text('ALTER TABLE products DROP COLUMN image_hash'))
+        connection.execute(text('DROP TABLE image_assets'))
+    assert 'image_hash' not in product_columns()
+
+    before, after = schema.upgrade(app)
+
+    assert before is None
+    assert after == schema.current_revision()
+    assert {'external_id', 'image_hash', 'content_hash', 'deleted_at'} <= product_columns()
+    assert inspect(db.engine).has_table('image_assets')
+    assert external_id_unique_count() == 1
+
+
+def test_upgrade_is_idempotent(app):
+    first = schema.upgrade(app)
+    second = schema.upgrade(app)
+
+    assert second == (first[1], first[1])
+    assert external_id_unique_count() == 1
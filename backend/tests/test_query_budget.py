@@ -0,0 +1,174 @@
+"""
+Бюджеты запросов к БД горячих роутов (query_budget)
+
+В TestingConfig QUERY_BUDGET_RAISE включен: роут, превысивший бюджет,
+падает QueryBudgetExceeded, и тест вместе с ним. Каждый роут проверяется
+на холодных кэшах процесса — это самый дорогой путь.
+"""
+import re
+
+import pytest
+from flask import jsonify
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models import Order, OrderItem, Product
+from app.services import bootstrap
+from app.services.site_settings import SiteSettings
+from app.utils.query_stats import QueryBudgetExceeded, count_queries, query_budget
+
+SERVER_TIMING_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def queries(response):
+    """Число запросов к БД из заголовка Server-Timing"""
+    return int(SERVER_TIMING_QUERIES_RE.search(response.headers['Server-Timing']).group(1))
+
+
+@pytest.fixture
+def catalog(make_product):
+    for i, category in enumerate(('men', 'women', 'unisex', 'men', 'women', 'men')):
+        make_product(
+            external_id=str(100 + i),
+            name=f'Dior Sauvage {i} 100мл',
+            brand='Dior',
+            category=category,
+            is_featured=i < 3,
+            is_visible=i != 5,
+            image=f'https://cdn.example.com/{i}.jpg',
+        )
+
+
+@pytest.mark.parametrize('query', [
+    '',
+    '?category=men',
+    '?featured=true',
+    '?search=sauvage',
+    '?visible=false',
+])
+def test_products(client, catalog, query):
+    response = client.get(f'/api/products{query}')
+
+    assert response.status_code == 200
+    assert response.json['products']
+    assert queries(response) <= 2
+
+
+def test_settings(client):
+    # Холодный кэш и пустая таблица: документ настроек создается при чтении
+    first = client.get('/api/settings')
+    assert first.status_code == 200
+    assert 1 <= queries(first) <= 4
+
+    second = client.get('/api/settings')
+    assert second.status_code == 200
+    assert second.json == first.json
+
+
+def test_settings_after_update(client, admin_headers, monkeypatch):
+    # Без окна перепроверки каждый ответ сверяет версию с БД
+    monkeypatch.setattr(SiteSettings, 'REVALIDATE_INTERVAL', 0)
+
+    client.get('/api/settings')
+    response = client.put('/api/settings', json={'settings': {'shopName': 'Airshop'}}, headers=admin_headers)
+    assert response.status_code == 200
+
+    response = client.get('/api/settings')
+    assert response.status_code == 200
+    assert response.json['settings']['shopName'] == 'Airshop'
+    assert queries(response) <= 4
+
+
+def test_bootstrap(client, catalog, monkeypatch):
+    # Без окна перепроверки каждый ответ сверяет версию настроек и каталог
+    monkeypatch.setattr(bootstrap, 'REVALIDATE_INTERVAL', 0)
+
+    cold = client.get('/api/bootstrap')
+    assert cold.status_code == 200
+    assert len(cold.json['featured']) == 3
+    assert cold.json['categories']['all'] == 5
+    assert queries(cold) <= 8
+
+    product = db.session.get(Product, 1)
+    product.price = 9900.0
+    db.session.commit()
+
+    rebuilt = client.get('/api/bootstrap')
+    assert rebuilt.status_code == 200
+    assert rebuilt.headers['ETag'] != cold.headers['ETag']
+    assert queries(rebuilt) <= 8
+
+    cached = client.get('/api/bootstrap', headers={'If-None-Match': rebuilt.headers['ETag']})
+    assert cached.status_code == 304
+
+
+def test_auth_verify(client, admin, admin_headers):
+    # Отзыв токена сверяется с кэшем пользователей — холодный кэш стоит один запрос
+    response = client.get('/api/auth/verify', headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json['user'] == {'id': admin.id, 'username': admin.username, 'role': admin.role}
+    assert queries(response) <= 1
+
+    response = client.get('/api/auth/verify', headers=admin_headers)
+    assert response.status_code == 200
+    assert queries(response) == 0
+
+
+@pytest.fixture
+def orders(catalog):
+    for i in range(5):
+        order = Order(
+            order_number=f'AS-{1000 + i}',
+            customer_name='Иван Петров',
+            customer_email='ivan@example.com',
+            customer_phone='+79990000000',
+            delivery_address='ул. Тверская, 1',
+            delivery_city='Москва',
+            delivery_zipcode='125009',
+            subtotal=15000.0,
+            total_amount=15000.0,
+            payment_method='card',
+        )
+        for product_id in (1, 2):
+            order.items.append(OrderItem(product_id=product_id, product_name='Dior Sauvage', product_price=7500.0,
+                                         quantity=1))
+        db.session.add(order)
+    db.session.commit()
+
+
+@pytest.mark.parametrize('query, count', [('', 5), ('?limit=2&offset=1', 2), ('?status=pending', 5)])
+def test_orders(client, admin_headers, orders, query, count):
+    # Позиции всех заказов грузятся одним запросом, а не по запросу на заказ
+    response = client.get(f'/api/orders{query}', headers=admin_headers)
+
+    assert response.status_code == 200
+    assert len(response.json['orders']) == count
+    assert all(len(order['items']) == 2 for order in response.json['orders'])
+    assert response.json['total'] == 5
+    assert queries(response) <= 4
+
+
+def test_failed_query_leaves_no_timer_on_the_connection(app):
+    with db.engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.exec_driver_sql('SELECT * FROM missing_table')
+
+        with count_queries() as counter:
+            connection.exec_driver_sql('SELECT 1')
+
+        assert 'query_start' not in connection.info
+        assert counter.count == 1
+        assert 0 <= counter.duration < 1
+
+
+def test_budget_exceeded_raises(app, client):
+    @app.route('/test-over-budget')
+    @query_budget(1)
+    def over_budget():
+        Product.query.count()
+        Product.query.count()
+        return jsonify({})
+
+    with pytest.raises(QueryBudgetExceeded, match='executed 2 queries'):
+        client.get('/test-over-budget')
@@ -0,0 +1,83 @@
+"""
+Асинхронный клиент ЮКассы против фейкового API (benchmarks/fake_yookassa.py)
+"""
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from app.services import yookassa_async_service  # noqa: E402
+from app.services.yookassa_async_service import AsyncYooKassaService  # noqa: E402
+from benchmarks import fake_yookassa  # noqa: E402
+
+PAYMENT = {
+    'amount': 1500.0,
+    'order_number': 'ORD-1',
+    'customer_email': 'customer@example.com',
+    'return_url': 'https://airshop.example/payment/success',
+}
+
+
+@pytest.fixture
+def api_url():
+    server, url = fake_yookassa.serve()
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def test_calls_share_one_process_client(api_url):
+    async def scenario():
+        service = AsyncYooKassaService('shop', 'secret', api_url=api_url)
+        async with yookassa_async_service.lifespan():
+            payment = await service.create_payment(PAYMENT)
+            status = await service.check_payment_status(payment['payment_id'])
+            refund = await service.create_refund(payment['payment_id'], 500.0)
+            client = service.client
+            assert AsyncYooKassaService('shop', 'secret', api_url=api_url).client is client
+        return payment, status, refund, client
+
+    payment, status, refund, client = asyncio.run(scenario())
+
+    assert payment['success'] and payment['status'] == 'pending'
+    assert status == {**status, 'success': True, 'status': 'succeeded', 'paid': True}
+    assert refund['success'] and refund['amount'] == 500.0
+    # lifespan закрыл клиент при выходе
+    assert client.is_closed
+    assert yookassa_async_service._client is None
+
+
+def test_shared_client_refuses_another_event_loop(api_url):
+    async def open_client():
+        return yookassa_async_service.get_client()
+
+    async def use_client():
+        return await AsyncYooKassaService('shop', 'secret', api_url=api_url).check_payment_status('p1')
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(open_client())
+        with pytest.raises(RuntimeError, match='another event loop'):
+            asyncio.run(use_client())
+    finally:
+        loop.run_until_complete(yookassa_async_service.aclose())
+        loop.close()
+
+
+def test_own_client_and_errors(api_url):
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            service = AsyncYooKassaService('shop', 'secret', api_url=api_url, client=client)
+            missing = await service.get_refund_status('r1')
+            offline = await AsyncYooKassaService(
+                'shop', 'secret', api_url='http://127.0.0.1:9/v3', client=client
+            ).check_payment_status('p1')
+        return missing, offline
+
+    missing, offline = asyncio.run(scenario())
+
+    assert missing == {'success': False, 'error': 'Not found'}
+    assert offline['success'] is False
+    assert offline['error'].startswith('Network error')
+    assert yookassa_async_service._client is None
@@ -26,14 +26,68 @@ apiClient.interceptors.request.use(
   }
 );
 
+export const clearTokens = () => {
+  localStorage.removeItem('jwt_token');
+  localStorage.removeItem('refresh_token');
+  localStorage.removeItem('admin_user');
+};
+
+// Ответ 401 от этих запросов не продлевает вход
+const NO_REFRESH_URLS = ['/auth/login', '/auth/refresh', '/auth/logout'];
+
+// Один обмен refresh-токена на все запросы, получившие 401 одновременно
+let refreshPromise = null;
+
+const refreshTokens = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshPromise = axios
+      .post(`${BASE_URL}/auth/refresh`, null, {
+        headers: { Authorization: `Bearer ${refreshToken}` },
+        timeout: 10000,
+      })
+      .then((response) => {
+        localStorage.setItem('jwt_token', response.data.access_token);
+        localStorage.setItem('refresh_token', response.data.refresh_token);
+        return response.data.access_token;
+      })
+      .catch((error) => {
+        // Другая вкладка уже обменяла этот токен — берем ее результат
+        if (localStorage.getItem('refresh_token') !== refreshToken) {
+          return localStorage.getItem('jwt_token');
+        }
+        throw error;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
 // Interceptor для обработки ошибок
 apiClient.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const request = error.config;
+
     if (error.response?.status === 401) {
+      // Access-токен истек — один раз пробуем продлить вход refresh-токеном
+      const canRefresh = request && !request._retried && localStorage.getItem('refresh_token')
+        && !NO_REFRESH_URLS.includes(request.url);
+      if (canRefresh) {
+        request._retried = true;
+        try {
+          const accessToken = await refreshTokens();
+          request.headers.Authorization = `Bearer ${accessToken}`;
+          return apiClient(request);
+        } catch (refreshError) {
+          // Refresh-токен истек или отозван — ниже выход из админки
+        }
+      }
+
       // Токен истек или невалиден - выход из админки
-      localStorage.removeItem('jwt_token');
-      localStorage.removeItem('admin_user');
+      clearTokens();
 
       // Перенаправляем только если мы на админской странице
       if (window.location.pathname.startsWith('/admin') && window.location.pathname !== '/admin/login') {
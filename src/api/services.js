@@ -1,13 +1,14 @@
-import apiClient from './client';
+import apiClient, { clearTokens } from './client';
 
 // ============= AUTHENTICATION =============
 
 export const authAPI = {
   login: async (username, password) => {
     const response = await apiClient.post('/auth/login', { username, password });
-    // Сохраняем токен
+    // Сохраняем токены
     if (response.data.access_token) {
       localStorage.setItem('jwt_token', response.data.access_token);
+      localStorage.setItem('refresh_token', response.data.refresh_token);
       localStorage.setItem('admin_user', JSON.stringify(response.data.user));
     }
     return response.data;
@@ -19,8 +20,14 @@ export const authAPI = {
   },
 
   logout: () => {
-    localStorage.removeItem('jwt_token');
-    localStorage.removeItem('admin_user');
+    // Отзываем refresh-токены этого входа; ошибку игнорируем — токены удаляются в любом случае
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      apiClient.post('/auth/logout', null, {
+        headers: { Authorization: `Bearer ${refreshToken}` },
+      }).catch(() => {});
+    }
+    clearTokens();
   },
 };
 
@@ -60,11 +67,62 @@ export const productsAPI = {
 
 // ============= ADMIN =============
 
+const IMPORT_POLL_INTERVAL = 1000;
+const IMPORT_FINISHED_STATUSES = ['done', 'failed', 'canceled'];
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 export const adminAPI = {
-  importCSV: async (csvData) => {
-    const response = await apiClient.post('/admin/import-csv', { csv_data: csvData });
+  // Импорт выполняется фоновым заданием: отправляем CSV и опрашиваем прогресс
+  importCSV: async (csvData, onProgress) => {
+    const response = await apiClient.post('/admin/import-jobs', csvData, {
+      headers: { 'Content-Type': 'text/csv; charset=utf-8' },
+    });
+    let job = response.data.job;
+
+    while (!IMPORT_FINISHED_STATUSES.includes(job.status)) {
+      await sleep(IMPORT_POLL_INTERVAL);
+      job = await adminAPI.getImportJob(job.id);
+      if (onProgress) onProgress(job);
+    }
+
+    if (job.status !== 'done') {
+      throw new Error(job.error || 'Импорт отменен');
+    }
+
+    const errors = job.progress.failed > 0 ? await adminAPI.getImportJobErrors(job.id) : null;
+
+    return {
+      success: true,
+      imported: job.progress.imported,
+      errors,
+      job,
+    };
+  },
+
+  // Предпросмотр импорта: итог и страница изменений, каталог не меняется
+  previewCSV: async (csvData, params = {}) => {
+    const response = await apiClient.post('/admin/import-csv', csvData, {
+      headers: { 'Content-Type': 'text/csv; charset=utf-8' },
+      params: { ...params, dry_run: true },
+    });
     return response.data;
-  }
+  },
+
+  getImportJob: async (id) => {
+    const response = await apiClient.get(`/admin/import-jobs/${id}`);
+    return response.data.job;
+  },
+
+  getImportJobErrors: async (id) => {
+    const response = await apiClient.get(`/admin/import-jobs/${id}/errors`);
+    return response.data.errors;
+  },
+
+  cancelImportJob: async (id) => {
+    const response = await apiClient.post(`/admin/import-jobs/${id}/cancel`);
+    return response.data.job;
+  },
 };
 
 // ============= ORDERS =============
@@ -130,6 +188,16 @@ export const paymentAPI = {
   },
 };
 
+// ============= STOREFRONT =============
+
+// Настройки, избранные товары и категории для первой отрисовки одним запросом
+export const storefrontAPI = {
+  bootstrap: async () => {
+    const response = await apiClient.get('/bootstrap');
+    return response.data;
+  },
+};
+
 // ============= SETTINGS =============
 
 export const settingsAPI = {
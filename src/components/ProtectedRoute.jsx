@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
 import { Navigate } from 'react-router-dom';
 import { authAPI } from '../api/services';
+import { clearTokens } from '../api/client';
 
 const ProtectedRoute = ({ children }) => {
   const [isAuthenticated, setIsAuthenticated] = useState(null);
@@ -20,8 +21,7 @@ const ProtectedRoute = ({ children }) => {
         setIsAuthenticated(true);
       } catch (error) {
         setIsAuthenticated(false);
-        localStorage.removeItem('jwt_token');
-        localStorage.removeItem('admin_user');
+        clearTokens();
       } finally {
         setLoading(false);
       }
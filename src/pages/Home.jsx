@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { ArrowRight, Shield, Truck, RefreshCw, Sparkles } from 'lucide-react';
-import { productsAPI, settingsAPI } from '../api/services';
+import { storefrontAPI } from '../api/services';
 import { formatPrice, addToCart } from '../utils/helpers';
 
 const Home = () => {
@@ -13,12 +13,10 @@ const Home = () => {
     // Загружаем товары из API
     const loadData = async () => {
       try {
-        const [productsData, settingsData] = await Promise.all([
-          productsAPI.getAll({ featured: true }),
-          settingsAPI.get().catch(() => ({})) // Если настройки не загрузились, используем пустой объект
-        ]);
-        setProducts(productsData.slice(0, 4)); // Только первые 4 товара
-        setSettings(settingsData);
+        // Настройки и избранные товары одним запросом
+        const data = await storefrontAPI.bootstrap();
+        setProducts(data.featured.slice(0, 4)); // Только первые 4 товара
+        setSettings(data.settings || {});
       } catch (error) {
         console.error('Ошибка загрузки данных:', error);
       }